@@ -1,60 +1,41 @@
-import boto3
+from typing import TYPE_CHECKING
 
-from NetworkResources import SecurityGroupManager, ListenerManager, TargetGroupApplicationManager
-from NetworkResources import AutoScalingManager, ApplicationLoadBalancerManager, LaunchTemplateManager
-from AwsDataResources import S3Manager, DynamodbManager
-from VPCManager import VPCManager
-from RDSManager import RDSManager
 from utils.NameGeneratorDNS import generate_unique_dns_name
-from LambdaManagerEmployee import LambdaManagerEmployee
+from utils.ClientRegistry import ClientRegistry
 import configuration as cfg
 
+if TYPE_CHECKING:
+    from VPCManager import VPCManager
+
+# The manager modules are imported by the factory methods, so a run only loads the managers it builds
+
 
 class AWSResourceFactory:
-    def __init__(self, ec2, ec2_client,
-                 elbv2_client,
-                 s3_resource,
-                 s3_client,
-                 dynamodb_client,
-                 dynamodb_resource,
-                 auto_scaling_client,
-                 lambda_client,
-                 iam_client,
-                 logger):
-        self._iam_client = iam_client
-        self._lambda_client = lambda_client
-        self._auto_scaling_client = auto_scaling_client
-        self._dynamodb_client = dynamodb_client
-        self._dynamodb_resource = dynamodb_resource
-        self._s3_client = s3_client
-        self._s3_resource = s3_resource
-        self._elbv2_client = elbv2_client
-        self._ec2_client = ec2_client
-        self._ec2 = ec2
+    def __init__(self, clients: ClientRegistry, logger, inventory=None):
+        """
+        :param clients: Registry the managers get their (lazily created) boto3 clients and resources from
+        :param logger: Logger instance passed to every manager
+        :param inventory: Index of the stack's tagged resources, passed to the managers that can adopt them
+        """
+        self._inventory = inventory
+        self._iam_client = clients.client('iam')
+        self._lambda_client = clients.client('lambda')
+        self._auto_scaling_client = clients.client('autoscaling')
+        self._dynamodb_client = clients.client('dynamodb')
+        self._dynamodb_resource = clients.resource('dynamodb')
+        self._s3_client = clients.client('s3')
+        self._s3_resource = clients.resource('s3')
+        self._elbv2_client = clients.client('elbv2')
+        self._ec2_client = clients.client('ec2')
+        self._ec2 = clients.resource('ec2')
         self._logger = logger
 
     @staticmethod
     def factory(logger):
-        ec2_resource = boto3.resource('ec2', region_name=cfg.config.REGION)
-        client = boto3.client('ec2', region_name=cfg.config.REGION)
-        elbv2_client = boto3.client('elbv2', region_name=cfg.config.REGION)
-        s3_resource = boto3.resource('s3')
-        s3_client = boto3.client('s3')
-        dynamodb_client = boto3.client('dynamodb', region_name=cfg.config.REGION)
-        dynamodb_resource = boto3.resource('dynamodb', region_name=cfg.config.REGION)
-        asg_client = boto3.client('autoscaling', region_name=cfg.config.REGION)
-
-        return AWSResourceFactory(ec2=ec2_resource,
-                                  ec2_client=client,
-                                  elbv2_client=elbv2_client,
-                                  s3_resource=s3_resource,
-                                  s3_client=s3_client,
-                                  dynamodb_resource=dynamodb_resource,
-                                  dynamodb_client=dynamodb_client,
-                                  auto_scaling_client=asg_client,
-                                  logger=logger)
+        return AWSResourceFactory(clients=ClientRegistry(), logger=logger)
 
     def lambda_manager(self):
+        from LambdaManagerEmployee import LambdaManagerEmployee
         return LambdaManagerEmployee(function_name=cfg.lambda_config.FUNCTION_NAME,
                                      role_name=cfg.lambda_config.ROLE_NAME,
                                      lambda_client=self._lambda_client,
@@ -62,8 +43,10 @@ class AWSResourceFactory:
                                      s3_client=self._s3_client,
                                      logger=self._logger)
 
-    def vpc_manager(self) -> VPCManager:
-        sg = SecurityGroupManager(ec2=self._ec2,
+    def vpc_manager(self) -> 'VPCManager':
+        from NetworkResources.SecurityGroupManager import SecurityGroupManager
+        from VPCManager import VPCManager
+        sg = SecurityGroupManager(ec2_client=self._ec2_client,
                                   group_name=cfg.vpc_config.SG_NAME,
                                   sg_inbound_rules=cfg.vpc_config.SG_INBOUND_RULES,
                                   logger=self._logger)
@@ -71,52 +54,80 @@ class AWSResourceFactory:
         return VPCManager(ec2=self._ec2,
                           client=self._ec2_client,
                           security_group_manager=sg,
-                          logger=self._logger)
+                          logger=self._logger,
+                          inventory=self._inventory)
 
     def target_group_application_manager(self):
+        from NetworkResources.TargetGroupApplicationManager import TargetGroupApplicationManager
         return TargetGroupApplicationManager(client=self._elbv2_client, logger=self._logger)
 
     def application_load_balancer_manager(self):
+        from NetworkResources.ApplicationLoadBalancerManager import ApplicationLoadBalancerManager
         return ApplicationLoadBalancerManager(name=cfg.alb_config.NAME,
                                               elbv2_client=self._elbv2_client,
-                                              logger=self._logger)
+                                              logger=self._logger,
+                                              inventory=self._inventory)
 
     def target_group(self):
+        from NetworkResources.TargetGroupApplicationManager import TargetGroupApplicationManager
         return TargetGroupApplicationManager(client=self._elbv2_client,
                                              name=cfg.alb_config.TARGET_GROUP_NAME,
-                                             logger=self._logger)
+                                             logger=self._logger,
+                                             inventory=self._inventory)
 
     def listener_manager(self):
+        from NetworkResources.ListenerManager import ListenerManager
         return ListenerManager(elbv2_client=self._elbv2_client,
                                logger=self._logger)
 
     def auto_scaling_manager(self):
+        from NetworkResources.AutoScalingManager import AutoScalingManager
         return AutoScalingManager(name=cfg.asg_config.AUTO_SCALING_GROUP_NAME,
                                   asg_client=self._auto_scaling_client,
                                   logger=self._logger)
 
     def launch_template_manager(self):
+        from NetworkResources.LaunchTemplateManager import LaunchTemplateManager
         return LaunchTemplateManager(ec2_client=self._ec2_client,
                                      name=cfg.ec2_config.LAUNCH_TEMPLATE_NAME,
                                      region=cfg.config.REGION,
-                                     logger=self._logger)
+                                     logger=self._logger,
+                                     inventory=self._inventory)
+
+    def image_bake_manager(self):
+        from NetworkResources.ImageBakeManager import ImageBakeManager
+        return ImageBakeManager(ec2_client=self._ec2_client,
+                                name=cfg.ec2_config.GOLDEN_IMAGE_NAME,
+                                logger=self._logger)
+
+    def bootstrap_artifact_manager(self):
+        from AwsDataResources.BootstrapArtifactManager import BootstrapArtifactManager
+        return BootstrapArtifactManager(ec2_client=self._ec2_client,
+                                        s3_client=self._s3_client,
+                                        prefix=cfg.ec2_config.BOOTSTRAP_ARTIFACT_PREFIX,
+                                        logger=self._logger)
 
     def s3_manager(self):
+        from AwsDataResources.S3Manager import S3Manager
         bucket_name = generate_unique_dns_name(cfg.s3_config.S3_BUCKET_BASE_NAME)
         return S3Manager(s3=self._s3_resource,
                          s3_client=self._s3_client,
                          bucket_name=bucket_name,
                          region=cfg.config.REGION,
-                         logger=self._logger)
+                         logger=self._logger,
+                         inventory=self._inventory)
 
     def dynamodb_manager(self):
+        from AwsDataResources.DynamodbManager import DynamodbManager
         return DynamodbManager(dynamodb=self._dynamodb_resource,
                                dynamodb_client=self._dynamodb_client,
                                table_name=cfg.dynamodb_config.NAME,
                                region=cfg.config.REGION,
-                               logger=self._logger)
+                               logger=self._logger,
+                               inventory=self._inventory)
 
     def rds_manager(self):
+        from RDSManager import RDSManager
         resources = dict()
         resources['S3Manager'] = (self.s3_manager())
         resources['DynamodbManager'] = (self.dynamodb_manager())
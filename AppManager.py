@@ -1,9 +1,17 @@
-import boto3
-import time
+import functools
+import os
 from AWSResourceFactory import AWSResourceFactory
+from NetworkResources.EndpointPolicy import S3EndpointPolicy, DynamodbEndpointPolicy
 from NetworkResources.Interfaces.TargetGroupInterface import TargetGroupInterface
 import Interfaces
-from configuration import config, asg_config, alb_config, lambda_config, vpc_config, ec2_config
+from utils.DependencyGraph import DependencyGraph, deletion_step
+from utils.Tracer import tracer
+from utils.ApiCallMetrics import api_metrics
+from utils.ClientRegistry import ClientRegistry
+from utils.Inventory import Inventory
+from utils.RetryPolicy import RetryPolicy
+from utils.StateStore import StateStore
+from configuration import config, asg_config, alb_config, lambda_config, vpc_config, ec2_config, dynamodb_config
 
 
 class AppManager:
@@ -11,28 +19,21 @@ class AppManager:
         self.listener_manager = None
         self._lt_manager = None
         self.logger = logger
-        self._ec2_resource = boto3.resource('ec2', region_name=config.REGION)
-        self._client = boto3.client('ec2', region_name=config.REGION)
-        self._elbv2_client = boto3.client('elbv2', region_name=config.REGION)
-        self._s3_resource = boto3.resource('s3')
-        self._s3_client = boto3.client('s3')
-        self._dynamodb_client = boto3.client('dynamodb', region_name=config.REGION)
-        self._dynamodb_resource = boto3.resource('dynamodb', region_name=config.REGION)
-        self._asg_client = boto3.client('autoscaling', region_name=config.REGION)
-        self._lambda_client = boto3.client('lambda')
-        self._iam_client = boto3.client('iam')
-
-        aws_resources_factory = AWSResourceFactory(ec2=self._ec2_resource,
-                                                   ec2_client=self._client,
-                                                   elbv2_client=self._elbv2_client,
-                                                   s3_resource=self._s3_resource,
-                                                   s3_client=self._s3_client,
-                                                   dynamodb_resource=self._dynamodb_resource,
-                                                   dynamodb_client=self._dynamodb_client,
-                                                   auto_scaling_client=self._asg_client,
-                                                   lambda_client=self._lambda_client,
-                                                   iam_client=self._iam_client,
-                                                   logger=logger)
+        # Clients are created on first use, so a run only pays for the services it touches
+        self._clients = ClientRegistry()
+        self._clients.add_create_hook(api_metrics.attach)
+        # Shared by every step retrying transient errors, with backoff instead of fixed sleeps
+        self._retry_policy = RetryPolicy(max_attempts=config.RETRY_MAX_ATTEMPTS,
+                                         base_delay=config.RETRY_BASE_DELAY,
+                                         max_delay=config.RETRY_MAX_DELAY,
+                                         logger=logger)
+        # Resources recorded by an earlier run are reused when their configuration didn't change
+        self._state = StateStore(config.STATE_FILE, logger) if config.STATE_FILE else None
+
+        # Resources of the stack without a state record (e.g. the state file was lost) are found by their stack tag
+        self._inventory = Inventory(self._clients, logger)
+
+        aws_resources_factory = AWSResourceFactory(clients=self._clients, logger=logger, inventory=self._inventory)
 
         self._vpc_manager: Interfaces.VpcInterface = aws_resources_factory.vpc_manager()
 
@@ -46,99 +47,344 @@ class AppManager:
 
         self._lt_manager = aws_resources_factory.launch_template_manager()
 
+        self._image_bake = aws_resources_factory.image_bake_manager()
+
+        self._bootstrap_artifact = aws_resources_factory.bootstrap_artifact_manager()
+
         self._rds_manager = aws_resources_factory.rds_manager()
 
         self._app_lambda = aws_resources_factory.lambda_manager()
 
     def initialize_vpc_and_aws_resources(self):
-        self._vpc_manager.launch_vpc_environment(**vpc_config.VPC_LAUNCH_PARAMS)
+        """
+            Provisions the whole stack. Every step declares the inputs it consumes and the outputs it
+            produces, so steps that don't depend on each other (e.g. the S3 bucket, the DynamoDB table,
+            the key pair and the Lambda IAM role don't need the VPC) run concurrently.
+            Steps whose configuration and inputs match the deployment state of an earlier run reuse its
+            resources, so a re-run only creates or updates what changed.
+        """
+        try:
+            with tracer.phase('deploy'):
+                self._build_deploy_graph().run(state=self._state)
+        finally:
+            self._export_trace('deploy')
+
+    def _build_deploy_graph(self) -> DependencyGraph:
+        graph = DependencyGraph(logger=self.logger)
+
+        graph.add_step('vpc', self._launch_vpc,
+                       provides=('vpc_id', 'subnet_ids', 'security_group_id', 'internet_gateway_id', 'route_table_id'),
+                       config=(vpc_config.VPC_LAUNCH_PARAMS, vpc_config.SG_INBOUND_RULES),
+                       restore=self._vpc_manager.load_vpc_environment)
+
+        graph.add_step('s3_bucket', self._setup_bucket, provides=('bucket_name',),
+                       restore=self._load_bucket)
+
+        graph.add_step('dynamodb_table', functools.partial(self._rds_manager.setup_resource, 'DynamodbManager'),
+                       config=(dynamodb_config.NAME, dynamodb_config.key_schema, dynamodb_config.attribute_definitions,
+                               dynamodb_config.provisioned_throughput),
+                       restore=functools.partial(self._rds_manager.load_resource, 'DynamodbManager', {}))
+
+        if vpc_config.ENABLE_GATEWAY_ENDPOINTS:
+            graph.add_step('gateway_endpoints', self._create_gateway_endpoints,
+                           requires=('vpc_id', 'bucket_name'), provides=('vpc_endpoint_ids',),
+                           config=(vpc_config.S3_ENDPOINT_EXTRA_OBJECT_ARNS, dynamodb_config.NAME),
+                           restore=self._vpc_manager.load_gateway_endpoints)
+
+        graph.add_step('key_pair', self._create_key_pair, provides=('key_pair',),
+                       config=(ec2_config.create_new_key_pair, ec2_config.KEY_PAIR_NAME),
+                       restore=self._load_key_pair)
+
+        graph.add_step('lambda_role', self._create_lambda_role, provides=('role_arn',),
+                       config=lambda_config.ROLE_NAME,
+                       restore=self._load_lambda_role)
 
-        self.launch_alb_server()
+        graph.add_step('load_balancer', self._create_load_balancer,
+                       requires=('subnet_ids', 'security_group_id'), provides=('load_balancer_arn',),
+                       config=alb_config.CREATE_ALB_PARAMS,
+                       restore=self._alb.load_load_balancer)
 
-        rds_response = self._rds_manager.setup()
+        graph.add_step('target_group', self._create_target_group,
+                       requires=('vpc_id',), provides=('target_group_arn',),
+                       config=alb_config.TG_PARAMS,
+                       restore=self._tg.load_target_group)
 
-        user_data = ec2_config.lunch_template_script_stress(rds_response['S3Manager']['Name'])
-        self._lt_manager.create_launch_template(user_data_script=user_data,
-                                                security_group_id=[self._vpc_manager.security_group_id],
-                                                **ec2_config.LAUNCH_TEMPLATE_CREATE_PARAMS)
+        graph.add_step('listener', self._create_listener,
+                       requires=('load_balancer_arn', 'target_group_arn'), provides=('listener_arn',),
+                       config=alb_config.LISTENER_PARAMS,
+                       restore=self.listener_manager.load_listener)
 
-        self.launch_auto_scaling_group()
+        # Baked once per app version and build recipe, a re-run with a new VPC finds the image by its tags
+        graph.add_step('golden_image', self._bake_image,
+                       requires=('subnet_ids', 'security_group_id'), provides=('image_id',),
+                       config=(ec2_config.BAKE_IMAGE, ec2_config.APP_VERSION, ec2_config.LAUNCH_TEMPLATE_AMI,
+                               ec2_config.LAUNCH_TEMPLATE_TYPE, ec2_config.image_build_script()),
+                       restore=self._image_bake.load_image)
 
-        self.load_bucket_photos_lambda(bucket_name=rds_response['S3Manager']['Name'])
+        # Without a golden image, the app and its node_modules are packaged once into the stack bucket
+        graph.add_step('bootstrap_artifact', self._publish_bootstrap_artifact,
+                       requires=('bucket_name', 'subnet_ids', 'security_group_id'), provides=('artifact_url',),
+                       config=(ec2_config.BAKE_IMAGE, ec2_config.CACHE_BOOTSTRAP_ARTIFACT, ec2_config.APP_VERSION,
+                               ec2_config.LAUNCH_TEMPLATE_AMI, ec2_config.LAUNCH_TEMPLATE_TYPE, ec2_config.IAM_ROLE,
+                               ec2_config.artifact_build_script('')),
+                       restore=self._bootstrap_artifact.load_artifact)
+
+        # The user data template is part of the configuration, the bucket and artifact it is rendered with are inputs
+        graph.add_step('launch_template', self._create_launch_template,
+                       requires=('bucket_name', 'security_group_id', 'key_pair', 'image_id', 'artifact_url'),
+                       provides=('launch_template_id', 'launch_template_version'),
+                       config=(ec2_config.LAUNCH_TEMPLATE_CREATE_PARAMS, self._user_data('', '')),
+                       restore=self._lt_manager.load_launch_template)
+
+        # A new launch template version changes the inputs, the group then rolls its instances over to it
+        graph.add_step('auto_scaling_group', self.launch_auto_scaling_group,
+                       requires=('launch_template_id', 'launch_template_version', 'subnet_ids', 'target_group_arn',
+                                 'load_balancer_arn'),
+                       config=(asg_config.CREATE_ASG_PARAMS, asg_config.scaling_policies('', ''),
+                               asg_config.INSTANCE_REFRESH_PREFERENCES, asg_config.warm_pool_enabled(),
+                               asg_config.WARM_POOL_PARAMS, asg_config.LAUNCH_LIFECYCLE_HOOK,
+                               asg_config.mixed_instances_policy(), asg_config.CAPACITY_REBALANCE,
+                               asg_config.scheduled_actions()),
+                       restore=self._asg.load_group)
+
+        graph.add_step('lambda', self.load_bucket_photos_lambda, requires=('bucket_name', 'role_arn'),
+                       config=(lambda_config.lambda_code, lambda_config.ZIP_FILE_URL,
+                               lambda_config.LAMBDA_CLIENT_CREATE_FUNCTION),
+                       restore=self._app_lambda.load_lambda_function)
+
+        return graph
 
     def clean_resources(self):
-        functions = [self._asg.delete_group,
-                     self.listener_manager.delete_listener,
-                     self._tg.delete_target_group,
-                     self._alb.delete_load_balancer,
-                     self._rds_manager.clean_resources,
-                     self._lt_manager.clean_resources,
-                     self._vpc_manager.teardown_vpc_resources,
-                     self._app_lambda.clean_up]
-
-        for func in functions:
-            try:
-                func()
-            except Exception as e:
-                self.logger.error(f"Some unexpected error execute {func.__name__}: {e}")
-
-    def launch_alb_server(self):
-        self._alb.create_load_balancer(
+        """
+            Tears the stack down as a reverse dependency graph. Deletions that don't depend on each other
+            (e.g. the Lambda/IAM cleanup, S3 emptying and the DynamoDB delete) run while the ASG drains,
+            and a failing deletion retries only itself.
+        """
+        try:
+            with tracer.phase('teardown'):
+                self._build_teardown_graph().run(keep_going=True)
+            if self._state:
+                self._state.clear()
+        except Exception as e:
+            self.logger.error(f"Some resources could not be cleaned: {e}")
+        finally:
+            self._export_trace('teardown')
+
+    def _export_trace(self, phase: str):
+        """
+        Writes the timeline of a phase as a Chrome trace and as JSON, together with its API call counts,
+        and logs its critical path.
+        """
+        tracer.log_summary(self.logger, phase)
+        api_metrics.log_summary(self.logger, phase)
+        if not config.TRACE_DIRECTORY:
+            return
+
+        try:
+            tracer.export_chrome_trace(os.path.join(config.TRACE_DIRECTORY, f"{phase}-trace.json"), phase)
+            tracer.export_timeline(os.path.join(config.TRACE_DIRECTORY, f"{phase}-timeline.json"), phase)
+            api_metrics.export_json(os.path.join(config.TRACE_DIRECTORY, f"{phase}-api-calls.json"), phase)
+            self.logger.info(f"Timeline of the {phase} written to {config.TRACE_DIRECTORY}")
+        except OSError as e:
+            self.logger.warning(f"Could not write the {phase} timeline: {e}")
+
+    def _build_teardown_graph(self) -> DependencyGraph:
+        graph = DependencyGraph(logger=self.logger)
+        retry_params = {'retry_policy': self._retry_policy.replace(deadline=config.TEARDOWN_STEP_DEADLINE)}
+
+        graph.add_step('auto_scaling_group', deletion_step(self._asg.delete_group), **retry_params)
+
+        graph.add_step('listener', deletion_step(self.listener_manager.delete_listener), **retry_params)
+
+        graph.add_step('target_group', deletion_step(self._tg.delete_target_group),
+                       after=('listener', 'auto_scaling_group'), **retry_params)
+
+        graph.add_step('load_balancer', deletion_step(self._alb.delete_load_balancer), after=('listener',),
+                       **retry_params)
+
+        graph.add_step('s3_bucket', deletion_step(functools.partial(self._rds_manager.clean_resource, 'S3Manager')),
+                       **retry_params)
+
+        graph.add_step('dynamodb_table',
+                       deletion_step(functools.partial(self._rds_manager.clean_resource, 'DynamodbManager')),
+                       **retry_params)
+
+        graph.add_step('launch_template', self._lt_manager.clean_resources, after=('auto_scaling_group',),
+                       **retry_params)
+
+        graph.add_step('lambda', self._app_lambda.clean_up, **retry_params)
+
+        if ec2_config.BAKE_IMAGE and not ec2_config.KEEP_GOLDEN_IMAGE:
+            graph.add_step('golden_image', deletion_step(self._image_bake.deregister_image),
+                           after=('launch_template',), **retry_params)
+
+        self._vpc_manager.add_teardown_steps(graph, after=('auto_scaling_group', 'load_balancer'), **retry_params)
+
+        return graph
+
+    def _launch_vpc(self) -> dict:
+        self._vpc_manager.launch_vpc_environment(**vpc_config.VPC_LAUNCH_PARAMS)
+        return {'vpc_id': self._vpc_manager.id,
+                'subnet_ids': self._get_subnet_ids(),
+                'security_group_id': self._vpc_manager.security_group_id,
+                'internet_gateway_id': self._vpc_manager.internet_gateway_id,
+                'route_table_id': self._vpc_manager.route_table_id}
+
+    def _setup_bucket(self) -> str:
+        return self._rds_manager.setup_resource('S3Manager')['Name']
+
+    def _load_bucket(self, bucket_name: str) -> bool:
+        return self._rds_manager.load_resource('S3Manager', {'Name': bucket_name})
+
+    def _create_gateway_endpoints(self, vpc_id: str, bucket_name: str) -> list[str]:
+        return self._vpc_manager.create_gateway_endpoints({
+            's3': S3EndpointPolicy(bucket_name, vpc_config.S3_ENDPOINT_EXTRA_OBJECT_ARNS).generate_policy(),
+            'dynamodb': DynamodbEndpointPolicy(dynamodb_config.NAME, config.REGION).generate_policy(),
+        })
+
+    def _create_key_pair(self):
+        if ec2_config.create_new_key_pair:
+            return self._lt_manager.create_key_pair(ec2_config.KEY_PAIR_NAME)
+        return None
+
+    def _load_key_pair(self, key_pair) -> bool:
+        return key_pair is None or self._lt_manager.load_key_pair(key_pair)
+
+    def _create_lambda_role(self) -> str:
+        return self._app_lambda.create_lambda_role(lambda_config.ROLE_NAME)
+
+    def _load_lambda_role(self, role_arn: str) -> bool:
+        return self._app_lambda.load_lambda_role(lambda_config.ROLE_NAME)
+
+    def _create_load_balancer(self, subnet_ids: list, security_group_id: str) -> str:
+        return self._alb.create_load_balancer(
             create_alb_params=alb_config.CREATE_ALB_PARAMS,
-            subnets_ids=self._get_subnet_ids(),
-            security_group_id=self._vpc_manager.security_group_id
+            subnets_ids=subnet_ids,
+            security_group_id=security_group_id
         )
 
-        self._tg.create_target_group(vpc_id=self._vpc_manager.id,
+    def _create_target_group(self, vpc_id: str) -> str:
+        self._tg.create_target_group(vpc_id=vpc_id,
                                      target_group_params=alb_config.TG_PARAMS)
+        return self._tg.target_group_arn
+
+    def _create_listener(self, load_balancer_arn: str, target_group_arn: str) -> str:
+        return self.listener_manager.create_listener(load_balancer_arn,
+                                                     target_group_arn=target_group_arn,
+                                                     static_listener_config=alb_config.LISTENER_PARAMS)
+
+    def _bake_image(self, subnet_ids: list, security_group_id: str) -> str:
+        if not ec2_config.BAKE_IMAGE:
+            return ec2_config.LAUNCH_TEMPLATE_AMI
+        return self._image_bake.bake_image(app_version=ec2_config.APP_VERSION,
+                                           base_image_id=ec2_config.LAUNCH_TEMPLATE_AMI,
+                                           build_script=ec2_config.image_build_script(),
+                                           instance_type=ec2_config.LAUNCH_TEMPLATE_TYPE,
+                                           subnet_id=subnet_ids[0],
+                                           security_group_id=security_group_id)
 
-        self.listener_manager.create_listener(self._alb.load_balancer_arn,
-                                              target_group_arn=self._tg.target_group_arn,
-                                              static_listener_config=alb_config.LISTENER_PARAMS)
+    def _publish_bootstrap_artifact(self, bucket_name: str, subnet_ids: list, security_group_id: str) -> str | None:
+        if ec2_config.BAKE_IMAGE or not ec2_config.CACHE_BOOTSTRAP_ARTIFACT:
+            return None
+        return self._bootstrap_artifact.publish_artifact(bucket_name=bucket_name,
+                                                         app_version=ec2_config.APP_VERSION,
+                                                         base_image_id=ec2_config.LAUNCH_TEMPLATE_AMI,
+                                                         instance_type=ec2_config.LAUNCH_TEMPLATE_TYPE,
+                                                         subnet_id=subnet_ids[0],
+                                                         security_group_id=security_group_id,
+                                                         iam_instance_profile=ec2_config.IAM_ROLE)
 
-    def launch_auto_scaling_group(self):
-        self._asg.create_auto_scaling_group(launch_template_id=self._lt_manager.id,
-                                            get_subnets_id_list=self._get_subnet_ids(),
-                                            target_groups_arns=[self._tg.target_group_arn],
-                                            asg_config=asg_config.CREATE_ASG_PARAMS)
+    @staticmethod
+    def _user_data(bucket_name: str, artifact_url: str | None) -> str:
+        # Instances of the golden image only start the app, the others download the packaged app from the bucket
+        # or, without an artifact, install it on every boot
+        if ec2_config.BAKE_IMAGE:
+            return ec2_config.start_app_script(bucket_name)
+        if ec2_config.CACHE_BOOTSTRAP_ARTIFACT:
+            return ec2_config.artifact_start_script(bucket_name, artifact_url)
+        return ec2_config.lunch_template_script_stress(bucket_name)
 
-        self._asg.attach_policy(policy_name=asg_config.POLICY_NAME,
-                                policy_params=asg_config.ASG_POLICY_PARAMS)
+    def _create_launch_template(self, bucket_name: str, security_group_id: str, key_pair, image_id: str,
+                                artifact_url: str | None) -> dict:
+        self._lt_manager.create_launch_template(user_data_script=self._user_data(bucket_name, artifact_url),
+                                                security_group_id=[security_group_id],
+                                                **{**ec2_config.LAUNCH_TEMPLATE_CREATE_PARAMS, 'image_id': image_id})
+        return {'launch_template_id': self._lt_manager.id,
+                'launch_template_version': self._lt_manager.version}
+
+    def launch_auto_scaling_group(self, launch_template_id: str, launch_template_version: str, subnet_ids: list,
+                                  target_group_arn: str, load_balancer_arn: str):
+        # A group left by an earlier run is updated in place, its instances are replaced by a rolling refresh
+        # if the launch template got a new version
+        group_exists = self._asg.load_group()
+        params = dict(launch_template_id=launch_template_id,
+                      get_subnets_id_list=subnet_ids,
+                      target_groups_arns=[target_group_arn],
+                      asg_config=asg_config.CREATE_ASG_PARAMS,
+                      launch_template_version=launch_template_version,
+                      mixed_instances_policy=asg_config.mixed_instances_policy(),
+                      capacity_rebalance=asg_config.ENABLE_MIXED_INSTANCES and asg_config.CAPACITY_REBALANCE)
+        # Warm pool instances are held by the launch hook until bootstrapped, the user data releases them
+        if group_exists:
+            self._asg.update_auto_scaling_group(**params)
+            if asg_config.warm_pool_enabled():
+                self._asg.put_lifecycle_hook(asg_config.LAUNCH_LIFECYCLE_HOOK)
+        else:
+            self._asg.create_auto_scaling_group(
+                **params, lifecycle_hooks=[asg_config.LAUNCH_LIFECYCLE_HOOK] if asg_config.warm_pool_enabled() else ())
+
+        if asg_config.warm_pool_enabled():
+            self._asg.put_warm_pool(asg_config.WARM_POOL_PARAMS)
+        elif group_exists:
+            self._asg.delete_warm_pool()
+            self._asg.delete_lifecycle_hook(asg_config.LAUNCH_LIFECYCLE_HOOK_NAME)
+
+        if group_exists:
+            self._asg.refresh_instances(asg_config.INSTANCE_REFRESH_PREFERENCES)
+
+        # The request count, response time and predictive policies use the ALB metrics of the group's target group
+        self._asg.attach_policies(asg_config.scaling_policies(self._alb.arn_suffix(load_balancer_arn),
+                                                              self._tg.arn_suffix(target_group_arn)))
+        self._asg.put_scheduled_actions(asg_config.scheduled_actions())
 
     def _get_subnet_ids(self):
         return [subnet.id for subnet in self._vpc_manager.subnets]
 
+    @property
+    def clients(self) -> ClientRegistry:
+        return self._clients
+
     @property
     def server_link(self):
         return self._alb.get_alb_dns_name(self._alb.name)
 
-    def _create_lambda_helper(self, bucket_name):
+    def _create_lambda_helper(self, bucket_name, role_arn=None):
         self._app_lambda.deploy_lambda(lambda_code=lambda_config.lambda_code,
                                        role_name=lambda_config.ROLE_NAME,
                                        bucket_name=bucket_name,
                                        zip_file_url=lambda_config.ZIP_FILE_URL,
-                                       lambda_client_create_function_params=lambda_config.LAMBDA_CLIENT_CREATE_FUNCTION)
+                                       lambda_client_create_function_params=lambda_config.LAMBDA_CLIENT_CREATE_FUNCTION,
+                                       role_arn=role_arn)
 
-    def load_bucket_photos_lambda(self, bucket_name, number_of_retries=3):
+    def load_bucket_photos_lambda(self, bucket_name, role_arn=None):
         """
             Deploys a Lambda function for one-time use to upload employee photos to an S3 bucket.
             The function may need to be retried due to transitional states, such as invoking
-            the Lambda function while it's still in a pending state or waiting for a role to be available.
+            the Lambda function while it's still in a pending state or waiting for a role to be available,
+            which the retry policy backs off from until lambda_config.DEPLOY_DEADLINE.
 
             :param bucket_name: The name of the S3 bucket to which the photos will be uploaded.
-            :param number_of_retries: The number of retry attempts in case of failure. Default is 3.
+            :param role_arn: ARN of an already created Lambda role. The role is created if not given.
             :return: None
         """
-        for i in range(number_of_retries):
-            try:  # temporary block for development
-                self.logger.debug(f"Attempt {i + 1} to launch the Lambda function for uploading photos")
-                self._create_lambda_helper(bucket_name=bucket_name)
-                return
-            except Exception as e:
-                self.logger.debug(e)
-                # wait 20 seconds
-                self.logger.debug("Waiting 20 seconds before retrying Lambda execution")
-                time.sleep(20)
+        retry_policy = self._retry_policy.replace(deadline=lambda_config.DEPLOY_DEADLINE)
+        try:
+            retry_policy.call(functools.partial(self._create_lambda_helper, bucket_name=bucket_name, role_arn=role_arn),
+                              name='lambda_deploy')
+        except Exception as e:
+            # The step must fail, or its state is recorded and a re-run restores it without uploading the photos
+            self.logger.error(f"Failed to launch the Lambda function for uploading photos: {e}")
+            raise
 
 
 # if __name__ == '__main__':
@@ -0,0 +1,114 @@
+from botocore.exceptions import ClientError, WaiterError
+
+from configuration import ec2_config
+from NetworkResources.BuilderInstance import BuilderInstance
+from utils.StateStore import config_hash
+from utils.Tracer import traced
+
+
+class BootstrapArtifactManager:
+    def __init__(self, ec2_client, s3_client, prefix: str, logger):
+        """
+        Packages the app together with its installed node_modules into a tarball in the stack bucket, once per
+        app version and install recipe, so instances launched from the plain base image download it from
+        in-region S3 instead of fetching the app from another region and running npm install.
+
+        :param ec2_client: Boto3 client object for EC2, the artifact is built on a builder instance
+        :param s3_client: Boto3 client object for S3
+        :param prefix: Key prefix of the artifacts in the bucket
+        :param logger: Logger instance for logging operations
+        """
+        self._ec2_client = ec2_client
+        self._s3_client = s3_client
+        self._prefix = prefix
+        self._logger = logger
+        self._artifact_url = None
+
+    @property
+    def artifact_url(self) -> str | None:
+        return self._artifact_url
+
+    def artifact_key(self, app_version: str, base_image_id: str, build_script: str) -> str:
+        """
+        :return: The key of the artifact, a change to the base image or the build script packages a new one
+        """
+        recipe = config_hash(base_image_id, build_script)[:12]
+        return f"{self._prefix}/app-{app_version}-{recipe}.tar.gz"
+
+    @traced()
+    def publish_artifact(self, bucket_name: str,
+                         app_version: str,
+                         base_image_id: str,
+                         instance_type: str,
+                         subnet_id: str,
+                         security_group_id: str,
+                         iam_instance_profile: str) -> str:
+        """
+        Returns the artifact of the app version, building it first if the bucket doesn't hold it yet: a builder
+        instance installs the app, uploads the tarball and powers itself off, then it is terminated.
+
+        :param bucket_name: The stack bucket
+        :param app_version: Version of the app, part of the artifact key
+        :param base_image_id: The AMI the builder, and the instances the artifact is for, start from
+        :param instance_type: Instance type of the builder
+        :param subnet_id: Subnet of the builder, it needs internet access to download the packages
+        :param security_group_id: Security group of the builder
+        :param iam_instance_profile: Instance profile allowed to put objects into the bucket
+        :return: The s3:// URL of the artifact
+        """
+        key = self.artifact_key(app_version, base_image_id, ec2_config.artifact_build_script(''))
+        artifact_url = f"s3://{bucket_name}/{key}"
+        if self._object_exists(bucket_name, key):
+            self._artifact_url = artifact_url
+            self._logger.info(f"Using bootstrap artifact {artifact_url}")
+            return self._artifact_url
+
+        builder = BuilderInstance(self._ec2_client, ec2_config.ARTIFACT_BUILDER_NAME, self._logger)
+        instance_id = builder.launch(base_image_id, ec2_config.artifact_build_script(artifact_url), instance_type,
+                                     subnet_id, security_group_id, iam_instance_profile)
+        try:
+            self._logger.info(f"Packaging app version {app_version} on builder instance {instance_id}...")
+            builder.wait_until_built(ec2_config.BAKE_WAITER_DELAY, ec2_config.BAKE_WAITER_MAX_ATTEMPTS)
+        except WaiterError as e:
+            self._logger.error(f"Packaging the bootstrap artifact of app version {app_version} failed: {e}")
+            raise
+        finally:
+            builder.terminate()
+
+        if not self._object_exists(bucket_name, key):
+            self._logger.error(f"Builder instance {instance_id} stopped without uploading {artifact_url}")
+            raise Exception(f"Bootstrap artifact {artifact_url} was not uploaded.")
+
+        self._artifact_url = artifact_url
+        self._logger.info(f"Bootstrap artifact uploaded to {self._artifact_url}")
+        return self._artifact_url
+
+    @traced()
+    def load_artifact(self, artifact_url: str | None) -> bool:
+        """
+        Loads an artifact recorded by an earlier run.
+
+        :param artifact_url: The s3:// URL of the artifact, None if none was built
+        :return: Whether the artifact is still in the bucket
+        """
+        if artifact_url is None:
+            return True
+        bucket_name, _, key = artifact_url.removeprefix('s3://').partition('/')
+        try:
+            if not self._object_exists(bucket_name, key):
+                return False
+        except ClientError:
+            return False
+
+        self._artifact_url = artifact_url
+        return True
+
+    def _object_exists(self, bucket_name: str, key: str) -> bool:
+        try:
+            self._s3_client.head_object(Bucket=bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            self._logger.error(f"Failed to look up {key} in bucket {bucket_name}: {e}")
+            raise
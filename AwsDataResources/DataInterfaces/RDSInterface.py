@@ -9,3 +9,13 @@ class RDSInterface(ABC):
     @abstractmethod
     def clean_resources(self) -> bool:
         raise NotImplementedError
+
+    @abstractmethod
+    def load(self, runtime_params: dict) -> bool:
+        """
+        Loads the resource created by an earlier setup.
+
+        :param runtime_params: The params returned by that setup
+        :return: Whether the resource still exists
+        """
+        raise NotImplementedError
@@ -1,10 +1,16 @@
-import boto3
 from configuration import dynamodb_config
 from AwsDataResources.DataInterfaces.RDSInterface import RDSInterface
+from utils.Inventory import Inventory, stack_tags
+from utils.Tracer import traced
 
 
 class DynamodbManager(RDSInterface):
-    def __init__(self, dynamodb, dynamodb_client, table_name: str, region: str, logger):
+    def __init__(self, dynamodb, dynamodb_client, table_name: str, region: str, logger,
+                 inventory: Inventory = None):
+        """
+        :param inventory: Index of the stack's tagged resources, where the table is looked up before describing it
+        """
+        self._inventory = inventory
         self._dynamodb_client = dynamodb_client
         self._dynamodb = dynamodb
         self._logger = logger
@@ -16,36 +22,48 @@ class DynamodbManager(RDSInterface):
         self.create_table(self._dynamodb)
         return {}
 
-    def _get_dynamodb_table_list(self):
-        """Retrieves a list of DynamoDB table names in the specified region.
+    @traced()
+    def load(self, runtime_params: dict) -> bool:
+        try:
+            self._dynamodb_client.describe_table(TableName=self._table_name)
+        except self._dynamodb_client.exceptions.ResourceNotFoundException:
+            self._logger.info(f"Table {self._table_name} no longer exists.")
+            return False
 
-        Args:
-            region (str): The AWS region.
+        self._table = self._dynamodb.Table(self._table_name)
+        self._logger.info(f"Loaded existing table {self._table_name}")
+        return True
 
-        Returns:
-            list: A list of DynamoDB table names.
+    def _table_exists(self) -> bool:
         """
+        :return: Whether the table exists, found in the inventory or, for a table missing there (e.g. created
+                 without the stack tag), described by name
+        """
+        if self._inventory is not None and self._inventory.find('dynamodb', 'table', self._table_name):
+            return True
 
-        response = self._dynamodb_client.list_tables()
-        return response['TableNames']
+        try:
+            self._dynamodb_client.describe_table(TableName=self._table_name)
+            return True
+        except self._dynamodb_client.exceptions.ResourceNotFoundException:
+            return False
 
     def _create_table(self, dynamodb):
         return dynamodb.create_table(
             TableName=self._table_name,
             KeySchema=dynamodb_config.key_schema,
             AttributeDefinitions=dynamodb_config.attribute_definitions,
-            ProvisionedThroughput=dynamodb_config.provisioned_throughput
+            ProvisionedThroughput=dynamodb_config.provisioned_throughput,
+            Tags=stack_tags(self._table_name)
         )
 
+    @traced()
     def create_table(self, delete_data_if_table_exist=False):
         try:
-            self._dynamodb = boto3.resource('dynamodb', region_name=self._region)
             self._logger.info(f"Checking if table {self._table_name} already exists in region {self._region}")
 
             try:
-                # Attempt to list tables
-                table_names = self._get_dynamodb_table_list()
-                if self._table_name not in table_names:
+                if not self._table_exists():
                     self._table = self._create_table(self._dynamodb)  # Assuming this method creates the table
                     self._logger.info(f"Table '{self._table_name}' created successfully")
                 else:
@@ -68,6 +86,7 @@ class DynamodbManager(RDSInterface):
             self._logger.error(f"Unexpected error creating table: {e}")
             raise  # Re-raise the exception for further handling
 
+    @traced()
     def clean_resources(self) -> bool:
         """
         Deletes DynamoDB table
@@ -80,6 +99,8 @@ class DynamodbManager(RDSInterface):
         try:
             self._logger.info(f"Deleting table {self._table_name}")
             self._table.delete()
+            if self._inventory is not None:
+                self._inventory.discard('dynamodb', 'table', self._table_name)
             self._logger.info(f"Table {self._table_name} deleted successfully")
         except Exception as e:
             self._logger.error(f"Error deleting table: {e}")
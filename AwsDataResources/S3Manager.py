@@ -1,12 +1,21 @@
 import os
 from AwsDataResources.DataInterfaces.RDSInterface import RDSInterface
 from utils.Logger import Logger
-from configuration.s3_config import DEFAULT_S3_BUCKETS_REGION
+from utils.Inventory import Inventory, stack_tags
+from utils.RetryPolicy import is_gone_error
+from utils.Tracer import traced
+from configuration.s3_config import DEFAULT_S3_BUCKETS_REGION, S3_BUCKET_BASE_NAME
 from AwsDataResources.DataInterfaces.IS3Policy import IS3Policy
 
 
 class S3Manager(RDSInterface):
-    def __init__(self, s3, s3_client, bucket_name, region, logger: Logger):
+    def __init__(self, s3, s3_client, bucket_name, region, logger: Logger, inventory: Inventory = None):
+        """
+        :param bucket_name: Name of the bucket to create, unless the inventory has a bucket of the stack
+        :param inventory: Index of the stack's tagged resources, a bucket of the stack found there is adopted
+                          instead of creating another one (None to always create)
+        """
+        self._inventory = inventory
         self.bucket_dns_name = bucket_name
         self._logger = logger
         self._region = region
@@ -18,11 +27,15 @@ class S3Manager(RDSInterface):
     def get_bucket_name(self):
         return self.bucket_dns_name
 
+    @traced()
     def setup(self) -> dict:
         """
         Creates an S3 bucket in the specified region.
         """
         try:
+            if self._adopt_bucket():
+                return {'Name': self.bucket_dns_name}
+
             # Check if the region is the default region for S3 buckets
             if self._region == DEFAULT_S3_BUCKETS_REGION:
                 # Create the bucket in the default region
@@ -36,6 +49,11 @@ class S3Manager(RDSInterface):
                     CreateBucketConfiguration={'LocationConstraint': self._region}
                 )
 
+            self._s3_client.put_bucket_tagging(
+                Bucket=self.bucket_dns_name,
+                Tagging={'TagSet': stack_tags()}
+            )
+
             # Log success message if the bucket is created successfully
             self._logger.info(f"Successfully created bucket {self.bucket_dns_name}")
 
@@ -46,10 +64,35 @@ class S3Manager(RDSInterface):
             self._logger.error(f"Failed to create bucket {self.bucket_dns_name}: {str(e)}")
             raise  # Re-raise the exception after logging it
 
+    @traced()
+    def load(self, runtime_params: dict) -> bool:
+        bucket_name = runtime_params['Name']
+        try:
+            self._s3_client.head_bucket(Bucket=bucket_name)
+        except Exception as e:
+            self._logger.info(f"Bucket {bucket_name} no longer exists: {e}")
+            return False
+
+        self.bucket_dns_name = bucket_name
+        self._logger.info(f"Loaded existing bucket {self.bucket_dns_name}")
+        return True
+
+    def _adopt_bucket(self) -> bool:
+        # The bucket name gets a random suffix, so the bucket of the stack is found by its prefix
+        entries = self._inventory.find_all('s3', 'bucket') if self._inventory else []
+        entry = next((entry for entry in entries if entry.id.startswith(S3_BUCKET_BASE_NAME)), None)
+        if entry is None:
+            return False
+
+        self.bucket_dns_name = entry.id
+        self._logger.info(f"Adopted bucket {self.bucket_dns_name} of the stack")
+        return True
+
     @property
     def bucket_arn(self):
         return f"arn:aws:s3:::{self.bucket_dns_name}"
 
+    @traced()
     def attach_bucket_policy(self, s3_policy: IS3Policy):
         try:
             self._s3_client.put_bucket_policy(
@@ -64,6 +107,7 @@ class S3Manager(RDSInterface):
             self._logger.error(f"The policy:\n{s3_policy.generate_policy()}")
             raise
 
+    @traced()
     def upload_images(self, photos_directory, file_extension=".png"):
         """
         Uploads all PNG images from the specified directory to the S3 bucket.
@@ -91,6 +135,7 @@ class S3Manager(RDSInterface):
             self._logger.error(f"Failed to upload images to the S3 bucket: {str(e)}")
             raise  # Re-raise the exception after logging it
 
+    @traced()
     def delete_all_objects(self, delete_versions=True):
         try:
             bucket = self._s3_resource.Bucket(self.bucket_dns_name)
@@ -103,9 +148,12 @@ class S3Manager(RDSInterface):
         #     self._loggers.error(f"Failed to delete objects from {self.bucket_dns_name}: {str(e)}")
         #     return False
         except Exception as e:
+            if is_gone_error(e):
+                raise
             self._logger.error(f"Failed to delete objects from bucket {self.bucket_dns_name}: {str(e)}")
             return False
 
+    @traced()
     def delete_bucket(self):
         try:
             # Delete the S3 bucket
@@ -115,6 +163,8 @@ class S3Manager(RDSInterface):
             return True
 
         except Exception as e:
+            if is_gone_error(e):
+                raise
             # Catch any exceptions that occur during the bucket deletion and log an error message
             self._logger.error(f"Failed to delete bucket {self.bucket_dns_name}: {str(e)}")
             return False
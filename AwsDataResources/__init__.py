@@ -1,4 +1,2 @@
-
-from AwsDataResources.S3Manager import S3Manager
-from AwsDataResources.BucketPolicy import DefaultBucketPolicy
-from AwsDataResources.DynamodbManager import DynamodbManager
+# The managers are imported from their modules (e.g. `from AwsDataResources.S3Manager import S3Manager`),
+# so importing the package, or one of its interfaces, doesn't load every manager and boto3 with them
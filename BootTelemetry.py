@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from configuration import config, ec2_config
+from utils.ClientRegistry import ClientRegistry
+from utils.Tracer import traced
+
+
+class BootRecord:
+    def __init__(self, instance_id: str, phases: dict[str, float], in_group: bool | None):
+        """
+        :param instance_id: The instance the phases were uploaded by
+        :param phases: End time (epoch seconds) of every phase the instance went through, by phase name
+        :param in_group: Whether the instance belongs to the Auto Scaling Group, None if EC2 no longer knows it
+        """
+        self.instance_id = instance_id
+        self.phases = phases
+        self.in_group = in_group
+
+    def durations(self) -> dict[str, float]:
+        """
+        :return: Seconds every phase took, from the end of the phase before it, and the total from the launch to the
+                 last phase. Phases the bootstrap skipped (e.g. npm install with a bootstrap artifact) are left out
+        """
+        ended = [phase for phase in ec2_config.BOOT_PHASES if phase in self.phases]
+        durations = {phase: self.phases[phase] - self.phases[previous] for previous, phase in zip(ended, ended[1:])}
+        if 'launch' in self.phases and len(ended) > 1:
+            durations['total'] = self.phases[ended[-1]] - self.phases['launch']
+        return durations
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    :param values: The samples, not empty
+    :param q: The percentile, between 0 and 100
+    :return: The percentile, interpolated linearly between the two closest samples
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class BootTelemetryCollector:
+    def __init__(self, clients: ClientRegistry, bucket_name: str, logger,
+                 group_name: str = None, prefix: str = ec2_config.BOOT_TELEMETRY_PREFIX):
+        """
+        Collects the boot phase logs the instances upload to the stack bucket (see ec2_config.BOOT_TELEMETRY) and
+        aggregates them across the fleet, to show which bootstrap phase the scale-out latency goes to.
+
+        :param clients: The registry the AWS clients are taken from
+        :param bucket_name: The stack bucket
+        :param logger: Logger instance for logging operations
+        :param group_name: Only the instances of this Auto Scaling Group are aggregated (None for every instance)
+        :param prefix: Key prefix of the phase logs
+        """
+        self._s3_client = clients.client('s3')
+        self._ec2_client = clients.client('ec2')
+        self._bucket_name = bucket_name
+        self._logger = logger
+        self._group_name = group_name
+        self._prefix = prefix
+
+    @traced()
+    def collect(self) -> list[BootRecord]:
+        """
+        Downloads every phase log concurrently, and adds the launch time EC2 recorded for the instance. EC2 resets it
+        when an instance starts out of the warm pool, so it is left out of a log of an earlier boot.
+
+        :return: One record per instance
+        """
+        keys = [item['Key']
+                for page in self._s3_client.get_paginator('list_objects_v2').paginate(Bucket=self._bucket_name,
+                                                                                     Prefix=f"{self._prefix}/")
+                for item in page.get('Contents', [])]
+        if not keys:
+            return []
+
+        with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as pool:
+            logs = dict(pool.map(self._download, keys))
+        instances = self._describe_instances(list(logs))
+
+        records = []
+        for instance_id, phases in logs.items():
+            instance = instances.get(instance_id)
+            in_group = None
+            if instance:
+                launch = instance['LaunchTime'].timestamp()
+                if launch <= min(phases.values(), default=launch):
+                    phases = {'launch': launch, **phases}
+                tags = {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+                in_group = self._group_name is None or tags.get('aws:autoscaling:groupName') == self._group_name
+            if in_group is not False:
+                records.append(BootRecord(instance_id, phases, in_group))
+
+        self._logger.info(f"Collected the boot phases of {len(records)} instance(s) from {self._bucket_name}")
+        return records
+
+    @staticmethod
+    def summarize(records: list[BootRecord], percentiles=(50, 95)) -> dict[str, dict[str, float]]:
+        """
+        :return: Per phase, in boot order and followed by 'total': the number of instances that went through it and
+                 the percentiles of its duration in seconds, e.g. {'app_downloaded': {'count': 12, 'p50': 4.1, ...}}
+        """
+        samples: dict[str, list[float]] = {}
+        for record in records:
+            for phase, duration in record.durations().items():
+                samples.setdefault(phase, []).append(duration)
+
+        summary = {}
+        for phase in (*ec2_config.BOOT_PHASES, 'total'):
+            if phase in samples:
+                summary[phase] = {'count': len(samples[phase]),
+                                  **{f"p{q}": percentile(samples[phase], q) for q in percentiles}}
+        return summary
+
+    def _download(self, key: str) -> tuple[str, dict[str, float]]:
+        # One "<phase> <epoch seconds>" line per phase, the object is named after the instance
+        body = self._s3_client.get_object(Bucket=self._bucket_name, Key=key)['Body'].read().decode('utf-8')
+        phases = {}
+        for line in filter(str.strip, body.splitlines()):
+            phase, _, timestamp = line.strip().partition(' ')
+            try:
+                phases[phase] = float(timestamp)
+            except ValueError:
+                self._logger.warning(f"Skipping malformed line '{line}' of {key}")
+        return key.rsplit('/', 1)[-1].removesuffix('.log'), phases
+
+    def _describe_instances(self, instance_ids: list[str]) -> dict[str, dict]:
+        # Filtering by ID, unlike InstanceIds, doesn't fail on instances EC2 no longer knows
+        paginator = self._ec2_client.get_paginator('describe_instances')
+        instances = {}
+        for start in range(0, len(instance_ids), 200):
+            for page in paginator.paginate(Filters=[{'Name': 'instance-id',
+                                                     'Values': instance_ids[start:start + 200]}]):
+                for reservation in page['Reservations']:
+                    for instance in reservation['Instances']:
+                        instances[instance['InstanceId']] = instance
+        return instances
@@ -15,10 +15,26 @@ class VpcInterface(ABC):
     def launch_vpc_environment(self, *args, **kwargs):
         pass
 
+    @abstractmethod
+    def load_vpc_environment(self, *args, **kwargs) -> bool:
+        pass
+
+    @abstractmethod
+    def create_gateway_endpoints(self, endpoint_policies: dict[str, str]) -> list[str]:
+        pass
+
+    @abstractmethod
+    def load_gateway_endpoints(self, vpc_endpoint_ids: list[str]) -> bool:
+        pass
+
     @abstractmethod
     def teardown_vpc_resources(self) -> bool:
         pass
 
+    @abstractmethod
+    def add_teardown_steps(self, graph, after=()):
+        pass
+
     @property
     @abstractmethod
     def id(self):
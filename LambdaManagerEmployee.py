@@ -1,19 +1,20 @@
-import time
-import boto3
+import functools
 import json
 import zipfile
 import io
-from botocore.exceptions import ClientError
 from configuration import lambda_config
+from utils.Inventory import stack_tags
+from utils.RetryPolicy import RetryPolicy, is_iam_propagation_error
+from utils.Tracer import traced, tracer
 
 
 class LambdaManagerEmployee:
     def __init__(self,
                  function_name: str,
                  role_name: str,
-                 lambda_client: boto3.client,
-                 iam_client: boto3.client,
-                 s3_client: boto3.client,
+                 lambda_client,
+                 iam_client,
+                 s3_client,
                  logger
                  ):
         self._role_name = role_name
@@ -23,6 +24,7 @@ class LambdaManagerEmployee:
         self.s3_client = s3_client
         self.logger = logger
 
+    @traced()
     def create_lambda_role(self, role_name):
         try:
             assume_role_policy_document = json.dumps({
@@ -44,7 +46,8 @@ class LambdaManagerEmployee:
             except self.iam_client.exceptions.NoSuchEntityException:
                 role = self.iam_client.create_role(
                     RoleName=role_name,
-                    AssumeRolePolicyDocument=assume_role_policy_document
+                    AssumeRolePolicyDocument=assume_role_policy_document,
+                    Tags=stack_tags(role_name)
                 )
                 self.logger.info(f"Created IAM role {role_name}")
 
@@ -62,6 +65,35 @@ class LambdaManagerEmployee:
             self.logger.error(f"Error creating IAM role: {e}")
             raise
 
+    @traced()
+    def load_lambda_role(self, role_name) -> bool:
+        """
+        :return: Whether the role exists, e.g. created by an earlier run
+        """
+        try:
+            self.iam_client.get_role(RoleName=role_name)
+        except self.iam_client.exceptions.NoSuchEntityException:
+            self.logger.info(f"IAM role {role_name} no longer exists.")
+            return False
+
+        self.logger.info(f"Loaded existing IAM role {role_name}")
+        return True
+
+    @traced()
+    def load_lambda_function(self) -> bool:
+        """
+        :return: Whether the function exists, e.g. deployed by an earlier run
+        """
+        try:
+            self.lambda_client.get_function(FunctionName=self._function_name)
+        except self.lambda_client.exceptions.ResourceNotFoundException:
+            self.logger.info(f"Lambda function {self._function_name} no longer exists.")
+            return False
+
+        self.logger.info(f"Loaded existing Lambda function {self._function_name}")
+        return True
+
+    @traced()
     def create_or_update_lambda_function(self, lambda_code,
                                          role_arn,
                                          bucket_name,
@@ -82,13 +114,18 @@ class LambdaManagerEmployee:
                     FunctionName=self._function_name,
                     ZipFile=zip_buffer.read()
                 )
+                self.logger.info(f"Updated Lambda function {self._function_name}")
+
+                # Wait until the new code is deployed
+                self.wait_for_lambda_updated()
             except self.lambda_client.exceptions.ResourceNotFoundException:
                 self.logger.info(f"Function {self._function_name} does not exist. Creating a new function.")
 
-                response = self.lambda_client.create_function(
+                response = self.create_function_when_role_assumable(
                     FunctionName=self._function_name,
                     Role=role_arn,
                     Code={'ZipFile': zip_buffer.read()},
+                    Tags={tag['Key']: tag['Value'] for tag in stack_tags(self._function_name)},
                     Environment={
                         'Variables': {
                             'DEST_BUCKET': bucket_name,
@@ -97,17 +134,17 @@ class LambdaManagerEmployee:
                     },
                     **lambda_client_create_function_params
                 )
+                self.logger.info(f"Created Lambda function {self._function_name}")
 
-            self.logger.info(f"Created or updated Lambda function {self._function_name}")
-
-            # Wait until the Lambda function is active
-            self.wait_for_lambda_active()
+                # Wait until the Lambda function is active
+                self.wait_for_lambda_active()
 
             return response
         except Exception as e:
             self.logger.error(f"Error creating or updating Lambda function: {e}")
             raise
 
+    @traced()
     def invoke_lambda_function(self):
         try:
             response = self.lambda_client.invoke(
@@ -120,22 +157,31 @@ class LambdaManagerEmployee:
             self.logger.error(f"Error invoking Lambda function: {e}")
             raise
 
+    @traced()
     def clean_up(self):
         try:
-            self.lambda_client.delete_function(FunctionName=self._function_name)
+            try:
+                self.lambda_client.delete_function(FunctionName=self._function_name)
+            except self.lambda_client.exceptions.ResourceNotFoundException:
+                self.logger.info(f"Lambda function {self._function_name} does not exist, nothing to delete")
             self.iam_client.detach_role_policy(RoleName=self._role_name,
                                                PolicyArn='arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole')
             self.iam_client.detach_role_policy(RoleName=self._role_name,
                                                PolicyArn='arn:aws:iam::aws:policy/AmazonS3FullAccess')
             self.iam_client.delete_role(RoleName=self._role_name)
             self.logger.info(f"Cleaned up Lambda function and IAM role {self._role_name}")
+        except self.iam_client.exceptions.NoSuchEntityException:
+            self.logger.info(f"IAM role {self._role_name} does not exist, nothing to delete")
         except Exception as e:
             self.logger.error(f"Error cleaning up resources: {e}")
             raise
 
-    def deploy_lambda(self, lambda_code, role_name, bucket_name, zip_file_url, lambda_client_create_function_params):
+    @traced()
+    def deploy_lambda(self, lambda_code, role_name, bucket_name, zip_file_url, lambda_client_create_function_params,
+                      role_arn=None):
 
-        role_arn = self.create_lambda_role(role_name)
+        # The role may already be created by an earlier provisioning step
+        role_arn = role_arn or self.create_lambda_role(role_name)
         # self.create_lambda_function(function_name, role_arn, bucket_name, zip_file_url)
         self.create_or_update_lambda_function(lambda_code=lambda_code,
                                               role_arn=role_arn,
@@ -144,48 +190,49 @@ class LambdaManagerEmployee:
                                               lambda_client_create_function_params=lambda_client_create_function_params)
         self.invoke_lambda_function()
 
-    def wait_for_role(self, role_name, timeout=60, interval=5):
-        """Wait until the IAM role is available."""
-        start_time = time.time()
-        while True:
-            try:
-                self.iam_client.get_role(RoleName=role_name)
-                self.logger.info(f"IAM role {role_name} is now available.")
-                break
-            except self.iam_client.exceptions.NoSuchEntityException:
-                if time.time() - start_time > timeout:
-                    self.logger.error(f"Timeout waiting for IAM role {role_name} to become available.")
-                    raise
-                self.logger.debug(f"Waiting for IAM role {role_name} to become available...")
-                time.sleep(interval)
-            except ClientError as e:
-                self.logger.error(f"Unexpected error while waiting for IAM role: {e}")
-                raise
-
-    def wait_for_lambda_active(self, timeout=60, interval=5):
-        """Wait until the Lambda function is in Active state."""
-        start_time = time.time()
-        while True:
-            try:
-                response = self.lambda_client.get_function(FunctionName=self._function_name)
-                state = response['Configuration']['State']
-                if state == 'Active':
-                    self.logger.info(f"Lambda function {self._function_name} is now active.")
-                    break
-                else:
-                    if time.time() - start_time > timeout:
-                        self.logger.error(
-                            f"Timeout waiting for Lambda function {self._function_name} to become active.")
-                        raise TimeoutError(
-                            f"Lambda function {self._function_name} did not become active within {timeout} seconds.")
-                    self.logger.debug(f"Lambda function {self._function_name} is in state {state}. Waiting...")
-                    time.sleep(interval)
-            except self.lambda_client.exceptions.ResourceNotFoundException:
-                if time.time() - start_time > timeout:
-                    self.logger.error(f"Timeout waiting for Lambda function {self._function_name} to become available.")
-                    raise
-                self.logger.debug(f"Lambda function {self._function_name} not found. Waiting...")
-                time.sleep(interval)
-            except ClientError as e:
-                self.logger.error(f"Unexpected error while waiting for Lambda function: {e}")
-                raise
+    @traced()
+    def create_function_when_role_assumable(self, **create_function_params) -> dict:
+        """
+        Creates the function, which is the only real check that Lambda can assume a newly created role:
+        get_role succeeds well before the role propagated to Lambda, which rejects it until then.
+        Polls fast at first, so the function is created as soon as the role is usable.
+
+        :param create_function_params: The parameters of lambda_client.create_function
+        :return: The create_function response
+        """
+        retry_policy = RetryPolicy(max_attempts=lambda_config.WAITER_MAX_ATTEMPTS,
+                                   base_delay=lambda_config.WAITER_DELAY / 4,
+                                   max_delay=lambda_config.WAITER_DELAY * 4,
+                                   deadline=lambda_config.ROLE_PROPAGATION_TIMEOUT,
+                                   is_retryable=is_iam_propagation_error,
+                                   logger=self.logger)
+        return retry_policy.call(functools.partial(self.lambda_client.create_function, **create_function_params),
+                                 name='role_assumable')
+
+    @traced()
+    def wait_for_role(self, role_name):
+        """Wait until the IAM role exists, using the role_exists waiter."""
+        self._wait(self.iam_client, 'role_exists', RoleName=role_name)
+        self.logger.info(f"IAM role {role_name} is now available.")
+
+    @traced()
+    def wait_for_lambda_active(self):
+        """Wait until the Lambda function is in Active state, using the function_active_v2 waiter."""
+        self._wait(self.lambda_client, 'function_active_v2', FunctionName=self._function_name)
+        self.logger.info(f"Lambda function {self._function_name} is now active.")
+
+    @traced()
+    def wait_for_lambda_updated(self):
+        """Wait until the last update of the Lambda function completed, using the function_updated_v2 waiter."""
+        self._wait(self.lambda_client, 'function_updated_v2', FunctionName=self._function_name)
+        self.logger.info(f"Lambda function {self._function_name} is now updated.")
+
+    def _wait(self, client, waiter_name: str, **params):
+        try:
+            with tracer.span(f"wait:{waiter_name}", category='wait'):
+                client.get_waiter(waiter_name).wait(**params,
+                                                    WaiterConfig={'Delay': lambda_config.WAITER_DELAY,
+                                                                  'MaxAttempts': lambda_config.WAITER_MAX_ATTEMPTS})
+        except Exception as e:
+            self.logger.error(f"Error waiting for {waiter_name}: {e}")
+            raise
@@ -1,6 +1,15 @@
 
+from utils.Inventory import Inventory, stack_tags
+from utils.Tracer import traced
+
+
 class ApplicationLoadBalancerManager:
-    def __init__(self, name: str, elbv2_client, logger):
+    def __init__(self, name: str, elbv2_client, logger, inventory: Inventory = None):
+        """
+        :param inventory: Index of the stack's tagged resources, a load balancer of the stack found there in the
+                          same subnets is adopted instead of replaced (None to always create)
+        """
+        self._inventory = inventory
         self._name = name
         self._load_balancer_arn = None
         self._elbv2_client = elbv2_client
@@ -14,12 +23,23 @@ class ApplicationLoadBalancerManager:
     def load_balancer_arn(self):
         return self._load_balancer_arn
 
+    @staticmethod
+    def arn_suffix(load_balancer_arn: str) -> str:
+        """
+        :return: The final part of the ARN (app/<name>/<id>), the load balancer's CloudWatch dimension and resource
+                 label part
+        """
+        return load_balancer_arn.split(':loadbalancer/', 1)[1]
+
+    @traced()
     def create_load_balancer(self,
                              subnets_ids: list,
                              security_group_id: str,
                              create_alb_params: dict,
                              conflict_resolution_replace=True):
         try:
+            if self._adopt_load_balancer(subnets_ids):
+                return self._load_balancer_arn
 
             # Check if a load balancer with the same name already exists
             existing_lb = self._find_load_balancer_by_name(self._name)
@@ -42,6 +62,7 @@ class ApplicationLoadBalancerManager:
                 Name=self._name,
                 Subnets=subnets_ids,
                 SecurityGroups=[security_group_id],
+                Tags=stack_tags(self._name),
             )
             self._load_balancer_arn = response['LoadBalancers'][0]['LoadBalancerArn']
             self._logger.info(f"Load Balancer '{self.name}' created with ARN: {self._load_balancer_arn}")
@@ -51,22 +72,62 @@ class ApplicationLoadBalancerManager:
             self._logger.error(f"Failed to create load balancer: {e}")
             raise
 
+    @traced()
+    def load_load_balancer(self, load_balancer_arn: str) -> bool:
+        """
+        Loads an existing load balancer, e.g. one recorded by an earlier run.
+
+        :param load_balancer_arn: ARN of the load balancer
+        :return: Whether the load balancer still exists
+        """
+        try:
+            self._elbv2_client.describe_load_balancers(LoadBalancerArns=[load_balancer_arn])
+        except self._elbv2_client.exceptions.LoadBalancerNotFoundException:
+            self._logger.info(f"Load Balancer '{load_balancer_arn}' no longer exists.")
+            return False
+
+        self._load_balancer_arn = load_balancer_arn
+        self._logger.info(f"Loaded existing Load Balancer '{self._name}' with ARN: {self._load_balancer_arn}")
+        return True
+
+    def _adopt_load_balancer(self, subnets_ids: list) -> bool:
+        entry = self._inventory.find('elasticloadbalancing', 'loadbalancer', self._name) if self._inventory else None
+        if entry is None:
+            return False
+
+        response = self._elbv2_client.describe_load_balancers(LoadBalancerArns=[entry.arn])
+        load_balancer = response['LoadBalancers'][0]
+        if {zone['SubnetId'] for zone in load_balancer['AvailabilityZones']} != set(subnets_ids):
+            return False
+
+        self._load_balancer_arn = entry.arn
+        self._logger.info(f"Adopted Load Balancer '{self._name}' of the stack with ARN: {self._load_balancer_arn}")
+        return True
+
+    @traced()
     def get_alb_dns_name(self, load_balancer_name: str):
         response = self._elbv2_client.describe_load_balancers(
             Names=[load_balancer_name]
         )
         return response['LoadBalancers'][0]['DNSName']
 
+    @traced()
     def delete_load_balancer(self, load_balancer_arn: str = None):
         try:
             arn_to_delete = load_balancer_arn or self._load_balancer_arn
+            if arn_to_delete is None:
+                self._logger.info("No load balancer loaded, nothing to delete")
+                return
+
             self._elbv2_client.delete_load_balancer(LoadBalancerArn=arn_to_delete)
             self._logger.info(f"Load Balancer '{arn_to_delete}' deleted successfully.")
             if arn_to_delete == self._load_balancer_arn:
                 self._load_balancer_arn = None
         except Exception as e:
             self._logger.error(f"Failed to delete load balancer: {e}")
+            raise
 
+    @traced()
     def _find_load_balancer_by_name(self, name: str):
         """
         Helper function to find a load balancer by name.
@@ -1,9 +1,12 @@
-import time
+from datetime import datetime, timedelta, timezone
 
-import boto3
 from botocore.exceptions import ClientError
 
+from configuration import config
 from utils.Logger import Logger
+from utils.Inventory import stack_tags
+from utils.RetryPolicy import RetryPolicy, error_code
+from utils.Tracer import traced
 
 
 class AutoScalingManager:
@@ -12,19 +15,35 @@ class AutoScalingManager:
         self._client = asg_client
         self._logger = logger
 
+    @traced()
     def create_auto_scaling_group(self, launch_template_id,
                                   get_subnets_id_list: list,
                                   target_groups_arns: list,
-                                  asg_config: dict):
-
+                                  asg_config: dict,
+                                  launch_template_version: str = '$Default',
+                                  lifecycle_hooks: list[dict] = (),
+                                  mixed_instances_policy: dict = None,
+                                  capacity_rebalance: bool = False):
+        """
+        :param lifecycle_hooks: Lifecycle hooks created together with the group, so they apply to its first instances
+        :param mixed_instances_policy: Overrides (instance types and weights) and InstancesDistribution (on-demand
+                                       base, Spot percentage, allocation strategies) of the group, None to launch only
+                                       the instance type of the launch template
+        :param capacity_rebalance: Replace Spot instances at elevated risk of interruption proactively
+        """
         try:
             self._logger.info(f"Creating Auto Scaling Group: {self._group_name}")
             vpc_zone_identifier_str = ','.join(get_subnets_id_list)
+            if lifecycle_hooks:
+                asg_config = {**asg_config, 'LifecycleHookSpecificationList': list(lifecycle_hooks)}
             response = self._client.create_auto_scaling_group(
                 AutoScalingGroupName=self._group_name,
-                LaunchTemplate={'LaunchTemplateId': launch_template_id},
+                **self._instances_params(launch_template_id, launch_template_version, mixed_instances_policy),
+                CapacityRebalance=capacity_rebalance,
                 VPCZoneIdentifier=vpc_zone_identifier_str,
                 TargetGroupARNs=target_groups_arns,
+                # Propagated to the instances, so they are part of the stack as well
+                Tags=[{**tag, 'PropagateAtLaunch': True} for tag in stack_tags(self._group_name)],
                 **asg_config
             )
             self._logger.info(f"Auto Scaling Group created: {self._group_name}")
@@ -36,6 +55,165 @@ class AutoScalingManager:
             self._logger.error(f"Failed to create Auto Scaling Group {self._group_name}: {e}")
             raise
 
+    @traced()
+    def update_auto_scaling_group(self, launch_template_id,
+                                  get_subnets_id_list: list,
+                                  target_groups_arns: list,
+                                  asg_config: dict,
+                                  launch_template_version: str = '$Default',
+                                  mixed_instances_policy: dict = None,
+                                  capacity_rebalance: bool = False):
+        """
+        Applies a changed configuration to the existing group in place, instead of recreating it and its instances.
+        Instances launched from another launch template version keep running, see refresh_instances.
+        """
+        try:
+            self._logger.info(f"Updating Auto Scaling Group: {self._group_name}")
+            response = self._client.update_auto_scaling_group(
+                AutoScalingGroupName=self._group_name,
+                **self._instances_params(launch_template_id, launch_template_version, mixed_instances_policy),
+                CapacityRebalance=capacity_rebalance,
+                VPCZoneIdentifier=','.join(get_subnets_id_list),
+                **asg_config
+            )
+            self._client.attach_load_balancer_target_groups(AutoScalingGroupName=self._group_name,
+                                                            TargetGroupARNs=target_groups_arns)
+            self._logger.info(f"Auto Scaling Group updated: {self._group_name}")
+            return response
+        except ClientError as e:
+            self._logger.error(f"Failed to update Auto Scaling Group {self._group_name}: {e}")
+            raise
+
+    @traced()
+    def put_warm_pool(self, warm_pool_params: dict):
+        """
+        Creates the warm pool of the group, or resizes it if it exists. The pool keeps pre-initialized instances
+        stopped (or hibernated), a scale-out starts them instead of launching and bootstrapping new ones.
+
+        :param warm_pool_params: MinSize, MaxGroupPreparedCapacity, PoolState and InstanceReusePolicy of the pool
+        """
+        try:
+            self._client.put_warm_pool(AutoScalingGroupName=self._group_name, **warm_pool_params)
+            self._logger.info(f"Warm pool of {self._group_name} set to {warm_pool_params}")
+        except ClientError as e:
+            self._logger.error(f"Failed to put the warm pool of {self._group_name}: {e}")
+            raise
+
+    @traced()
+    def delete_warm_pool(self) -> bool:
+        """
+        Deletes the warm pool of the group and terminates its instances, if the group has one.
+        Deleting the group deletes its pool as well.
+        """
+        try:
+            if not self._client.describe_warm_pool(AutoScalingGroupName=self._group_name).get('WarmPoolConfiguration'):
+                return True
+            self._client.delete_warm_pool(AutoScalingGroupName=self._group_name, ForceDelete=True)
+            self._logger.info(f"Warm pool of {self._group_name} deleted")
+            return True
+        except ClientError as e:
+            self._logger.error(f"Failed to delete the warm pool of {self._group_name}: {e}")
+            return False
+
+    @traced()
+    def put_lifecycle_hook(self, lifecycle_hook: dict):
+        """
+        :param lifecycle_hook: LifecycleHookName, LifecycleTransition, HeartbeatTimeout and DefaultResult of the hook
+        """
+        try:
+            self._client.put_lifecycle_hook(AutoScalingGroupName=self._group_name, **lifecycle_hook)
+            self._logger.info(f"Lifecycle hook {lifecycle_hook['LifecycleHookName']} put on {self._group_name}")
+        except ClientError as e:
+            self._logger.error(f"Failed to put lifecycle hook {lifecycle_hook['LifecycleHookName']}: {e}")
+            raise
+
+    @traced()
+    def delete_lifecycle_hook(self, hook_name: str):
+        hooks = self._client.describe_lifecycle_hooks(AutoScalingGroupName=self._group_name,
+                                                      LifecycleHookNames=[hook_name])['LifecycleHooks']
+        if hooks:
+            self._client.delete_lifecycle_hook(AutoScalingGroupName=self._group_name, LifecycleHookName=hook_name)
+            self._logger.info(f"Lifecycle hook {hook_name} deleted from {self._group_name}")
+
+    @traced()
+    def refresh_instances(self, preferences: dict) -> str | None:
+        """
+        Starts a rolling instance refresh replacing the instances that weren't launched from the group's current
+        launch template version. The refresh runs in the background, the load balancer and the rest of the stack
+        are left as they are. A refresh still in progress is cancelled first, since it targets an older version.
+
+        :param preferences: The Preferences of start_instance_refresh, e.g. MinHealthyPercentage and InstanceWarmup
+        :return: ID of the refresh, None if every instance is already up to date
+        """
+        try:
+            group = self._client.describe_auto_scaling_groups(
+                AutoScalingGroupNames=[self._group_name])['AutoScalingGroups'][0]
+            version = self._launch_template_version(group)
+            outdated = [instance['InstanceId'] for instance in group['Instances']
+                        if instance.get('LaunchTemplate', {}).get('Version') != version]
+            if not outdated:
+                self._logger.info(f"Every instance of {self._group_name} runs launch template version {version}")
+                return None
+
+            self._cancel_instance_refresh()
+            refresh_id = self._client.start_instance_refresh(AutoScalingGroupName=self._group_name,
+                                                             Strategy='Rolling',
+                                                             Preferences=preferences)['InstanceRefreshId']
+            self._logger.info(f"Instance refresh {refresh_id} started, rolling {len(outdated)} instance(s) of "
+                              f"{self._group_name} over to launch template version {version}")
+            return refresh_id
+        except ClientError as e:
+            self._logger.error(f"Failed to start an instance refresh of {self._group_name}: {e}")
+            raise
+
+    def _cancel_instance_refresh(self):
+        refreshes = self._client.describe_instance_refreshes(AutoScalingGroupName=self._group_name,
+                                                             MaxRecords=1)['InstanceRefreshes']
+        if refreshes and refreshes[0]['Status'] in ('Pending', 'InProgress'):
+            self._client.cancel_instance_refresh(AutoScalingGroupName=self._group_name)
+            self._logger.info(f"Cancelled instance refresh {refreshes[0]['InstanceRefreshId']}")
+            # The cancellation completes asynchronously, a new refresh can only start once it did
+            retry_policy = RetryPolicy(max_attempts=config.RETRY_MAX_ATTEMPTS * 2, base_delay=config.RETRY_BASE_DELAY,
+                                       max_delay=config.RETRY_MAX_DELAY, logger=self._logger)
+            retry_policy.wait_until(self._no_instance_refresh_active, name='instance_refresh_cancel')
+
+    def _no_instance_refresh_active(self) -> bool:
+        refreshes = self._client.describe_instance_refreshes(AutoScalingGroupName=self._group_name,
+                                                             MaxRecords=1)['InstanceRefreshes']
+        return not refreshes or refreshes[0]['Status'] not in ('Pending', 'InProgress', 'Cancelling')
+
+    @staticmethod
+    def _instances_params(launch_template_id: str, launch_template_version: str,
+                          mixed_instances_policy: dict | None) -> dict:
+        launch_template = {'LaunchTemplateId': launch_template_id, 'Version': launch_template_version}
+        if not mixed_instances_policy:
+            return {'LaunchTemplate': launch_template}
+
+        return {'MixedInstancesPolicy': {
+            'LaunchTemplate': {'LaunchTemplateSpecification': launch_template,
+                               'Overrides': mixed_instances_policy['Overrides']},
+            'InstancesDistribution': mixed_instances_policy['InstancesDistribution']}}
+
+    @staticmethod
+    def _launch_template_version(group: dict) -> str:
+        if 'MixedInstancesPolicy' in group:
+            return group['MixedInstancesPolicy']['LaunchTemplate']['LaunchTemplateSpecification']['Version']
+        return group['LaunchTemplate']['Version']
+
+    @traced()
+    def load_group(self) -> bool:
+        """
+        :return: Whether the Auto Scaling Group exists, e.g. created by an earlier run
+        """
+        response = self._client.describe_auto_scaling_groups(AutoScalingGroupNames=[self._group_name])
+        if not response['AutoScalingGroups']:
+            self._logger.info(f"Auto Scaling Group {self._group_name} does not exist.")
+            return False
+
+        self._logger.info(f"Loaded existing Auto Scaling Group: {self._group_name}")
+        return True
+
+    @traced()
     def attach_policy(self, policy_name: str, policy_params: dict):
         """
         Create a Scaling Policy for the Auto Scaling Group.
@@ -57,6 +235,79 @@ class AutoScalingManager:
             self._logger.error(f"Failed to create Scaling Policy {policy_name}: {e}")
             return None
 
+    @traced()
+    def attach_policies(self, policies: dict[str, dict]):
+        """
+        Puts every scaling policy on the group, side by side, and deletes the group's policies that are no longer
+        configured.
+
+        :param policies: The put_scaling_policy parameters of every policy, by policy name
+        """
+        for policy_name, policy_params in policies.items():
+            self.attach_policy(policy_name, policy_params)
+
+        try:
+            deployed = self._client.describe_policies(AutoScalingGroupName=self._group_name)['ScalingPolicies']
+            for policy in deployed:
+                if policy['PolicyName'] not in policies:
+                    self._client.delete_policy(AutoScalingGroupName=self._group_name, PolicyName=policy['PolicyName'])
+                    self._logger.info(f"Deleted Scaling Policy: {policy['PolicyName']}")
+        except ClientError as e:
+            self._logger.error(f"Failed to delete stale scaling policies: {e}")
+
+    @traced()
+    def put_scheduled_actions(self, actions: list[dict]):
+        """
+        Creates or updates the scheduled actions of the group, and deletes its actions that are no longer configured.
+
+        :param actions: ScheduledActionName, Recurrence, TimeZone and the MinSize, MaxSize and DesiredCapacity
+                        the group is set to, of every action
+        """
+        try:
+            if actions:
+                response = self._client.batch_put_scheduled_update_group_action(
+                    AutoScalingGroupName=self._group_name, ScheduledUpdateGroupActions=actions)
+                failed = response.get('FailedScheduledUpdateGroupActions', [])
+                if failed:
+                    raise Exception(f"Scheduled actions rejected: {failed}")
+                self._logger.info(f"Scheduled actions put on {self._group_name}: "
+                                  f"{[action['ScheduledActionName'] for action in actions]}")
+
+            names = {action['ScheduledActionName'] for action in actions}
+            stale = [action['ScheduledActionName']
+                     for page in self._client.get_paginator('describe_scheduled_actions').paginate(
+                         AutoScalingGroupName=self._group_name)
+                     for action in page['ScheduledUpdateGroupActions']
+                     if action['ScheduledActionName'] not in names]
+            if stale:
+                self._client.batch_delete_scheduled_action(AutoScalingGroupName=self._group_name,
+                                                           ScheduledActionNames=stale)
+                self._logger.info(f"Deleted scheduled actions: {stale}")
+        except Exception as e:
+            self._logger.error(f"Failed to put the scheduled actions of {self._group_name}: {e}")
+            raise
+
+    @traced()
+    def get_forecast(self, policy_name: str, hours: int = 48) -> dict:
+        """
+        Reads the forecast of a predictive scaling policy, e.g. to compare a ForecastOnly policy with the actual load
+        before letting it scale.
+
+        :param policy_name: Name of the predictive scaling policy
+        :param hours: Length of the forecast, from now
+        :return: The load forecast and the capacity forecast, each with timestamps and values
+        """
+        start = datetime.now(timezone.utc)
+        try:
+            response = self._client.get_predictive_scaling_forecast(
+                AutoScalingGroupName=self._group_name, PolicyName=policy_name,
+                StartTime=start, EndTime=start + timedelta(hours=hours))
+            return {'LoadForecast': response['LoadForecast'], 'CapacityForecast': response['CapacityForecast']}
+        except ClientError as e:
+            self._logger.error(f"Failed to get the forecast of {policy_name}: {e}")
+            raise
+
+    @traced()
     def configure_asg_notifications(self, sns_topic_arn, notification_types):
         """
         Add SNS topic for notifications to an Auto Scaling Group.
@@ -88,6 +339,8 @@ class AutoScalingManager:
         :param topic_name: The name of the SNS topic.
         :return: The ARN of the SNS topic, or None if the topic is not found.
         """
+        import boto3
+
         sns_client = boto3.client('sns', region_name='us-east-1')
 
         try:
@@ -118,6 +371,8 @@ class AutoScalingManager:
         :param email_address: Optional email address to subscribe to the SNS topic.
         :return: The Amazon Resource Name (ARN) of the created SNS topic.
         """
+        import boto3
+
         sns_client = boto3.client('sns', region_name='us-east-1')
 
         try:
@@ -141,6 +396,7 @@ class AutoScalingManager:
             print(f"Error creating SNS topic or subscription: {e}")
             return None
 
+    @traced()
     def delete_policy(self):
         try:
             # Step 1: Delete Scaling Policies
@@ -152,41 +408,50 @@ class AutoScalingManager:
         except ClientError as e:
             self._logger.error(f"Failed to delete auto-scaling policies: {e}")
 
+    @traced()
     def delete_group(self):
         try:
             self._logger.info(f"Deleting Auto Scaling Group: {self._group_name}")
             self._client.delete_auto_scaling_group(AutoScalingGroupName=self._group_name, ForceDelete=True)
             self._logger.info(f"Auto Scaling Group deleted: {self._group_name}")
         except ClientError as e:
+            # Auto Scaling reports a missing group as a ValidationError
+            if error_code(e) == 'ValidationError' and 'not found' in str(e):
+                self._logger.info(f"Auto Scaling Group {self._group_name} does not exist, nothing to delete")
+                return
             self._logger.error(f"Failed to delete auto-scaling-group: {e}")
+            raise
+
+    @traced()
+    def wait_for_asg_termination(self, max_interval=30, timeout=120):
+        """
+        Polls the instances of the group, backing off from one second up to max_interval, until all terminated.
 
-    def wait_for_asg_termination(self, wait_interval=30, tries=4):
+        :param max_interval: Upper bound in seconds of the delay between two polls
+        :param timeout: Seconds after which the wait gives up
+        """
         self._logger.info(f"Waiting for all instances in Auto Scaling Group '{self._group_name}' to terminate.")
+        retry_policy = RetryPolicy(max_attempts=config.RETRY_MAX_ATTEMPTS * 2, base_delay=config.RETRY_BASE_DELAY,
+                                   max_delay=max_interval, deadline=timeout, logger=self._logger)
+        try:
+            if retry_policy.wait_until(self._instances_terminated, name='asg_termination'):
+                self._logger.info(f"All instances in Auto Scaling Group '{self._group_name}' have terminated.")
+        except ClientError as e:
+            self._logger.error(f"Failed to check instance status: {e}")
+        except Exception as e:
+            self._logger.error(f"Unexpected error while waiting for instance termination: {e}")
+
+    def _instances_terminated(self) -> bool:
+        # Describe instances in the Auto Scaling group
+        response = self._client.describe_auto_scaling_instances()
+        instances = response['AutoScalingInstances']
 
-        for i in range(tries):
-            try:
-                # Describe instances in the Auto Scaling group
-                response = self._client.describe_auto_scaling_instances()
-                instances = response['AutoScalingInstances']
-
-                # Filter instances that belong to the current Auto Scaling group and are not terminated
-                asg_instances = [i for i in instances if i['AutoScalingGroupName'] == self._group_name]
-                non_terminated_instances = [i for i in asg_instances if i['LifecycleState'] != 'Terminated']
-
-                if not non_terminated_instances:
-                    self._logger.info(f"All instances in Auto Scaling Group '{self._group_name}' have terminated.")
-                    break
-                else:
-                    self._logger.info(f"{len(non_terminated_instances)} instance(s) still terminating...")
-
-                time.sleep(wait_interval)
-
-            except ClientError as e:
-                self._logger.error(f"Failed to check instance status: {e}")
-                break
-            except Exception as e:
-                self._logger.error(f"Unexpected error while waiting for instance termination: {e}")
-                break
+        # Filter instances that belong to the current Auto Scaling group and are not terminated
+        asg_instances = [i for i in instances if i['AutoScalingGroupName'] == self._group_name]
+        non_terminated_instances = [i for i in asg_instances if i['LifecycleState'] != 'Terminated']
+        if non_terminated_instances:
+            self._logger.info(f"{len(non_terminated_instances)} instance(s) still terminating...")
+        return not non_terminated_instances
 
     def cleanup(self):
         self.delete_policy()
@@ -0,0 +1,82 @@
+import base64
+from botocore.exceptions import ClientError
+
+from utils.Inventory import tag_specifications
+from utils.Tracer import tracer
+
+
+class BuilderInstance:
+    def __init__(self, ec2_client, name: str, logger):
+        """
+        A short-lived instance that runs a build script from its user data and powers itself off when the build
+        succeeded, e.g. to install the app before an image or an artifact is taken from it.
+
+        :param ec2_client: Boto3 client object for EC2
+        :param name: Name tag of the instance
+        :param logger: Logger instance for logging operations
+        """
+        self._client = ec2_client
+        self._name = name
+        self._logger = logger
+        self._instance_id = None
+
+    @property
+    def id(self) -> str | None:
+        return self._instance_id
+
+    def launch(self, image_id: str,
+               build_script: str,
+               instance_type: str,
+               subnet_id: str,
+               security_group_id: str,
+               iam_instance_profile: str = None) -> str:
+        """
+        :param image_id: The AMI the builder starts from
+        :param build_script: User data running the build, ending with a shutdown once the build succeeded
+        :param instance_type: Instance type of the builder
+        :param subnet_id: Subnet of the builder, it needs internet access to download the packages
+        :param security_group_id: Security group of the builder
+        :param iam_instance_profile: Instance profile the build script's AWS calls run with (None for none)
+        :return: ID of the builder instance
+        """
+        params = {}
+        if iam_instance_profile:
+            params['IamInstanceProfile'] = {'Name': iam_instance_profile}
+        response = self._client.run_instances(
+            ImageId=image_id,
+            InstanceType=instance_type,
+            MinCount=1,
+            MaxCount=1,
+            UserData=base64.b64encode(build_script.encode('utf-8')).decode('utf-8'),
+            # The build script powers the builder off when it is done, what it built is taken from the stopped volume
+            InstanceInitiatedShutdownBehavior='stop',
+            NetworkInterfaces=[{'AssociatePublicIpAddress': True,
+                                'DeviceIndex': 0,
+                                'SubnetId': subnet_id,
+                                'Groups': [security_group_id]}],
+            TagSpecifications=tag_specifications('instance', self._name),
+            **params)
+        self._instance_id = response['Instances'][0]['InstanceId']
+        self._logger.info(f"Builder instance {self._instance_id} launched from {image_id}")
+        return self._instance_id
+
+    def wait_until_built(self, delay: int, max_attempts: int):
+        """
+        Waits for the build script to power the builder off.
+
+        :raises WaiterError: The builder didn't stop within delay * max_attempts seconds, i.e. the build failed
+        """
+        with tracer.span(f"wait:{self._name}", category='wait', instance_id=self._instance_id):
+            self._client.get_waiter('instance_stopped').wait(
+                InstanceIds=[self._instance_id],
+                WaiterConfig={'Delay': delay, 'MaxAttempts': max_attempts})
+
+    def terminate(self):
+        if self._instance_id is None:
+            return
+        try:
+            self._client.terminate_instances(InstanceIds=[self._instance_id])
+            self._logger.info(f"Builder instance {self._instance_id} terminated")
+            self._instance_id = None
+        except ClientError as e:
+            self._logger.error(f"Failed to terminate builder instance {self._instance_id}: {e}")
@@ -0,0 +1,68 @@
+import json
+from AwsDataResources.DataInterfaces.IS3Policy import IS3Policy
+
+
+class S3EndpointPolicy(IS3Policy):
+    def __init__(self, bucket_name: str, extra_object_arns: list[str] = ()):
+        """
+        Policy of an S3 gateway endpoint, letting the traffic through the endpoint reach only the photos bucket.
+
+        :param bucket_name: The bucket of the app
+        :param extra_object_arns: Objects the instances read from other buckets, e.g. the package repositories,
+                                  since every request to S3 in the region goes through the endpoint
+        """
+        self._bucket_name = bucket_name
+        self._extra_object_arns = list(extra_object_arns)
+
+    def generate_policy(self) -> json:
+        statements = [
+            {
+                "Sid": "AllowAppBucket",
+                "Effect": "Allow",
+                "Principal": "*",
+                "Action": ["s3:GetObject", "s3:PutObject", "s3:DeleteObject", "s3:ListBucket"],
+                "Resource": [
+                    f"arn:aws:s3:::{self._bucket_name}",
+                    f"arn:aws:s3:::{self._bucket_name}/*"
+                ]
+            }
+        ]
+        if self._extra_object_arns:
+            statements.append({
+                "Sid": "AllowPackageRepositories",
+                "Effect": "Allow",
+                "Principal": "*",
+                "Action": "s3:GetObject",
+                "Resource": self._extra_object_arns
+            })
+        return json.dumps({"Version": "2012-10-17", "Statement": statements})
+
+
+class DynamodbEndpointPolicy:
+    def __init__(self, table_name: str, region: str):
+        """
+        Policy of a DynamoDB gateway endpoint, letting the traffic through the endpoint reach only the app's table.
+
+        :param table_name: The table of the app
+        :param region: Region of the table
+        """
+        self._table_name = table_name
+        self._region = region
+
+    def generate_policy(self) -> json:
+        table_arn = f"arn:aws:dynamodb:{self._region}:*:table/{self._table_name}"
+        dynamodb_policy = {
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Sid": "AllowAppTable",
+                    "Effect": "Allow",
+                    "Principal": "*",
+                    "Action": ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem", "dynamodb:DeleteItem",
+                               "dynamodb:Query", "dynamodb:Scan", "dynamodb:BatchGetItem",
+                               "dynamodb:BatchWriteItem", "dynamodb:DescribeTable"],
+                    "Resource": [table_arn, f"{table_arn}/index/*"]
+                }
+            ]
+        }
+        return json.dumps(dynamodb_policy)
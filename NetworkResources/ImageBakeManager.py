@@ -0,0 +1,144 @@
+from botocore.exceptions import ClientError, WaiterError
+
+from configuration import ec2_config
+from NetworkResources.BuilderInstance import BuilderInstance
+from utils.Inventory import stack_tags
+from utils.StateStore import config_hash
+from utils.Tracer import traced, tracer
+
+
+class ImageBakeManager:
+    def __init__(self, ec2_client, name: str, logger):
+        """
+        Bakes the app and its dependencies into a golden AMI, once per app version and build recipe, so the
+        instances of the Auto Scaling Group only have to start the app when they boot.
+
+        :param ec2_client: Boto3 client object for EC2
+        :param name: Prefix of the image names
+        :param logger: Logger instance for logging operations
+        """
+        self._client = ec2_client
+        self._name = name
+        self._logger = logger
+        self._image_id = None
+
+    @property
+    def image_id(self) -> str | None:
+        return self._image_id
+
+    @staticmethod
+    def recipe(base_image_id: str, build_script: str) -> str:
+        """
+        :return: A short hash of what goes into the image, a change to either input bakes a new image
+        """
+        return config_hash(base_image_id, build_script)[:12]
+
+    @traced()
+    def bake_image(self, app_version: str,
+                   base_image_id: str,
+                   build_script: str,
+                   instance_type: str,
+                   subnet_id: str,
+                   security_group_id: str) -> str:
+        """
+        Returns the golden image of the app version, baking it first if no image of this version and recipe exists:
+        a builder instance runs the build script from the base image and powers itself off, the image is taken
+        from its stopped volume and the builder is terminated.
+
+        :param app_version: Version of the app, tagged on the image
+        :param base_image_id: The AMI the builder instance starts from
+        :param build_script: User data installing the app, ending with a shutdown once the installation succeeded
+        :param instance_type: Instance type of the builder
+        :param subnet_id: Subnet of the builder, it needs internet access to download the packages
+        :param security_group_id: Security group of the builder
+        :return: ID of the golden image
+        """
+        recipe = self.recipe(base_image_id, build_script)
+        existing_image = self._find_image(app_version, recipe)
+        if existing_image:
+            self._image_id = existing_image
+            self._logger.info(f"Using golden image {self._image_id} of app version {app_version}")
+            return self._image_id
+
+        builder = BuilderInstance(self._client, f"{self._name}-image-builder", self._logger)
+        instance_id = builder.launch(base_image_id, build_script, instance_type, subnet_id, security_group_id)
+        try:
+            self._logger.info(f"Baking app version {app_version} on builder instance {instance_id}...")
+            builder.wait_until_built(ec2_config.BAKE_WAITER_DELAY, ec2_config.BAKE_WAITER_MAX_ATTEMPTS)
+
+            image_name = f"{self._name}-{app_version}-{recipe}"
+            tags = stack_tags(image_name) + [{'Key': 'app-version', 'Value': app_version},
+                                             {'Key': 'recipe', 'Value': recipe}]
+            response = self._client.create_image(
+                InstanceId=instance_id,
+                Name=image_name,
+                Description=f"Employee directory app {app_version}, dependencies installed",
+                NoReboot=True,  # The builder is already stopped
+                TagSpecifications=[{'ResourceType': 'image', 'Tags': tags},
+                                   {'ResourceType': 'snapshot', 'Tags': tags}])
+            image_id = response['ImageId']
+            with tracer.span('wait:image_available', category='wait', image_id=image_id):
+                self._client.get_waiter('image_available').wait(
+                    ImageIds=[image_id],
+                    WaiterConfig={'Delay': ec2_config.BAKE_WAITER_DELAY,
+                                  'MaxAttempts': ec2_config.BAKE_WAITER_MAX_ATTEMPTS})
+        except WaiterError as e:
+            self._logger.error(f"Baking the golden image of app version {app_version} failed: {e}")
+            raise
+        finally:
+            builder.terminate()
+
+        self._image_id = image_id
+        self._logger.info(f"Golden image {image_name} registered with ID: {self._image_id}")
+        return self._image_id
+
+    @traced()
+    def load_image(self, image_id: str) -> bool:
+        """
+        Loads a golden image recorded by an earlier run.
+
+        :param image_id: ID of the image
+        :return: Whether the image still exists and is available
+        """
+        try:
+            images = self._client.describe_images(ImageIds=[image_id])['Images']
+        except ClientError as e:
+            self._logger.info(f"Golden image {image_id} no longer exists: {e}")
+            return False
+        if not images or images[0]['State'] != 'available':
+            return False
+
+        self._image_id = image_id
+        return True
+
+    @traced()
+    def deregister_image(self, image_id: str = None) -> bool:
+        """
+        Deregisters a golden image and deletes its snapshots.
+        """
+        image_id = image_id or self._image_id
+        if image_id is None:
+            return True
+        try:
+            images = self._client.describe_images(ImageIds=[image_id])['Images']
+            self._client.deregister_image(ImageId=image_id)
+            for image in images:
+                for mapping in image.get('BlockDeviceMappings', []):
+                    if 'Ebs' in mapping and mapping['Ebs'].get('SnapshotId'):
+                        self._client.delete_snapshot(SnapshotId=mapping['Ebs']['SnapshotId'])
+            self._logger.info(f"Golden image {image_id} deregistered")
+            if image_id == self._image_id:
+                self._image_id = None
+            return True
+        except ClientError as e:
+            self._logger.error(f"Failed to deregister golden image {image_id}: {e}")
+            return False
+
+    def _find_image(self, app_version: str, recipe: str) -> str | None:
+        response = self._client.describe_images(
+            Owners=['self'],
+            Filters=[{'Name': 'tag:app-version', 'Values': [app_version]},
+                     {'Name': 'tag:recipe', 'Values': [recipe]},
+                     {'Name': 'state', 'Values': ['available']}])
+        images = sorted(response['Images'], key=lambda image: image['CreationDate'], reverse=True)
+        return images[0]['ImageId'] if images else None
@@ -10,8 +10,17 @@ class SecurityGroupInterface(ABC):
     def delete_security_group(self) -> bool:
         pass
 
+    @abstractmethod
+    def load_security_group(self, security_group_id: str) -> None:
+        pass
+
     @property
     @abstractmethod
     def id(self):
         pass
 
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
@@ -31,3 +31,12 @@ class TargetGroupInterface(ABC):
         Returns the ARN of the target group.
         """
         pass
+
+    @staticmethod
+    @abstractmethod
+    def arn_suffix(target_group_arn: str) -> str:
+        """
+        Returns the final part of the ARN (targetgroup/<name>/<id>), the target group's CloudWatch dimension.
+        :param target_group_arn: ARN of the target group.
+        """
+        pass
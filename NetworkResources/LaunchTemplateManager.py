@@ -4,14 +4,21 @@ from botocore.exceptions import ClientError
 
 import configuration.ec2_config
 from configuration.ec2_config import KEY_PAIR_NAME as KEY_NAME
+from utils.Inventory import Inventory, tag_specifications
+from utils.Tracer import traced
 
 
 class LaunchTemplateManager:
-    def __init__(self, ec2_client, name, region, logger):
+    def __init__(self, ec2_client, name, region, logger, inventory: Inventory = None):
+        """
+        :param inventory: Index of the stack's tagged resources, where the template is looked up before describing it
+        """
+        self._inventory = inventory
         self._key_pair_name = None
         self._name = name
         self._region = region
         self._response = None
+        self._version = None
         self._client = ec2_client
         self._logger = logger
 
@@ -22,6 +29,17 @@ class LaunchTemplateManager:
 
         return self._response['LaunchTemplate']['LaunchTemplateId']
 
+    @property
+    def version(self) -> str:
+        """
+        :return: The version the Auto Scaling Group launches from, the default version of the template
+        """
+        if self._version is not None:
+            return self._version
+        if not self._response:
+            raise ValueError('Trying accesse version while self._response.id=None')
+        return str(self._response['LaunchTemplate']['DefaultVersionNumber'])
+
     @staticmethod
     def lunch_template_script_stress(s3_bucket_name: str, region: str) -> str:
         script = f"""#!/bin/bash -ex
@@ -62,6 +80,7 @@ npm start
 """
         return script
 
+    @traced()
     def create_launch_template(self,
                                iam_role: str,
                                user_data_script: str,
@@ -70,21 +89,27 @@ npm start
                                security_group_id: list[str],
                                ):
         try:
+            launch_template_data = self._launch_template_data(iam_role, user_data_script, image_id, instance_type,
+                                                              security_group_id)
             # Step 1: Check if the launch template exists
             if self.launch_template_exists():
                 self._response = self.load_existing_launch_template()
+                self._version = None
+                if configuration.ec2_config.version_template:
+                    self.publish_version(launch_template_data)
+                    return
                 if configuration.ec2_config.recreate_template:
                     self.delete_launch_template()
                 else:
                     return
 
-            # Step 2: Create a new key pair if needed
-            if configuration.ec2_config.create_new_key_pair:
+            # Step 2: Create a new key pair if needed (it may already be created by an earlier provisioning step)
+            if configuration.ec2_config.create_new_key_pair and self._key_pair_name is None:
                 self.create_key_pair(KEY_NAME)
 
             # Step 3: Create the launch template
-            self._response = self._create_new_launch_template(iam_role, user_data_script, image_id, instance_type,
-                                                        security_group_id)
+            self._response = self._create_new_launch_template(launch_template_data)
+            self._version = str(self._response['LaunchTemplate']['LatestVersionNumber'])
             self._logger.info(f"Launch Template created, ID: {self._response['LaunchTemplate']['LaunchTemplateId']}")
 
         except ClientError as e:
@@ -94,8 +119,46 @@ npm start
             self._logger.error(f"Unexpected error creating Launch Template {self._name}: {e}")
             raise
 
+    @traced()
+    def publish_version(self, launch_template_data: dict) -> str:
+        """
+        Publishes changed launch template data as a new version and makes it the default one, so the Auto Scaling
+        Group can roll its instances over to it with an instance refresh instead of being rebuilt.
+        Data equal to the default version's publishes nothing.
+
+        :param launch_template_data: The complete data of the template, as create_launch_template takes it
+        :return: The number of the default version
+        """
+        try:
+            default_version = self._client.describe_launch_template_versions(
+                LaunchTemplateId=self.id, Versions=['$Default'])['LaunchTemplateVersions'][0]
+            deployed = {key: default_version['LaunchTemplateData'].get(key) for key in launch_template_data}
+            if deployed == launch_template_data:
+                self._version = str(default_version['VersionNumber'])
+                self._logger.info(f"Launch template {self._name} is up to date at version {self._version}")
+                return self._version
+
+            response = self._client.create_launch_template_version(
+                LaunchTemplateId=self.id,
+                SourceVersion=str(default_version['VersionNumber']),
+                VersionDescription=f"Changes to version {default_version['VersionNumber']}",
+                LaunchTemplateData=launch_template_data)
+            self._version = str(response['LaunchTemplateVersion']['VersionNumber'])
+            self._client.modify_launch_template(LaunchTemplateId=self.id, DefaultVersion=self._version)
+            self._logger.info(f"Launch template {self._name} version {self._version} published as the default")
+            return self._version
+        except ClientError as e:
+            self._logger.error(f"Failed to publish a new version of Launch Template {self._name}: {e}")
+            raise
+
+    @traced()
     def launch_template_exists(self) -> bool:
-        """Check if the launch template exists."""
+        """Check if the launch template exists, in the inventory first and by name if it's missing there
+        (e.g. a template created without the stack tags)."""
+        if self._inventory is not None and self._inventory.find('ec2', 'launch-template', self._name):
+            self._logger.info(f"Launch template {self._name} of the stack already exists.")
+            return True
+
         try:
             existing_template = self._client.describe_launch_templates(
                 LaunchTemplateNames=[self._name]
@@ -107,6 +170,7 @@ npm start
             self._logger.info(f"Launch template {self._name} does not exist.")
         return False
 
+    @traced()
     def load_existing_launch_template(self) -> dict:
         """Load an existing launch template if it exists."""
         self._logger.info(f"Loading existing launch template {self._name}.")
@@ -117,45 +181,76 @@ npm start
                     'ResponseMetadata': existing_template['ResponseMetadata']}  # making structure as boto3 response
         return response
 
-    def _create_new_launch_template(self,
-                                    iam_role: str,
-                                    user_data_script: str,
-                                    image_id: str,
-                                    instance_type: str,
-                                    security_group_id: list[str]) -> dict:
+    @traced()
+    def load_launch_template(self, launch_template_id: str, launch_template_version: str = None) -> bool:
+        """
+        Loads an existing launch template by ID, e.g. one recorded by an earlier run.
+
+        :param launch_template_id: ID of the launch template
+        :param launch_template_version: The version recorded with it (None for the default version)
+        :return: Whether the launch template still exists
+        """
+        try:
+            existing_template = self._client.describe_launch_templates(LaunchTemplateIds=[launch_template_id])
+        except ClientError as e:
+            self._logger.info(f"Launch template {launch_template_id} no longer exists: {e}")
+            return False
+
+        self._response = {'LaunchTemplate': existing_template['LaunchTemplates'][0],
+                          'ResponseMetadata': existing_template['ResponseMetadata']}  # making structure as boto3 response
+        self._version = launch_template_version
+        self._logger.info(f"Loaded existing launch template {self._name} with ID: {launch_template_id}")
+        return True
+
+    def _create_new_launch_template(self, launch_template_data: dict) -> dict:
         """Create a new launch template."""
-        encoded_script = base64.b64encode(user_data_script.encode('utf-8')).decode('utf-8')
         self._logger.info(f"Creating Launch Template: {self._name}")
         response = self._client.create_launch_template(
             LaunchTemplateName=self._name,
-            LaunchTemplateData={
-                'ImageId': image_id,
-                'InstanceType': instance_type,
-                'KeyName': KEY_NAME,
-                'UserData': encoded_script,
-                'NetworkInterfaces': [
-                    {
-                        'AssociatePublicIpAddress': True,
-                        'DeviceIndex': 0,
-                        'Groups': security_group_id
-                    }
-                ],
-                'IamInstanceProfile': {
-                    'Name': iam_role
-                },
-                'MetadataOptions': {
-                    'HttpTokens': 'optional',
-                    'HttpEndpoint': 'enabled'
-                }
-            }
+            TagSpecifications=tag_specifications('launch-template', self._name),
+            LaunchTemplateData=launch_template_data
         )
         return response
 
+    @staticmethod
+    def _launch_template_data(iam_role: str,
+                              user_data_script: str,
+                              image_id: str,
+                              instance_type: str,
+                              security_group_id: list[str]) -> dict:
+        encoded_script = base64.b64encode(user_data_script.encode('utf-8')).decode('utf-8')
+        return {
+            'ImageId': image_id,
+            'InstanceType': instance_type,
+            'KeyName': KEY_NAME,
+            'UserData': encoded_script,
+            'NetworkInterfaces': [
+                {
+                    'AssociatePublicIpAddress': True,
+                    'DeviceIndex': 0,
+                    'Groups': security_group_id
+                }
+            ],
+            'IamInstanceProfile': {
+                'Name': iam_role
+            },
+            'MetadataOptions': {
+                'HttpTokens': 'optional',
+                'HttpEndpoint': 'enabled'
+            }
+        }
+
+    @traced()
     def clean_resources(self):
         self.delete_key_pair()
         self.delete_launch_template()
 
+    @traced()
     def delete_launch_template(self):
+        if self._response is None:
+            self._logger.info("No launch template loaded, nothing to delete")
+            return
+
         template_id = None  # For exception handling purposes
         try:
             template_id = self.id
@@ -163,9 +258,11 @@ npm start
             self._client.delete_launch_template(LaunchTemplateId=template_id)
             self._logger.info(f"Launch template deleted: {template_id}")
             self._response = None
+            self._version = None
         except (ClientError, ValueError) as e:
             self._logger.error(f"Failed to delete launch template {template_id}: {e}")
 
+    @traced()
     def is_key_pair_exists(self, key_name):
         try:
             self._logger.info(f"Checking if key pair '{key_name}' exists...")
@@ -183,6 +280,7 @@ npm start
             self._logger.error(f"Some unexpected error occurred in is_key_pair_exists: {e}")
             raise e
 
+    @traced()
     def create_key_pair(self, key_name='my-key-pair'):
         if self.is_key_pair_exists(key_name):
             self._logger.info(f"Key Pair with name '{key_name}' already exists. Skipping creation.")
@@ -191,7 +289,8 @@ npm start
 
         try:
             self._logger.info(f"Creating key pair '{key_name}'...")
-            response = self._client.create_key_pair(KeyName=key_name)
+            response = self._client.create_key_pair(KeyName=key_name,
+                                                     TagSpecifications=tag_specifications('key-pair', key_name))
             key_material = response['KeyMaterial']
 
             try:
@@ -210,8 +309,26 @@ npm start
             self._logger.error(f"An error occurred while creating the key pair: {e}")
             raise
 
+    def load_key_pair(self, key_name: str) -> bool:
+        """
+        Loads an existing key pair, e.g. one recorded by an earlier run.
+
+        :param key_name: Name of the key pair
+        :return: Whether the key pair still exists
+        """
+        if not self.is_key_pair_exists(key_name):
+            return False
+
+        self._key_pair_name = key_name
+        return True
+
     # Additional methods can be added for updating templates, describing templates, etc.
+    @traced()
     def delete_key_pair(self):
+        if self._key_pair_name is None:
+            self._logger.info("No key pair loaded, nothing to delete")
+            return
+
         try:
             self._logger.info(f"Deleting key pair '{self._key_pair_name}'...")
             self._client.describe_key_pairs(KeyNames=[self._key_pair_name])
@@ -1,17 +1,23 @@
-import boto3
+from utils.Inventory import stack_tags
+from utils.Tracer import traced
 
 
 class ListenerManager:
-    def __init__(self, elbv2_client: boto3.client, logger):
+    def __init__(self, elbv2_client, logger):
         self._listener_arn = None
         self._elbv2_client = elbv2_client
         self._logger = logger
 
+    @traced()
     def create_listener(self, load_balancer_arn: str, target_group_arn: str, static_listener_config: dict):
         try:
+            if self._adopt_listener(load_balancer_arn, target_group_arn, static_listener_config):
+                return self._listener_arn
+
             response = self._elbv2_client.create_listener(
                 LoadBalancerArn=load_balancer_arn,
                 DefaultActions=[{'Type': 'forward', 'TargetGroupArn': target_group_arn}],
+                Tags=stack_tags(),
                 **static_listener_config
             )
             self._listener_arn = response['Listeners'][0]['ListenerArn']
@@ -21,13 +27,54 @@ class ListenerManager:
             self._logger.error(f"Failed to create listener: {e}")
             raise
 
+    @traced()
     def delete_listener(self, listener_arn: str = None):
         try:
             arn_to_delete = listener_arn or self._listener_arn
+            if arn_to_delete is None:
+                self._logger.info("No listener loaded, nothing to delete")
+                return
+
             self._elbv2_client.delete_listener(ListenerArn=arn_to_delete)
             self._logger.info(f"Listener deleted successfully. '{arn_to_delete}'")
         except Exception as e:
             self._logger.error(f"Failed to delete listener: {e}")
+            raise
+
+    @traced()
+    def load_listener(self, listener_arn: str) -> bool:
+        """
+        Loads an existing listener, e.g. one recorded by an earlier run.
+
+        :param listener_arn: ARN of the listener
+        :return: Whether the listener still exists
+        """
+        try:
+            self._elbv2_client.describe_listeners(ListenerArns=[listener_arn])
+        except self._elbv2_client.exceptions.ListenerNotFoundException:
+            self._logger.info(f"Listener '{listener_arn}' no longer exists.")
+            return False
+
+        self._listener_arn = listener_arn
+        self._logger.info(f"Loaded existing listener with ARN: {self._listener_arn}")
+        return True
+
+    def _adopt_listener(self, load_balancer_arn: str, target_group_arn: str, static_listener_config: dict) -> bool:
+        # An adopted load balancer keeps its listener, a port takes only one, so it is pointed at the target group
+        listeners = self._elbv2_client.describe_listeners(LoadBalancerArn=load_balancer_arn)['Listeners']
+        listener = next((listener for listener in listeners
+                         if listener['Port'] == static_listener_config.get('Port')), None)
+        if listener is None:
+            return False
+
+        self._elbv2_client.modify_listener(
+            ListenerArn=listener['ListenerArn'],
+            DefaultActions=[{'Type': 'forward', 'TargetGroupArn': target_group_arn}],
+            **static_listener_config
+        )
+        self._listener_arn = listener['ListenerArn']
+        self._logger.info(f"Adopted listener of the load balancer with ARN: {self._listener_arn}")
+        return True
 
     @property
     def listener_arn(self):
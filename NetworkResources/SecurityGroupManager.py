@@ -1,52 +1,62 @@
-import boto3
-
 from NetworkResources.Interfaces.SecurityGroupInterface import SecurityGroupInterface
+from utils.Inventory import tag_specifications
+from utils.Tracer import traced
 
 
 class SecurityGroupManager(SecurityGroupInterface):
     def __init__(self,
-                 ec2,
+                 ec2_client,
                  group_name: str,
                  sg_inbound_rules: list[dict[str, any]],
                  logger):
+        """
+        :param ec2_client: Boto3 EC2 client, the group is created and deleted concurrently with other VPC resources,
+                           so it isn't made through the (not thread-safe) resource
+        """
         self._sg_inbound_rules = sg_inbound_rules
         self.vpc_id: str | None = None
         self._group_name = group_name
-        self._ec2 = ec2
+        self._client = ec2_client
         self._logger = logger
-        self._security_group = None
+        self._security_group_id = None
 
+    @traced()
     def create_security_group(self, vpc_id: str,
                               sg_params: dict = None) -> None:
-        self._security_group = self._ec2.create_security_group(
+        response = self._client.create_security_group(
             GroupName=self._group_name,
             VpcId=vpc_id,
+            TagSpecifications=tag_specifications('security-group', self._group_name),
             **sg_params
         )
+        self._security_group_id = response['GroupId']
 
         # Add inbound rules using IpPermissions parameter
-        self._security_group.authorize_ingress(
+        self._client.authorize_security_group_ingress(
+            GroupId=self._security_group_id,
             IpPermissions=self._sg_inbound_rules
         )
+        self._logger.info(f"Security Group created with ID: {self._security_group_id} and name: {self._group_name}")
 
-        # Add a name tag to the security group
-        self._security_group.create_tags(Tags=[{'Key': 'Name', 'Value': self._group_name}])
-        self._logger.info(f"Security Group created with ID: {self._security_group.id} and name: {self._group_name}")
-
+    @traced()
     def delete_security_group(self) -> bool:
-        if self._security_group:
+        if self._security_group_id:
             try:
-                self._security_group.delete()
-                self._logger.info(f"Security Group {self._security_group.id} has been deleted.")
-                self._security_group = None
+                self._client.delete_security_group(GroupId=self._security_group_id)
+                self._logger.info(f"Security Group {self._security_group_id} has been deleted.")
+                self._security_group_id = None
             except Exception as e:
                 self._logger.error(e)
                 return False
         return True
 
     def load_security_group(self, security_group_id: str) -> None:
-        self._security_group = self._ec2.SecurityGroup(security_group_id)
+        self._security_group_id = security_group_id
 
     @property
     def id(self):
-        return self._security_group.id
+        return self._security_group_id
+
+    @property
+    def name(self) -> str:
+        return self._group_name
@@ -1,19 +1,29 @@
-import boto3
 import configuration.config
 from NetworkResources.Interfaces.TargetGroupInterface import TargetGroupInterface
+from utils.Inventory import Inventory, stack_tags
+from utils.Tracer import traced
 
 
 class TargetGroupApplicationManager(TargetGroupInterface):
 
-    def __init__(self, client, name, logger):
+    def __init__(self, client, name, logger, inventory: Inventory = None):
+        """
+        :param inventory: Index of the stack's tagged resources, a target group of the stack found there in the
+                          same VPC is adopted instead of replaced (None to always create)
+        """
         super().__init__(client, logger)
+        self._inventory = inventory
         self._name = name
         self._target_group_arn = None
 
+    @traced()
     def create_target_group(self, vpc_id: str,
                             target_group_params: dict,
                             conflict_resolution_replace=True):
         try:
+            if self._adopt_target_group(vpc_id):
+                return
+
             # Check if a target group with the same name already exists
             existing_tg = self._find_target_group_by_name(self._name)
 
@@ -27,8 +37,7 @@ class TargetGroupApplicationManager(TargetGroupInterface):
             response = self._client.create_target_group(
                 Name=self._name,
                 VpcId=vpc_id,
-                Tags=[{'Key': 'Name',
-                       'Value': self._name}],
+                Tags=stack_tags(self._name),
                 **target_group_params
             )
             self._target_group_arn = response['TargetGroups'][0]['TargetGroupArn']
@@ -38,6 +47,7 @@ class TargetGroupApplicationManager(TargetGroupInterface):
             self._logger.error(f"Failed to create target group: {e}")
             raise
 
+    @traced()
     def register_targets(self, instance_ids: list):
         try:
             targets = [{'Id': instance_id} for instance_id in instance_ids]
@@ -47,6 +57,7 @@ class TargetGroupApplicationManager(TargetGroupInterface):
             self._logger.error(f"Failed to register targets: {e}")
             raise
 
+    @traced()
     def delete_target_group(self, target_group_arn: str = None):
         """
         Deletes the specified target group.
@@ -72,11 +83,48 @@ class TargetGroupApplicationManager(TargetGroupInterface):
                 self._target_group_arn = None
         except Exception as e:
             self._logger.error(f"Failed to delete target group: {e}")
+            raise
+
+    @traced()
+    def load_target_group(self, target_group_arn: str) -> bool:
+        """
+        Loads an existing target group, e.g. one recorded by an earlier run.
+
+        :param target_group_arn: ARN of the target group
+        :return: Whether the target group still exists
+        """
+        try:
+            self._client.describe_target_groups(TargetGroupArns=[target_group_arn])
+        except self._client.exceptions.TargetGroupNotFoundException:
+            self._logger.info(f"Target group '{target_group_arn}' no longer exists.")
+            return False
+
+        self._target_group_arn = target_group_arn
+        self._logger.info(f"Loaded existing target group '{self._name}' with ARN: {self._target_group_arn}")
+        return True
+
+    def _adopt_target_group(self, vpc_id: str) -> bool:
+        entry = self._inventory.find('elasticloadbalancing', 'targetgroup', self._name) if self._inventory else None
+        if entry is None:
+            return False
+
+        response = self._client.describe_target_groups(TargetGroupArns=[entry.arn])
+        if response['TargetGroups'][0]['VpcId'] != vpc_id:
+            return False
+
+        self._target_group_arn = entry.arn
+        self._logger.info(f"Adopted target group '{self._name}' of the stack with ARN: {self._target_group_arn}")
+        return True
 
     @property
     def target_group_arn(self):
         return self._target_group_arn
 
+    @staticmethod
+    def arn_suffix(target_group_arn: str) -> str:
+        return target_group_arn.rsplit(':', 1)[1]
+
+    @traced()
     def _find_target_group_by_name(self, name: str):
         """
         Helper function to find a target group by name.
@@ -1,6 +1,2 @@
-from NetworkResources.AutoScalingManager import AutoScalingManager
-from NetworkResources.ApplicationLoadBalancerManager import ApplicationLoadBalancerManager
-from NetworkResources.ListenerManager import ListenerManager
-from NetworkResources.TargetGroupApplicationManager import TargetGroupApplicationManager
-from NetworkResources.LaunchTemplateManager import LaunchTemplateManager
-from NetworkResources.SecurityGroupManager import SecurityGroupManager
+# The managers are imported from their modules (e.g. `from NetworkResources.ListenerManager import ListenerManager`),
+# so importing the package, or one of its interfaces, doesn't load every manager and boto3 with them
@@ -0,0 +1,299 @@
+import functools
+
+from configuration import (config, vpc_config, alb_config, asg_config, ec2_config, lambda_config, dynamodb_config,
+                           s3_config)
+from utils.ClientRegistry import ClientRegistry
+from utils.DependencyGraph import DependencyGraph
+from utils.Inventory import InventoryEntry
+from utils.SubnetLayout import subnet_layout, usable_availability_zones
+from utils.Tracer import traced
+
+
+class PlannedChange:
+    CREATE = 'create'
+    UPDATE = 'update'
+    UNCHANGED = 'unchanged'
+
+    def __init__(self, resource: str, name: str, action: str, differences: list[str] = None):
+        """
+        :param resource: The kind of resource, e.g. 'load_balancer'
+        :param name: The name or ID of the resource
+        :param action: One of CREATE, UPDATE, UNCHANGED
+        :param differences: For an update, one 'attribute: deployed -> configured' line per difference
+        """
+        self.resource = resource
+        self.name = name
+        self.action = action
+        self.differences = differences or []
+
+    def __str__(self):
+        symbol = {self.CREATE: '+', self.UPDATE: '~', self.UNCHANGED: ' '}[self.action]
+        lines = [f"{symbol} {self.resource} '{self.name}' ({self.action})"]
+        lines += [f"      {difference}" for difference in self.differences]
+        return '\n'.join(lines)
+
+
+class Planner:
+    def __init__(self, clients: ClientRegistry, logger):
+        """
+        Computes the difference between the configuration modules and what is deployed, from one sweep of
+        describe calls filtered by the names and Name tags the managers create resources with. The calls don't
+        depend on each other (except the listeners and scaling policies on their parent) and run concurrently.
+
+        :param clients: The registry the AWS clients are taken from
+        :param logger: Logger instance for logging operations
+        """
+        self._logger = logger
+        self._ec2_client = clients.client('ec2')
+        self._elbv2_client = clients.client('elbv2')
+        self._auto_scaling_client = clients.client('autoscaling')
+        self._lambda_client = clients.client('lambda')
+        self._iam_client = clients.client('iam')
+        self._dynamodb_client = clients.client('dynamodb')
+        self._tagging_client = clients.client('resourcegroupstaggingapi')
+
+    @traced()
+    def discover(self) -> dict:
+        """
+        :return: The description of every deployed stack resource, None (or an empty list) for missing ones
+        """
+        graph = DependencyGraph(logger=self._logger)
+        graph.add_step('vpc', self._describe_vpc, provides=('vpc',))
+        graph.add_step('subnets_params', self._subnets_params, provides=('subnets_params',))
+        graph.add_step('subnets', self._describe_subnets, requires=('subnets_params',), provides=('subnets',))
+        graph.add_step('internet_gateway', functools.partial(self._describe_one_by_name_tag,
+                                                             'describe_internet_gateways', 'InternetGateways',
+                                                             vpc_config.IGW_NAME),
+                       provides=('internet_gateway',))
+        graph.add_step('route_table', functools.partial(self._describe_one_by_name_tag, 'describe_route_tables',
+                                                        'RouteTables', vpc_config.RT_NAME),
+                       provides=('route_table',))
+        graph.add_step('security_group', self._describe_security_group, provides=('security_group',))
+        graph.add_step('load_balancer', self._describe_load_balancer, provides=('load_balancer',))
+        graph.add_step('listeners', self._describe_listeners, requires=('load_balancer',), provides=('listeners',))
+        graph.add_step('target_group', self._describe_target_group, provides=('target_group',))
+        graph.add_step('launch_template', self._describe_launch_template, provides=('launch_template',))
+        graph.add_step('auto_scaling_group', self._describe_auto_scaling_group, provides=('auto_scaling_group',))
+        graph.add_step('scaling_policies', self._describe_scaling_policies, requires=('auto_scaling_group',),
+                       provides=('scaling_policies',))
+        graph.add_step('scheduled_actions', self._describe_scheduled_actions, requires=('auto_scaling_group',),
+                       provides=('scheduled_actions',))
+        graph.add_step('lambda_function', self._describe_lambda_function, provides=('lambda_function',))
+        graph.add_step('lambda_role', self._describe_lambda_role, provides=('lambda_role',))
+        graph.add_step('dynamodb_table', self._describe_dynamodb_table, provides=('dynamodb_table',))
+        graph.add_step('s3_bucket', self._describe_bucket, provides=('s3_bucket',))
+        return graph.run()
+
+    def plan(self, deployed: dict = None) -> list[PlannedChange]:
+        """
+        :param deployed: The result of discover, discovered if not given
+        :return: The change every configured resource needs, in provisioning order
+        """
+        deployed = deployed if deployed is not None else self.discover()
+        changes = [self._plan_vpc(deployed['vpc']),
+                   *self._plan_subnets(deployed['subnets'], deployed['subnets_params']),
+                   self._plan_resource('internet_gateway', vpc_config.IGW_NAME, deployed['internet_gateway'], {}),
+                   self._plan_route_table(deployed['route_table'], deployed['internet_gateway']),
+                   self._plan_security_group(deployed['security_group']),
+                   self._plan_resource('s3_bucket', deployed['s3_bucket'] or f"{s3_config.S3_BUCKET_BASE_NAME}-*",
+                                       deployed['s3_bucket'], {}),
+                   self._plan_dynamodb_table(deployed['dynamodb_table']),
+                   self._plan_resource('lambda_role', lambda_config.ROLE_NAME, deployed['lambda_role'], {}),
+                   self._plan_resource('load_balancer', alb_config.NAME, deployed['load_balancer'],
+                                       alb_config.CREATE_ALB_PARAMS),
+                   self._plan_resource('target_group', alb_config.TARGET_GROUP_NAME, deployed['target_group'],
+                                       alb_config.TG_PARAMS),
+                   self._plan_listener(deployed['listeners']),
+                   self._plan_launch_template(deployed['launch_template']),
+                   self._plan_auto_scaling_group(deployed['auto_scaling_group'], deployed['scaling_policies'],
+                                                 deployed['scheduled_actions']),
+                   self._plan_resource('lambda_function', lambda_config.FUNCTION_NAME, deployed['lambda_function'],
+                                       lambda_config.LAMBDA_CLIENT_CREATE_FUNCTION)]
+        return changes
+
+    def _plan_vpc(self, vpc: dict | None) -> PlannedChange:
+        return self._plan_resource('vpc', vpc_config.VPC_NAME, vpc, {'CidrBlock': vpc_config.CIDR_BLOCK})
+
+    def _plan_subnets(self, subnets: list[dict], subnets_params: list[dict]) -> list[PlannedChange]:
+        deployed = {self._name_tag(subnet): subnet for subnet in subnets}
+        return [self._plan_resource('subnet', params['subnet_name'], deployed.get(params['subnet_name']),
+                                    {'CidrBlock': params['cidr_block'], 'AvailabilityZone': params['availability_zone']})
+                for params in subnets_params]
+
+    def _plan_route_table(self, route_table: dict | None, internet_gateway: dict | None) -> PlannedChange:
+        change = self._plan_resource('route_table', vpc_config.RT_NAME, route_table, {})
+        if route_table and internet_gateway:
+            routes = {route.get('DestinationCidrBlock'): route.get('GatewayId') for route in route_table['Routes']}
+            if routes.get(vpc_config.ANYWHERE_IPV4) != internet_gateway['InternetGatewayId']:
+                change.action = PlannedChange.UPDATE
+                change.differences.append(f"route {vpc_config.ANYWHERE_IPV4}: "
+                                          f"{routes.get(vpc_config.ANYWHERE_IPV4)} -> "
+                                          f"{internet_gateway['InternetGatewayId']}")
+        return change
+
+    def _plan_security_group(self, security_group: dict | None) -> PlannedChange:
+        change = self._plan_resource('security_group', vpc_config.SG_NAME, security_group, {})
+        if security_group:
+            deployed_rules = sorted((rule['IpProtocol'], rule.get('FromPort'), rule.get('ToPort'))
+                                    for rule in security_group['IpPermissions'])
+            configured_rules = sorted((rule['IpProtocol'], rule['FromPort'], rule['ToPort'])
+                                      for rule in vpc_config.SG_INBOUND_RULES)
+            if deployed_rules != configured_rules:
+                change.action = PlannedChange.UPDATE
+                change.differences.append(f"inbound rules: {deployed_rules} -> {configured_rules}")
+        return change
+
+    def _plan_dynamodb_table(self, table: dict | None) -> PlannedChange:
+        configured = {'KeySchema': dynamodb_config.key_schema,
+                      'ProvisionedThroughput': dynamodb_config.provisioned_throughput}
+        if table:
+            # The description holds extra throughput fields (e.g. NumberOfDecreasesToday)
+            table = {**table, 'ProvisionedThroughput': {key: table['ProvisionedThroughput'].get(key)
+                                                        for key in dynamodb_config.provisioned_throughput}}
+        return self._plan_resource('dynamodb_table', dynamodb_config.NAME, table, configured)
+
+    def _plan_listener(self, listeners: list[dict]) -> PlannedChange:
+        listener = next((listener for listener in listeners if listener['Port'] == alb_config.LISTENER_PORT), None)
+        return self._plan_resource('listener', f"{alb_config.NAME}:{alb_config.LISTENER_PORT}", listener,
+                                   alb_config.LISTENER_PARAMS)
+
+    def _plan_launch_template(self, launch_template: dict | None) -> PlannedChange:
+        configured = dict(ec2_config.LAUNCH_TEMPLATE_DATA_PARAMS)
+        if ec2_config.BAKE_IMAGE:
+            # The template uses the golden image baked from the configured one
+            configured.pop('ImageId')
+        return self._plan_resource('launch_template', ec2_config.LAUNCH_TEMPLATE_NAME, launch_template, configured)
+
+    def _plan_auto_scaling_group(self, group: dict | None, policies: list[dict],
+                                 scheduled_actions: list[dict]) -> PlannedChange:
+        change = self._plan_resource('auto_scaling_group', asg_config.AUTO_SCALING_GROUP_NAME, group,
+                                     asg_config.CREATE_ASG_PARAMS)
+        if group:
+            deployed = {policy['PolicyName'] for policy in policies}
+            for policy_name in asg_config.scaling_policies('', ''):
+                if policy_name not in deployed:
+                    change.action = PlannedChange.UPDATE
+                    change.differences.append(f"scaling policy {policy_name}: missing -> present")
+            deployed = {action['ScheduledActionName']: action for action in scheduled_actions}
+            for action in asg_config.scheduled_actions():
+                name = action['ScheduledActionName']
+                if name not in deployed:
+                    change.action = PlannedChange.UPDATE
+                    change.differences.append(f"scheduled action {name}: missing -> present")
+                    continue
+                for key, value in action.items():
+                    if deployed[name].get(key) != value:
+                        change.action = PlannedChange.UPDATE
+                        change.differences.append(f"scheduled action {name} {key}: {deployed[name].get(key)} -> "
+                                                  f"{value}")
+        return change
+
+    @staticmethod
+    def _plan_resource(resource: str, name: str, deployed: dict | None, configured: dict) -> PlannedChange:
+        if not deployed:
+            return PlannedChange(resource, name, PlannedChange.CREATE)
+
+        differences = [f"{key}: {deployed.get(key)} -> {value}"
+                       for key, value in configured.items() if deployed.get(key) != value]
+        return PlannedChange(resource, name, PlannedChange.UPDATE if differences else PlannedChange.UNCHANGED,
+                             differences)
+
+    def _describe_vpc(self) -> dict | None:
+        return self._describe_one_by_name_tag('describe_vpcs', 'Vpcs', vpc_config.VPC_NAME)
+
+    def _describe_one_by_name_tag(self, operation: str, key: str, name: str) -> dict | None:
+        resources = self._describe_by_name_tag(operation, key, [name])
+        return resources[0] if resources else None
+
+    def _describe_by_name_tag(self, operation: str, key: str, names: list[str]) -> list[dict]:
+        response = getattr(self._ec2_client, operation)(Filters=[{'Name': 'tag:Name', 'Values': names}])
+        return response[key]
+
+    def _subnets_params(self) -> list[dict]:
+        if vpc_config.VPC_LAUNCH_PARAMS['subnets_params']:
+            return vpc_config.VPC_LAUNCH_PARAMS['subnets_params']
+        zones, usable_zones = usable_availability_zones(self._ec2_client, ec2_config.LAUNCH_TEMPLATE_TYPE)
+        return subnet_layout(vpc_config.CIDR_BLOCK, vpc_config.SUBNET_PREFIX_LENGTH, zones, usable_zones,
+                             max_zones=vpc_config.MAX_AVAILABILITY_ZONES)
+
+    def _describe_subnets(self, subnets_params: list[dict]) -> list[dict]:
+        return self._describe_by_name_tag('describe_subnets', 'Subnets',
+                                          [subnet['subnet_name'] for subnet in subnets_params])
+
+    def _describe_security_group(self) -> dict | None:
+        response = self._ec2_client.describe_security_groups(
+            Filters=[{'Name': 'group-name', 'Values': [vpc_config.SG_NAME]}])
+        return response['SecurityGroups'][0] if response['SecurityGroups'] else None
+
+    def _describe_load_balancer(self) -> dict | None:
+        try:
+            return self._elbv2_client.describe_load_balancers(Names=[alb_config.NAME])['LoadBalancers'][0]
+        except self._elbv2_client.exceptions.LoadBalancerNotFoundException:
+            return None
+
+    def _describe_listeners(self, load_balancer: dict | None) -> list[dict]:
+        if not load_balancer:
+            return []
+        return self._elbv2_client.describe_listeners(LoadBalancerArn=load_balancer['LoadBalancerArn'])['Listeners']
+
+    def _describe_target_group(self) -> dict | None:
+        try:
+            return self._elbv2_client.describe_target_groups(Names=[alb_config.TARGET_GROUP_NAME])['TargetGroups'][0]
+        except self._elbv2_client.exceptions.TargetGroupNotFoundException:
+            return None
+
+    def _describe_launch_template(self) -> dict | None:
+        try:
+            response = self._ec2_client.describe_launch_template_versions(
+                LaunchTemplateName=ec2_config.LAUNCH_TEMPLATE_NAME, Versions=['$Default'])
+        except self._ec2_client.exceptions.ClientError:
+            return None
+        versions = response['LaunchTemplateVersions']
+        return versions[0]['LaunchTemplateData'] if versions else None
+
+    def _describe_auto_scaling_group(self) -> dict | None:
+        groups = self._auto_scaling_client.describe_auto_scaling_groups(
+            AutoScalingGroupNames=[asg_config.AUTO_SCALING_GROUP_NAME])['AutoScalingGroups']
+        return groups[0] if groups else None
+
+    def _describe_scaling_policies(self, auto_scaling_group: dict | None) -> list[dict]:
+        if not auto_scaling_group:
+            return []
+        return self._auto_scaling_client.describe_policies(
+            AutoScalingGroupName=asg_config.AUTO_SCALING_GROUP_NAME)['ScalingPolicies']
+
+    def _describe_scheduled_actions(self, auto_scaling_group: dict | None) -> list[dict]:
+        if not auto_scaling_group:
+            return []
+        return self._auto_scaling_client.describe_scheduled_actions(
+            AutoScalingGroupName=asg_config.AUTO_SCALING_GROUP_NAME)['ScheduledUpdateGroupActions']
+
+    def _describe_lambda_function(self) -> dict | None:
+        try:
+            return self._lambda_client.get_function_configuration(FunctionName=lambda_config.FUNCTION_NAME)
+        except self._lambda_client.exceptions.ResourceNotFoundException:
+            return None
+
+    def _describe_lambda_role(self) -> dict | None:
+        try:
+            return self._iam_client.get_role(RoleName=lambda_config.ROLE_NAME)['Role']
+        except self._iam_client.exceptions.NoSuchEntityException:
+            return None
+
+    def _describe_dynamodb_table(self) -> dict | None:
+        try:
+            return self._dynamodb_client.describe_table(TableName=dynamodb_config.NAME)['Table']
+        except self._dynamodb_client.exceptions.ResourceNotFoundException:
+            return None
+
+    def _describe_bucket(self) -> str | None:
+        # The bucket name gets a random suffix, so the deployed bucket is the bucket of the stack with the prefix
+        response = self._tagging_client.get_resources(
+            TagFilters=[{'Key': config.STACK_TAG_KEY, 'Values': [config.STACK_NAME]}], ResourceTypeFilters=['s3'])
+        buckets = [InventoryEntry.from_arn(resource['ResourceARN'], {}).id
+                   for resource in response['ResourceTagMappingList']]
+        return next((bucket for bucket in buckets if bucket.startswith(s3_config.S3_BUCKET_BASE_NAME)), None)
+
+    @staticmethod
+    def _name_tag(resource: dict) -> str | None:
+        return next((tag['Value'] for tag in resource.get('Tags', []) if tag['Key'] == 'Name'), None)
@@ -1,4 +1,5 @@
 from AwsDataResources.DataInterfaces.RDSInterface import RDSInterface
+from utils.RetryPolicy import is_gone_error
 
 
 class RDSManager(RDSInterface):
@@ -9,28 +10,70 @@ class RDSManager(RDSInterface):
 
     def setup(self) -> dict:
         rds_runtime_params = {}
-        for name, res in self._resource.items():
-            try:
-                res_runtime_params = {name: res.setup()}
-                rds_runtime_params = {**res_runtime_params, **rds_runtime_params}
-            except Exception as e:
-                self._logger.error(f"Couldn't setup {name}: {e}")
-                raise
+        for name in self._resource:
+            rds_runtime_params = {name: self.setup_resource(name), **rds_runtime_params}
 
         return rds_runtime_params
 
+    def setup_resource(self, name: str) -> dict:
+        """
+        Sets up a single data resource, so independent resources can be provisioned concurrently.
+
+        :param name: The resource name, as given in the resources dict
+        :return: The runtime params returned by the resource setup
+        """
+        try:
+            return self._resource[name].setup()
+        except Exception as e:
+            self._logger.error(f"Couldn't setup {name}: {e}")
+            raise
+
+    def load(self, runtime_params: dict) -> bool:
+        """
+        :param runtime_params: The params returned by setup, per resource name
+        :return: Whether every resource still exists
+        """
+        is_resources_loaded = True
+        for name in self._resource:
+            is_resources_loaded = self.load_resource(name, runtime_params.get(name, {})) and is_resources_loaded
+
+        return is_resources_loaded
+
+    def load_resource(self, name: str, runtime_params: dict) -> bool:
+        """
+        Loads a single data resource created by an earlier setup.
+
+        :param name: The resource name, as given in the resources dict
+        :param runtime_params: The params returned by that setup
+        :return: Whether the resource still exists
+        """
+        try:
+            return self._resource[name].load(runtime_params)
+        except Exception as e:
+            self._logger.error(f"Couldn't load resource {name}: {e}")
+            return False
+
     def clean_resources(self) -> bool:
         """
         clean_up all AWS Data resources
         :return: boolean (if the operation was successful)
         """
         is_resources_cleaned = True
-        for name, res in self._resource.items():
-            try:
-                res.clean_resources()
-            except Exception as e:
-                self._logger.error(f"Couldn't clean resource {name}: {e}")
-                is_resources_cleaned = False
+        for name in self._resource:
+            is_resources_cleaned = self.clean_resource(name) and is_resources_cleaned
 
         return is_resources_cleaned
 
+    def clean_resource(self, name: str) -> bool:
+        """
+        clean_up a single AWS Data resource
+        :param name: The resource name, as given in the resources dict
+        :return: boolean (if the operation was successful)
+        """
+        try:
+            return self._resource[name].clean_resources() is not False
+        except Exception as e:
+            if is_gone_error(e):
+                raise
+            self._logger.error(f"Couldn't clean resource {name}: {e}")
+            return False
@@ -0,0 +1,198 @@
+import math
+
+import numpy as np
+
+from configuration import asg_config, simulator_config
+
+
+def synthetic_trace(days: int = simulator_config.SYNTHETIC_DAYS,
+                    base_rate: float = simulator_config.SYNTHETIC_BASE_RATE,
+                    peak_rate: float = simulator_config.SYNTHETIC_PEAK_RATE,
+                    noise: float = simulator_config.SYNTHETIC_NOISE,
+                    seed: int = simulator_config.SYNTHETIC_SEED,
+                    step: int = simulator_config.STEP) -> np.ndarray:
+    """
+    A business day of load: the base rate at night, a one hour ramp to the peak rate from 7:30, and a two hour
+    decline from 17:00.
+
+    :return: Requests per second, one sample per step
+    """
+    hours = np.arange(days * 86400 // step) * step / 3600 % 24
+    day = np.clip(hours - 7.5, 0, 1) * np.clip((19 - hours) / 2, 0, 1)
+    rates = base_rate + (peak_rate - base_rate) * day
+    return np.maximum(rates * np.random.default_rng(seed).normal(1, noise, rates.shape), 0)
+
+
+def load_trace(path: str) -> np.ndarray:
+    """
+    :param path: CSV file with the request rate (requests per second) of every step in the last column,
+                 lines without a number there (e.g. a header) are skipped
+    :return: Requests per second, one sample per step
+    """
+    rates = []
+    with open(path) as trace:
+        for line in trace:
+            try:
+                rates.append(float(line.strip().split(',')[-1]))
+            except ValueError:
+                continue
+    return np.array(rates)
+
+
+def parameter_grid(**values) -> dict[str, np.ndarray]:
+    """
+    :param values: The values of every swept parameter, by parameter name
+    :return: Every combination of the values, one flat array per parameter
+    """
+    grids = np.meshgrid(*(np.asarray(value, dtype=float) for value in values.values()), indexing='ij')
+    return {name: grid.ravel() for name, grid in zip(values, grids)}
+
+
+class ScalingSimulator:
+    def __init__(self,
+                 capacity_per_instance: float = simulator_config.CAPACITY_PER_INSTANCE,
+                 boot_time: float = simulator_config.BOOT_TIME,
+                 step: int = simulator_config.STEP,
+                 slo_utilization: float = simulator_config.SLO_UTILIZATION,
+                 scale_out_evaluation: float = simulator_config.SCALE_OUT_EVALUATION,
+                 scale_in_evaluation: float = simulator_config.SCALE_IN_EVALUATION,
+                 scale_in_threshold: float = simulator_config.SCALE_IN_THRESHOLD):
+        """
+        Replays a load trace against a model of the group and its CPU target tracking policy, for many policy
+        parameter combinations at once: every combination is one lane of the arrays, only the time steps are a loop.
+
+        The model: the load spreads evenly over the instances in service. Target tracking scales out to
+        ceil(instances * CPU / target) once CPU stayed above the target for scale_out_evaluation, and counts the
+        launching instances as capacity. It scales in once CPU stayed below scale_in_threshold of the target for
+        scale_in_evaluation, no instance is warming up and the cooldown since the last scaling passed.
+        Launched instances serve after boot_time.
+
+        :param capacity_per_instance: Requests per second an instance serves at 100% CPU
+        :param boot_time: Seconds from the launch until an instance serves
+        :param step: Seconds between two samples of the trace
+        :param slo_utilization: Share of the serving capacity above which the latency misses the SLO
+        :param scale_out_evaluation: Seconds above the target before a scale-out
+        :param scale_in_evaluation: Seconds below the scale-in threshold before a scale-in
+        :param scale_in_threshold: Share of the target the CPU has to fall below for a scale-in
+        """
+        self._capacity_per_instance = capacity_per_instance
+        self._boot_steps = math.ceil(boot_time / step)
+        self._step = step
+        self._slo_utilization = slo_utilization
+        self._scale_out_steps = max(math.ceil(scale_out_evaluation / step), 1)
+        self._scale_in_steps = max(math.ceil(scale_in_evaluation / step), 1)
+        self._scale_in_threshold = scale_in_threshold
+
+    def needed_instances(self, trace: np.ndarray) -> np.ndarray:
+        """
+        :return: Instances needed at every step to serve the load within the SLO, at least one
+        """
+        return np.maximum(np.ceil(trace / (self._capacity_per_instance * self._slo_utilization)), 1)
+
+    def simulate(self, trace: np.ndarray,
+                 target_value=asg_config.TARGET_VALUE,
+                 warm_up=asg_config.WARM_UP,
+                 cooldown=asg_config.COOLDOWN,
+                 min_size=asg_config.MIN_SIZE,
+                 max_size=asg_config.MAX_SIZE) -> dict[str, np.ndarray]:
+        """
+        The parameters are scalars or arrays broadcast against each other, e.g. the arrays of parameter_grid.
+        The group starts at its minimum size.
+
+        :param trace: Requests per second, one sample per step
+        :param target_value: CPU utilization (percent) the policy tracks
+        :param warm_up: Seconds after a launch during which the policy doesn't scale in
+        :param cooldown: Seconds after a scaling before the next scale-in
+        :param min_size: Minimum size of the group
+        :param max_size: Maximum size of the group
+        :return: Per combination, in the broadcast shape of the parameters:
+                 time_to_capacity_max and time_to_capacity_mean: seconds from the load outgrowing the instances in
+                 service until they catch up, the longest and the average (NaN if it never happened),
+                 over_provisioned and under_provisioned: instance-minutes above and below the needed instances,
+                 slo_violations: minutes the load exceeded the SLO utilization of the instances in service,
+                 instance_minutes: instance-minutes paid for, launching instances included,
+                 peak_instances: the largest size the group reached
+        """
+        target_value, warm_up, cooldown, min_size, max_size = np.broadcast_arrays(
+            *(np.asarray(value, dtype=float) for value in (target_value, warm_up, cooldown, min_size, max_size)))
+        shape = target_value.shape
+        target_value, warm_up, cooldown, min_size, max_size = (
+            value.ravel() for value in (target_value, warm_up, cooldown, min_size, max_size))
+        lanes = target_value.size
+        minutes = self._step / 60
+
+        # Launches by the step they start serving at, a ring indexed by step modulo its length
+        pipeline = np.zeros((self._boot_steps + 1, lanes))
+        in_service = min_size.copy()
+        desired = min_size.copy()
+        last_launch = np.full(lanes, -np.inf)
+        last_scaling = np.full(lanes, -np.inf)
+        above = np.zeros(lanes)
+        below = np.zeros(lanes)
+
+        shortfall_run = np.zeros(lanes)
+        longest_shortfall = np.zeros(lanes)
+        shortfalls = np.zeros(lanes)
+        shortfall_steps = np.zeros(lanes)
+        over = np.zeros(lanes)
+        under = np.zeros(lanes)
+        violations = np.zeros(lanes)
+        instance_minutes = np.zeros(lanes)
+        peak = desired.copy()
+
+        needed = self.needed_instances(trace)
+        for t, load in enumerate(trace):
+            now = t * self._step
+            slot = t % len(pipeline)
+            in_service += pipeline[slot]
+            pipeline[slot] = 0
+
+            # The load spreads over the instances in service, an empty group counts as saturated
+            serving = in_service * self._capacity_per_instance
+            cpu = np.minimum(np.divide(load, serving, out=np.ones(lanes), where=serving > 0), 1) * 100
+
+            short = in_service < needed[t]
+            shortfall_run = np.where(short, shortfall_run + 1, 0)
+            shortfalls += shortfall_run == 1
+            shortfall_steps += short
+            np.maximum(longest_shortfall, shortfall_run, out=longest_shortfall)
+            over += np.maximum(desired - needed[t], 0) * minutes
+            under += np.maximum(needed[t] - in_service, 0) * minutes
+            violations += (load > serving * self._slo_utilization) * minutes
+            instance_minutes += desired * minutes
+
+            above = np.where(cpu > target_value, above + 1, 0)
+            below = np.where(cpu < target_value * self._scale_in_threshold, below + 1, 0)
+            wanted = np.clip(np.ceil(np.maximum(in_service, 1) * cpu / target_value), min_size, max_size)
+
+            scale_out = (above >= self._scale_out_steps) & (wanted > desired)
+            pipeline[(t + self._boot_steps) % len(pipeline)] += np.where(scale_out, wanted - desired, 0)
+            desired = np.where(scale_out, wanted, desired)
+            last_launch = np.where(scale_out, now, last_launch)
+
+            scale_in = ((below >= self._scale_in_steps) & (wanted < desired) & (now - last_launch >= warm_up)
+                        & (now - last_scaling >= cooldown))
+            in_service -= np.minimum(np.where(scale_in, desired - wanted, 0), in_service)
+            desired = np.where(scale_in, wanted, desired)
+            last_scaling = np.where(scale_out | scale_in, now, last_scaling)
+            np.maximum(peak, desired, out=peak)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_shortfall = np.where(shortfalls > 0, shortfall_steps / shortfalls, np.nan)
+        results = {
+            'time_to_capacity_max': longest_shortfall * self._step,
+            'time_to_capacity_mean': mean_shortfall * self._step,
+            'over_provisioned': over,
+            'under_provisioned': under,
+            'slo_violations': violations,
+            'instance_minutes': instance_minutes,
+            'peak_instances': peak,
+        }
+        return {name: value.reshape(shape) for name, value in results.items()}
+
+    @staticmethod
+    def rank(results: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        :return: Indices of the combinations, fewest SLO violation minutes first, then fewest instance-minutes
+        """
+        return np.lexsort((results['instance_minutes'].ravel(), results['slo_violations'].ravel()))
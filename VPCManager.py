@@ -1,16 +1,23 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import WaiterError
 from Interfaces.VPCInterface import VpcInterface
 from botocore.client import BaseClient
-from configuration import vpc_config
+from configuration import config, vpc_config
 from NetworkResources.SecurityGroupManager import SecurityGroupManager, SecurityGroupInterface
-import time
+from utils.DependencyGraph import DependencyGraph, deletion_step
+from utils.Inventory import Inventory, tag_specifications
+from utils.RetryPolicy import RetryPolicy
+from utils.SubnetLayout import subnet_layout, usable_availability_zones
+from utils.Tracer import traced, tracer
 
 
 class VPCManager(VpcInterface):
     def __init__(self, ec2,
                  client: BaseClient,
                  security_group_manager: SecurityGroupInterface,
-                 logger=None):
+                 logger=None,
+                 inventory: Inventory = None):
         """
         Initializes the VPCManager with necessary AWS resources and managers.
 
@@ -18,7 +25,10 @@ class VPCManager(VpcInterface):
         :param client: Boto3 client object for EC2
         :param security_group_manager: Instance of SecurityGroupInterface for managing security groups
         :param logger: Logger instance for logging operations
+        :param inventory: Index of the stack's tagged resources, an environment found there is adopted instead of
+                          created again (None to always create)
         """
+        self._inventory = inventory
         self._security_group_manager = security_group_manager
         self._ec2 = ec2
         self._client = client
@@ -26,6 +36,7 @@ class VPCManager(VpcInterface):
         self._route_table = None
         self._internet_gateway = None
         self._subnets = []
+        self._vpc_endpoint_ids = []
         self._logger = logger
 
     @property
@@ -44,71 +55,196 @@ class VPCManager(VpcInterface):
     def subnets(self) -> list:
         return self._subnets
 
+    @property
+    def internet_gateway_id(self) -> str | None:
+        return self._internet_gateway.id if self._internet_gateway else None
+
+    @property
+    def route_table_id(self) -> str | None:
+        return self._route_table.id if self._route_table else None
+
+    @property
+    def vpc_endpoint_ids(self) -> list[str]:
+        return self._vpc_endpoint_ids
+
+    @traced()
     def launch_vpc_environment(self, cidr_block,
                                vpc_name,
                                igw_name,
                                rt_name: str,
-                               subnets_params: list[dict],
-                               security_group_params: dict):
+                               subnets_params: list[dict] | None,
+                               security_group_params: dict,
+                               instance_type: str = None):
         """
         Launches the entire VPC environment including VPC, Internet Gateway, Route Table, and Subnets.
+        Once the VPC exists, the gateway and route table, the security group and every subnet with its route table
+        association are created concurrently.
 
         :param security_group_params:
         :param cidr_block: The CIDR block for the VPC
         :param vpc_name: The name tag for the VPC
         :param igw_name: The name tag for the Internet Gateway
         :param rt_name: The name tag for the Route Table
-        :param subnets_params: A list of dictionaries containing subnet parameters like CIDR block and AZ
+        :param subnets_params: A list of dictionaries containing subnet parameters like CIDR block and AZ,
+                               None to lay out one subnet per usable availability zone of the region
+        :param instance_type: Instance type the subnets are laid out for, zones that don't offer it get no subnet
         """
-        self.create_vpc(cidr_block, vpc_name)
-        self.create_internet_gateway(igw_name=igw_name)
-        self.create_route_table(rt_name=rt_name)
+        subnets_params = subnets_params or self.layout_subnets(cidr_block, instance_type)
+        if self.adopt_vpc_environment(vpc_name, igw_name, rt_name, subnets_params):
+            return
 
-        self.create_subnets(subnets_params)
-        self.associate_subnets_list_with_route_table()
+        self.create_vpc(cidr_block, vpc_name)
 
-        # Create the security group in the newly created VPC
-        self._security_group_manager.create_security_group(self._vpc.id, security_group_params)
+        # The steps run on worker threads and only use the client, which unlike the resource is safe to share
+        # between threads. The created IDs are wrapped in resource objects here, on the calling thread
+        graph = DependencyGraph(logger=self._logger)
+        graph.add_step('internet_gateway', functools.partial(self._create_internet_gateway, igw_name),
+                       provides=('internet_gateway_id',))
+        graph.add_step('route_table', functools.partial(self._create_route_table, rt_name),
+                       requires=('internet_gateway_id',), provides=('route_table_id',))
+        graph.add_step('security_group', functools.partial(self._security_group_manager.create_security_group,
+                                                           self._vpc.id, security_group_params))
+        self._add_subnet_steps(graph, subnets_params, route_table_step='route_table')
+        outputs = graph.run()
+        self._internet_gateway = self._ec2.InternetGateway(outputs['internet_gateway_id'])
+        self._route_table = self._ec2.RouteTable(outputs['route_table_id'])
+        self._subnets = self._subnets_in_order(outputs, subnets_params)
+
+    @traced()
+    def layout_subnets(self, cidr_block: str, instance_type: str = None) -> list[dict]:
+        """
+        Discovers the usable availability zones of the region and carves one subnet per zone out of the VPC block,
+        so the load balancer and the Auto Scaling Group, which use every subnet, spread across all of them.
 
-    def teardown_vpc_resources(self, tries=0, max_retrying=vpc_config.RETRIES):
+        :param cidr_block: The CIDR block of the VPC
+        :param instance_type: Zones that don't offer the instance type get no subnet (None to skip the check)
+        :return: The subnets parameters, one dictionary per subnet
         """
-        Tears down the VPC environment by deleting all resources: security groups, subnets_ids, route tables, IGW, and the VPC itself.
+        zones, usable_zones = usable_availability_zones(self._client, instance_type)
+        layout = subnet_layout(cidr_block, vpc_config.SUBNET_PREFIX_LENGTH, zones, usable_zones,
+                               max_zones=vpc_config.MAX_AVAILABILITY_ZONES)
+        if not layout:
+            self._logger.error(f"No usable availability zone found for instance type {instance_type}")
+            raise Exception("No usable availability zone for the subnets.")
+
+        self._logger.info(f"Laying out {len(layout)} subnet(s) across {', '.join(subnet['availability_zone'] for subnet in layout)}")
+        return layout
+
+    @traced()
+    def adopt_vpc_environment(self, vpc_name: str,
+                              igw_name: str,
+                              rt_name: str,
+                              subnets_params: list[dict]) -> bool:
+        """
+        Loads a VPC environment of this stack found in the inventory by its Name tags, e.g. one left behind by a run
+        whose deployment state was lost. Only a complete environment is adopted.
 
-        :return: Boolean indicating if all resources are successfully deleted
+        :return: Boolean indicating whether the environment was found and loaded
         """
-        if tries >= max_retrying:
-            return
+        if self._inventory is None:
+            return False
 
-        self._logger.debug(f"Attempt to clean VPC Resources {tries + 1}/{max_retrying}")
-        try:
-            # security group
-            try:
-                self._debug_resources_status()
-            except Exception as e:
-                self._logger.debug(e)
+        vpc = self._inventory.find('ec2', 'vpc', vpc_name)
+        internet_gateway = self._inventory.find('ec2', 'internet-gateway', igw_name)
+        route_table = self._inventory.find('ec2', 'route-table', rt_name)
+        security_group = self._inventory.find('ec2', 'security-group', self._security_group_manager.name)
+        subnets = [self._inventory.find('ec2', 'subnet', params['subnet_name']) for params in subnets_params]
+        if not all((vpc, internet_gateway, route_table, security_group, *subnets)):
+            return False
 
-            # The deletion functions catch errors but do not raise them in order to not stop the deletion
-            # of other resources
-            deletion_vector = [self.delete_subnets_and_dependencies,
-                               self.delete_internet_gateway,
-                               self.delete_route_table,
-                               self._security_group_manager.delete_security_group,
-                               self.delete_vpc]
+        self._logger.info(f"Found VPC {vpc_name} of stack '{config.STACK_NAME}' in the inventory, adopting it")
+        return self.load_vpc_environment(vpc.id, [subnet.id for subnet in subnets], security_group.id,
+                                         internet_gateway.id, route_table.id)
 
-            is_all_deleted = True
+    @traced()
+    def load_vpc_environment(self, vpc_id: str,
+                             subnet_ids: list[str],
+                             security_group_id: str,
+                             internet_gateway_id: str,
+                             route_table_id: str) -> bool:
+        """
+        Loads a VPC environment created by an earlier launch, e.g. recorded in the deployment state.
+
+        :param vpc_id: ID of the VPC
+        :param subnet_ids: IDs of its subnets
+        :param security_group_id: ID of its security group
+        :param internet_gateway_id: ID of its Internet Gateway
+        :param route_table_id: ID of its Route Table
+        :return: Boolean indicating whether the VPC and its subnets still exist
+        """
+        try:
+            vpc = self._ec2.Vpc(vpc_id)
+            vpc.load()
+            self._client.describe_subnets(SubnetIds=subnet_ids)
+        except Exception as e:
+            self._logger.info(f"VPC {vpc_id} or one of its subnets no longer exists: {e}")
+            return False
 
-            for func in deletion_vector:
-                is_all_deleted = is_all_deleted and func()
+        self._vpc = vpc
+        self._subnets = [self._ec2.Subnet(subnet_id) for subnet_id in subnet_ids]
+        self._internet_gateway = self._ec2.InternetGateway(internet_gateway_id)
+        self._route_table = self._ec2.RouteTable(route_table_id)
+        self._security_group_manager.load_security_group(security_group_id)
+        self._logger.info(f"Loaded existing VPC ID: {vpc_id} with {len(subnet_ids)} subnet(s)")
+        return True
 
-            if not is_all_deleted:
-                self.teardown_vpc_resources(tries + 1, max_retrying)
+    @traced()
+    def teardown_vpc_resources(self, retry_policy: RetryPolicy = None) -> bool:
+        """
+        Tears down the VPC environment by deleting all resources: security groups, subnets_ids, route tables, IGW, and the VPC itself.
+        Independent resources are deleted concurrently and a failing deletion retries only itself.
 
+        :param retry_policy: Retries a failing deletion, defaults to the configured teardown policy
+        :return: Boolean indicating if all resources are successfully deleted
+        """
+        try:
+            self._debug_resources_status()
         except Exception as e:
-            self._logger.error(f"Error during teardown: {e}")
-            if tries < max_retrying:
-                self.teardown_vpc_resources(tries + 1, max_retrying)
-            raise
+            self._logger.debug(e)
+
+        graph = DependencyGraph(logger=self._logger)
+        self.add_teardown_steps(graph, retry_policy=retry_policy)
+        graph.run(keep_going=True)
+        return True
+
+    def add_teardown_steps(self, graph: DependencyGraph, after=(), retry_policy: RetryPolicy = None):
+        """
+        Adds the VPC teardown to a DependencyGraph, one step per resource: the instances of the whole VPC are
+        terminated at once, the network interfaces left behind are deleted, then the subnets are deleted
+        concurrently and every resource retries only its own deletion.
 
+        :param graph: The teardown graph
+        :param after: Names of steps that must finish before the VPC resources can be deleted
+        :param retry_policy: Retries a failing deletion, defaults to the configured teardown policy
+        """
+        retry_policy = retry_policy or self._teardown_retry_policy()
+        graph.add_step('vpc_instances', deletion_step(self.terminate_vpc_instances),
+                       after=after, retry_policy=retry_policy)
+        graph.add_step('vpc_network_interfaces', deletion_step(self.delete_detached_network_interfaces),
+                       after=('vpc_instances',), retry_policy=retry_policy)
+
+        subnet_steps = []
+        for subnet in list(self._subnets):
+            name = f"subnet:{subnet.id}"
+            graph.add_step(name, deletion_step(functools.partial(self.delete_subnet, subnet)),
+                           after=('vpc_network_interfaces',), retry_policy=retry_policy)
+            subnet_steps.append(name)
+
+        network_steps = (*after, *subnet_steps)
+        graph.add_step('internet_gateway', deletion_step(self.delete_internet_gateway),
+                       after=network_steps, retry_policy=retry_policy)
+        # Endpoints add routes to the route table, so they go first
+        graph.add_step('vpc_endpoints', deletion_step(self.delete_gateway_endpoints),
+                       after=after, retry_policy=retry_policy)
+        graph.add_step('route_table', deletion_step(self.delete_route_table),
+                       after=(*network_steps, 'vpc_endpoints'), retry_policy=retry_policy)
+        graph.add_step('security_group', deletion_step(self._security_group_manager.delete_security_group),
+                       after=network_steps, retry_policy=retry_policy)
+        graph.add_step('vpc', deletion_step(self.delete_vpc),
+                       after=('internet_gateway', 'route_table', 'security_group'),
+                       retry_policy=retry_policy)
+
+    @traced()
     def create_vpc(self, cidr_block, vpc_name):
         """
         Creates a VPC with the given CIDR block and name.
@@ -116,43 +252,55 @@ class VPCManager(VpcInterface):
         :param cidr_block: The CIDR block for the VPC
         :param vpc_name: The name tag for the VPC
         """
-        self._vpc = self._ec2.create_vpc(CidrBlock=cidr_block)
-        self._vpc.wait_until_available()
+        self._vpc = self._ec2.create_vpc(CidrBlock=cidr_block, TagSpecifications=tag_specifications('vpc', vpc_name))
+        with tracer.span('wait:vpc_available', category='wait'):
+            self._vpc.wait_until_available()
 
         # Enable DNS support and hostnames in the VPC
         self._vpc.modify_attribute(EnableDnsSupport={'Value': True})
         self._vpc.modify_attribute(EnableDnsHostnames={'Value': True})
-
-        # Tag the VPC with a name
-        self._vpc.create_tags(Tags=[{'Key': 'Name', 'Value': vpc_name}])
         self._logger.info(f"VPC created with ID: {self._vpc.id} and name: {vpc_name}")
 
+    @traced()
     def create_internet_gateway(self, igw_name):
         """
         Creates and attaches an Internet Gateway to the VPC.
 
         :param igw_name: The name tag for the Internet Gateway
         """
-        self._internet_gateway = self._ec2.create_internet_gateway()
-        self._vpc.attach_internet_gateway(InternetGatewayId=self._internet_gateway.id)
-        self._internet_gateway.create_tags(Tags=[{'Key': 'Name', 'Value': igw_name}])
+        self._internet_gateway = self._ec2.InternetGateway(self._create_internet_gateway(igw_name))
+
+    def _create_internet_gateway(self, igw_name: str) -> str:
+        response = self._client.create_internet_gateway(
+            TagSpecifications=tag_specifications('internet-gateway', igw_name))
+        internet_gateway_id = response['InternetGateway']['InternetGatewayId']
+        self._client.attach_internet_gateway(InternetGatewayId=internet_gateway_id, VpcId=self._vpc.id)
         self._logger.info(
-            f"Internet Gateway created and attached with ID: {self._internet_gateway.id} and name: {igw_name}")
+            f"Internet Gateway created and attached with ID: {internet_gateway_id} and name: {igw_name}")
+        return internet_gateway_id
 
+    @traced()
     def create_route_table(self, rt_name: str) -> None:
         """
         Creates a Route Table and adds a route to the Internet Gateway.
 
         :param rt_name: The name tag for the Route Table
         """
-        self._route_table = self._vpc.create_route_table()
-        self._route_table.create_route(
+        self._route_table = self._ec2.RouteTable(self._create_route_table(rt_name, self._internet_gateway.id))
+
+    def _create_route_table(self, rt_name: str, internet_gateway_id: str) -> str:
+        response = self._client.create_route_table(VpcId=self._vpc.id,
+                                                   TagSpecifications=tag_specifications('route-table', rt_name))
+        route_table_id = response['RouteTable']['RouteTableId']
+        self._client.create_route(
+            RouteTableId=route_table_id,
             DestinationCidrBlock=vpc_config.ANYWHERE_IPV4,
-            GatewayId=self._internet_gateway.id
+            GatewayId=internet_gateway_id
         )
-        self._route_table.create_tags(Tags=[{'Key': 'Name', 'Value': rt_name}])
-        self._logger.info(f"Route Table created with ID: {self._route_table.id} and name: {rt_name}")
+        self._logger.info(f"Route Table created with ID: {route_table_id} and name: {rt_name}")
+        return route_table_id
 
+    @traced()
     def create_subnet(self, cidr_block, availability_zone, subnet_name):
         """
         Creates a subnet in the specified CIDR block and availability zone.
@@ -162,69 +310,155 @@ class VPCManager(VpcInterface):
         :param subnet_name: The name tag for the subnet
         :return: The created subnet object
         """
-        subnet = self._ec2.create_subnet(CidrBlock=cidr_block, VpcId=self._vpc.id, AvailabilityZone=availability_zone)
-        subnet.create_tags(Tags=[{'Key': 'Name', 'Value': subnet_name}])
+        subnet = self._ec2.Subnet(self._create_subnet(cidr_block, availability_zone, subnet_name))
         self._subnets.append(subnet)
-        self._logger.info(f"Subnet created with ID: {subnet.id} in AZ: {availability_zone}")
         return subnet
 
+    @traced()
+    def _create_subnet(self, cidr_block, availability_zone, subnet_name) -> str:
+        # Made with the client, which unlike the resource is safe to share between the threads creating subnets
+        response = self._client.create_subnet(CidrBlock=cidr_block, VpcId=self._vpc.id,
+                                              AvailabilityZone=availability_zone,
+                                              TagSpecifications=tag_specifications('subnet', subnet_name))
+        subnet_id = response['Subnet']['SubnetId']
+        self._logger.info(f"Subnet created with ID: {subnet_id} in AZ: {availability_zone}")
+        return subnet_id
+
+    @traced()
     def associate_subnet_with_route_table(self, subnet):
         """
         Associates a subnet with the created route table.
 
         :param subnet: The subnet object to be associated with the route table
         """
-        self._route_table.associate_with_subnet(SubnetId=subnet.id)
-        self._logger.info(f"Subnet ID: {subnet.id} associated with Route Table ID: {self._route_table.id}")
+        self._associate_subnet(subnet.id, self._route_table.id)
+
+    def _associate_subnet(self, subnet_id: str, route_table_id: str):
+        self._client.associate_route_table(RouteTableId=route_table_id, SubnetId=subnet_id)
+        self._logger.info(f"Subnet ID: {subnet_id} associated with Route Table ID: {route_table_id}")
+
+    @traced()
+    def delete_subnets_and_dependencies(self, delay=vpc_config.TERMINATION_WAITER_DELAY,
+                                        max_attempts=vpc_config.TERMINATION_WAITER_MAX_ATTEMPTS) -> bool:
+        """
+        Terminates the instances of the VPC, waits for termination, deletes the network interfaces left behind and
+        deletes all subnets_ids associated with the VPC concurrently.
+        :param delay: Time in seconds to wait between checks for instance termination.
+        :param max_attempts: Maximum number of attempts to check for instance termination before timing out.
+        """
+        if not self._subnets:
+            self._logger.info("No subnets to delete.")
+            return True
+
+        if not self.terminate_vpc_instances(delay, max_attempts) or not self.delete_detached_network_interfaces():
+            return False
+
+        with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as pool:
+            return all(pool.map(self.delete_subnet, list(self._subnets)))
 
-    def delete_subnets_and_dependencies(self, delay=20, max_attempts=10) -> bool:
+    @traced()
+    def terminate_vpc_instances(self, delay=vpc_config.TERMINATION_WAITER_DELAY,
+                                max_attempts=vpc_config.TERMINATION_WAITER_MAX_ATTEMPTS) -> bool:
         """
-        Terminates instances in the subnets, waits for termination, and deletes all subnets_ids associated with the VPC.
+        Terminates the instances of every subnet of the VPC with one query, one terminate call and one waiter,
+        instead of one round per subnet.
+
         :param delay: Time in seconds to wait between checks for instance termination.
         :param max_attempts: Maximum number of attempts to check for instance termination before timing out.
+        :return: Boolean indicating whether the VPC has no instance left
         """
+        if not self._vpc:
+            return True
+
         try:
-            if not self._subnets:
-                self._logger.info("No subnets to delete.")
+            instance_ids = [instance['InstanceId']
+                            for page in self._client.get_paginator('describe_instances').paginate(
+                                Filters=[{'Name': 'vpc-id', 'Values': [self._vpc.id]},
+                                         {'Name': 'instance-state-name', 'Values': vpc_config.LIVE_INSTANCE_STATES}])
+                            for reservation in page['Reservations']
+                            for instance in reservation['Instances']]
+            if not instance_ids:
                 return True
 
-            instance_waiter = self._ec2.meta.client.get_waiter('instance_terminated')
+            self._logger.info(f"Found instances {instance_ids} in VPC ID: {self._vpc.id}, terminating...")
+            self._client.terminate_instances(InstanceIds=instance_ids)
 
-            for subnet in self._subnets:
-                self._logger.info(f"Checking for instances in Subnet ID: {subnet.id}")
+            self._logger.info(f"Waiting for {len(instance_ids)} instance(s) to terminate...")
+            with tracer.span('wait:instance_terminated', category='wait', instances=len(instance_ids)):
+                self._client.get_waiter('instance_terminated').wait(
+                    InstanceIds=instance_ids, WaiterConfig={'Delay': delay, 'MaxAttempts': max_attempts})
+            self._logger.info(f"All instances in VPC ID: {self._vpc.id} terminated.")
+            return True
+        except WaiterError as e:
+            self._logger.error(f"Error waiting for instances to terminate in VPC ID: {self._vpc.id}: {e}")
+            return False
+        except Exception as e:
+            self._logger.error(f"Error terminating the instances of VPC ID: {self._vpc.id}: {e}")
+            return False
 
-                # Get all instances in the subnet
-                instances = list(self._ec2.instances.filter(Filters=[{'Name': 'subnet-id', 'Values': [subnet.id]}]))
+    @traced()
+    def delete_detached_network_interfaces(self) -> bool:
+        """
+        Deletes, concurrently, the network interfaces left in the VPC once its instances are gone, e.g. released by
+        a deleted load balancer or Lambda function, since they keep their subnets and security group from being
+        deleted.
 
-                if instances:
-                    instance_ids = [instance.id for instance in instances]
-                    self._logger.info(f"Found instances {instance_ids} in Subnet ID: {subnet.id}, terminating...")
+        :return: Boolean indicating whether the detached interfaces were deleted, False while some are still
+                 attached to a service that releases them asynchronously
+        """
+        if not self._vpc:
+            return True
 
-                    # Terminate instances
-                    self._ec2.instances.filter(InstanceIds=instance_ids).terminate()
+        try:
+            interfaces = [interface
+                          for page in self._client.get_paginator('describe_network_interfaces').paginate(
+                              Filters=[{'Name': 'vpc-id', 'Values': [self._vpc.id]}])
+                          for interface in page['NetworkInterfaces']]
+            detached = [interface['NetworkInterfaceId'] for interface in interfaces
+                        if interface['Status'] == 'available']
+            with ThreadPoolExecutor(max_workers=config.MAX_WORKERS) as pool:
+                deleted = all(pool.map(self._delete_network_interface, detached))
+
+            # Interfaces of terminated instances go away with them, those managed by a service (ELB, Lambda) are
+            # released by the service some time after the load balancer or function is deleted
+            attached = [f"{interface['NetworkInterfaceId']} ({interface.get('Description')})"
+                        for interface in interfaces
+                        if interface['Status'] != 'available' and interface.get('RequesterManaged')]
+            if attached:
+                self._logger.info(f"Network interfaces still attached in VPC ID: {self._vpc.id}: {attached}")
+                return False
+            return deleted
+        except Exception as e:
+            self._logger.error(f"Error deleting the network interfaces of VPC ID: {self._vpc.id}: {e}")
+            return False
 
-                    # Wait for instances to terminate using the waiter
-                    try:
-                        self._logger.info(f"Waiting for instances {instance_ids} to terminate...")
-                        instance_waiter.wait(InstanceIds=instance_ids,
-                                             WaiterConfig={'Delay': delay, 'MaxAttempts': max_attempts})
-                        self._logger.info(f"All instances in Subnet ID: {subnet.id} terminated.")
-                    except WaiterError as e:
-                        self._logger.error(f"Error waiting for instances to terminate in Subnet ID: {subnet.id}: {e}")
-                        continue
+    def _delete_network_interface(self, network_interface_id: str) -> bool:
+        try:
+            self._client.delete_network_interface(NetworkInterfaceId=network_interface_id)
+            self._logger.info(f"Network interface ID: {network_interface_id} deleted.")
+            return True
+        except Exception as e:
+            self._logger.error(f"Error deleting network interface {network_interface_id}: {e}")
+            return False
 
-                # After ensuring instances are terminated, delete the subnet
-                subnet.delete()
-                self._logger.info(f"Subnet ID: {subnet.id} deleted.")
+    @traced()
+    def delete_subnet(self, subnet) -> bool:
+        """
+        Deletes a single subnet, whose instances and network interfaces are already gone.
 
-            # Clear subnets list
-            self._subnets = []
+        :param subnet: The subnet object to delete
+        :return: Boolean indicating whether the subnet was deleted
+        """
+        try:
+            self._client.delete_subnet(SubnetId=subnet.id)
+            self._subnets.remove(subnet)
+            self._logger.info(f"Subnet ID: {subnet.id} deleted.")
             return True
-
         except Exception as e:
-            self._logger.error(f"Error deleting subnets: {e}")
+            self._logger.error(f"Error deleting subnet {subnet.id}: {e}")
             return False
 
+    @traced()
     def delete_subnets(self):
         """
         Deletes all subnets_ids associated with the VPC.
@@ -238,18 +472,21 @@ class VPCManager(VpcInterface):
         except Exception as e:
             self._logger.error(f"Error deleting Subnets: {e}")
 
+    @traced()
     def delete_internet_gateway(self) -> bool:
         """
         Detaches and deletes the Internet Gateway.
         """
         try:
             if self._internet_gateway:
+                # Deleted through the client, the gateway, route table and security group go concurrently
                 try:
-                    self._vpc.detach_internet_gateway(InternetGatewayId=self._internet_gateway.id)
+                    self._client.detach_internet_gateway(InternetGatewayId=self._internet_gateway.id,
+                                                         VpcId=self._vpc.id)
                 except Exception as e:
                     self._logger.error(f"Error detaching Internet Gateway: {e}")
 
-                self._internet_gateway.delete()
+                self._client.delete_internet_gateway(InternetGatewayId=self._internet_gateway.id)
                 self._logger.info(f"Internet Gateway ID: {self._internet_gateway.id} detached and deleted")
                 self._internet_gateway = None
         except Exception as e:
@@ -258,6 +495,85 @@ class VPCManager(VpcInterface):
 
         return True
 
+    @traced()
+    def create_gateway_endpoints(self, endpoint_policies: dict[str, str]) -> list[str]:
+        """
+        Creates a gateway VPC endpoint per service on the route table, so the traffic of the instances to the
+        service stays on the AWS network instead of leaving through the Internet Gateway.
+        An endpoint of the service already in the VPC, e.g. left by a run whose state was lost, gets the policy.
+
+        :param endpoint_policies: Endpoint policy document (JSON) per service, e.g. {'s3': ..., 'dynamodb': ...}
+        :return: The IDs of the endpoints
+        """
+        region = self._client.meta.region_name
+        existing = {endpoint['ServiceName']: endpoint for endpoint in self._describe_gateway_endpoints()}
+        self._vpc_endpoint_ids = []
+        for service, policy in endpoint_policies.items():
+            service_name = f"com.amazonaws.{region}.{service}"
+            if service_name in existing:
+                endpoint_id = existing[service_name]['VpcEndpointId']
+                route_table_params = ({} if self._route_table.id in existing[service_name].get('RouteTableIds', [])
+                                      else {'AddRouteTableIds': [self._route_table.id]})
+                self._client.modify_vpc_endpoint(VpcEndpointId=endpoint_id, PolicyDocument=policy,
+                                                 **route_table_params)
+            else:
+                response = self._client.create_vpc_endpoint(
+                    VpcEndpointType='Gateway',
+                    VpcId=self._vpc.id,
+                    ServiceName=service_name,
+                    RouteTableIds=[self._route_table.id],
+                    PolicyDocument=policy,
+                    TagSpecifications=tag_specifications('vpc-endpoint',
+                                                         vpc_config.GATEWAY_ENDPOINT_NAME.format(service=service)))
+                endpoint_id = response['VpcEndpoint']['VpcEndpointId']
+            self._vpc_endpoint_ids.append(endpoint_id)
+            self._logger.info(f"Gateway endpoint for {service_name} ready with ID: {endpoint_id}")
+        return self._vpc_endpoint_ids
+
+    @traced()
+    def load_gateway_endpoints(self, vpc_endpoint_ids: list[str]) -> bool:
+        """
+        Loads the gateway endpoints created by an earlier run.
+
+        :return: Boolean indicating whether all the endpoints still exist
+        """
+        try:
+            response = self._client.describe_vpc_endpoints(VpcEndpointIds=vpc_endpoint_ids)
+        except Exception as e:
+            self._logger.info(f"Gateway endpoints {vpc_endpoint_ids} no longer exist: {e}")
+            return False
+        if any(endpoint['State'].lower() in ('deleting', 'deleted') for endpoint in response['VpcEndpoints']):
+            return False
+
+        self._vpc_endpoint_ids = list(vpc_endpoint_ids)
+        return True
+
+    @traced()
+    def delete_gateway_endpoints(self) -> bool:
+        """
+        Deletes every gateway endpoint of the VPC in one call, including ones this run didn't create or load.
+        """
+        try:
+            endpoint_ids = [endpoint['VpcEndpointId'] for endpoint in self._describe_gateway_endpoints()]
+            if endpoint_ids:
+                self._client.delete_vpc_endpoints(VpcEndpointIds=endpoint_ids)
+                self._logger.info(f"Gateway endpoints {endpoint_ids} deleted")
+            self._vpc_endpoint_ids = []
+            return True
+        except Exception as e:
+            self._logger.error(f"Error deleting gateway endpoints: {e}")
+            return False
+
+    def _describe_gateway_endpoints(self) -> list[dict]:
+        if not self._vpc:
+            return []
+        response = self._client.describe_vpc_endpoints(
+            Filters=[{'Name': 'vpc-id', 'Values': [self._vpc.id]},
+                     {'Name': 'vpc-endpoint-type', 'Values': ['Gateway']}])
+        return [endpoint for endpoint in response['VpcEndpoints']
+                if endpoint['State'].lower() not in ('deleting', 'deleted')]
+
+    @traced()
     def delete_route_table(self) -> bool:
         """
         Deletes the route table and its associations.
@@ -265,12 +581,17 @@ class VPCManager(VpcInterface):
         try:
             if self._route_table:
                 try:
-                    for association in self._route_table.associations:
-                        association.delete()
+                    route_tables = self._client.describe_route_tables(
+                        RouteTableIds=[self._route_table.id])['RouteTables']
+                    for association in (route_tables[0]['Associations'] if route_tables else []):
+                        if association.get('Main'):
+                            continue
+                        self._client.disassociate_route_table(
+                            AssociationId=association['RouteTableAssociationId'])
                 except Exception as e:
                     self._logger.error(f"Error deleting route table associations: {e}")
 
-                self._route_table.delete()
+                self._client.delete_route_table(RouteTableId=self._route_table.id)
                 self._logger.info(f"Route Table ID: {self._route_table.id} deleted")
                 self._route_table = None
             return True
@@ -278,6 +599,7 @@ class VPCManager(VpcInterface):
             self._logger.error(f"Error deleting Route Table: {e}")
             return False
 
+    @traced()
     def delete_vpc(self) -> bool:
         """
         Deletes the VPC.
@@ -292,22 +614,28 @@ class VPCManager(VpcInterface):
             return False
         return True
 
-    def delete_vpc_with_retry(self, max_attempts=3, delay=5) -> bool:
+    @traced()
+    def delete_vpc_with_retry(self, max_attempts=vpc_config.RETRIES) -> bool:
         """
-        Attempts to delete the VPC multiple times with a delay between attempts.
+        Attempts to delete the VPC multiple times, backing off between attempts.
 
         :param max_attempts: Maximum number of attempts
-        :param delay: Delay in seconds between attempts
         :return: Boolean indicating whether the VPC was successfully deleted
         """
-        for attempt in range(max_attempts):
-            try:
-                self.teardown_vpc_resources()
-                return True
-            except Exception as e:
-                self._logger.error(f"Attempt {attempt + 1} failed: {e}")
-                time.sleep(delay)
-        return False
+        try:
+            self._teardown_retry_policy().replace(max_attempts=max_attempts).call(self.teardown_vpc_resources,
+                                                                                 name='delete_vpc')
+            return True
+        except Exception as e:
+            self._logger.error(f"Failed to delete the VPC: {e}")
+            return False
+
+    def _teardown_retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(max_attempts=config.RETRY_MAX_ATTEMPTS,
+                           base_delay=config.RETRY_BASE_DELAY,
+                           max_delay=config.RETRY_MAX_DELAY,
+                           deadline=config.TEARDOWN_STEP_DEADLINE,
+                           logger=self._logger)
 
     def are_resources_fully_deleted(self) -> bool:
         """
@@ -318,14 +646,49 @@ class VPCManager(VpcInterface):
         return not any([self._vpc, self._route_table, self._internet_gateway, self._subnets])
 
     def create_subnets(self, subnets_params):
-        for subnet_p in subnets_params:
-            self.create_subnet(cidr_block=subnet_p['cidr_block'], availability_zone=subnet_p['availability_zone'],
-                               subnet_name=subnet_p['subnet_name'])
+        """
+        Creates the subnets concurrently, associating each one with the route table if it already exists.
+        """
+        graph = DependencyGraph(logger=self._logger)
+        self._add_subnet_steps(graph, subnets_params)
+        self._subnets.extend(self._subnets_in_order(graph.run(), subnets_params))
 
     def associate_subnets_list_with_route_table(self):
+        graph = DependencyGraph(logger=self._logger)
         for subnet in self._subnets:
-            self.associate_subnet_with_route_table(subnet)
+            graph.add_step(f"association:{subnet.id}", functools.partial(self.associate_subnet_with_route_table,
+                                                                          subnet))
+        graph.run()
 
+    def _add_subnet_steps(self, graph: DependencyGraph, subnets_params: list[dict], route_table_step: str = None):
+        """
+        Adds one step per subnet creating it and one associating it with the route table, made by route_table_step
+        or already existing. No subnet waits for another one, whatever their availability zones.
+        """
+        associate = route_table_step is not None or self._route_table is not None
+        for subnet_params in subnets_params:
+            subnet_key = f"subnet:{subnet_params['subnet_name']}"
+            graph.add_step(subnet_key,
+                           functools.partial(self._create_subnet, subnet_params['cidr_block'],
+                                             subnet_params['availability_zone'], subnet_params['subnet_name']),
+                           provides=(subnet_key,))
+            if associate:
+                # A route table made by route_table_step provides its ID, an existing one is read up front
+                graph.add_step(f"association:{subnet_params['subnet_name']}",
+                               functools.partial(self._associate_created_subnet, subnet_key)
+                               if route_table_step else
+                               functools.partial(self._associate_created_subnet, subnet_key,
+                                                 route_table_id=self._route_table.id),
+                               requires=(subnet_key, 'route_table_id') if route_table_step else (subnet_key,))
+
+    def _associate_created_subnet(self, subnet_key: str, route_table_id: str, **outputs):
+        self._associate_subnet(outputs[subnet_key], route_table_id)
+
+    def _subnets_in_order(self, outputs: dict, subnets_params: list[dict]) -> list:
+        return [self._ec2.Subnet(outputs[f"subnet:{subnet_params['subnet_name']}"])
+                for subnet_params in subnets_params]
+
+    @traced()
     def _debug_resources_status(self):
         # security group
 
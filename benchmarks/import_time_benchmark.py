@@ -0,0 +1,81 @@
+"""
+Cold start import-time benchmark.
+
+Imports the entry point in a fresh interpreter with `python -X importtime`, reports the total import time and
+the slowest modules, and fails when the total exceeds the budget or when a module that should only load on
+first use (boto3, botocore, the resource managers) is imported at startup.
+
+Usage (from the repository root):
+    python benchmarks/import_time_benchmark.py
+    python benchmarks/import_time_benchmark.py --module main --budget-ms 80 --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 80
+# Modules that are deferred until a client or manager is created
+DEFERRED_MODULES = ('boto3', 'botocore', 'VPCManager', 'RDSManager', 'LambdaManagerEmployee',
+                    'NetworkResources.AutoScalingManager', 'NetworkResources.LaunchTemplateManager',
+                    'NetworkResources.ImageBakeManager', 'NetworkResources.BuilderInstance',
+                    'AwsDataResources.S3Manager', 'AwsDataResources.DynamodbManager',
+                    'AwsDataResources.BootstrapArtifactManager')
+
+
+def measure(module: str) -> dict[str, tuple[int, int]]:
+    """
+    Imports the module in a fresh interpreter.
+
+    :return: Mapping of every module imported on the way to its (self, cumulative) import time in microseconds
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='main', help='The module to import')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum allowed cumulative import time of the module (median of the runs)')
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh interpreters to measure')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest modules to print')
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [run[args.module][1] / 1000 for run in runs]
+    total = statistics.median(totals)
+
+    print(f"import {args.module}: median {total:.1f}ms (min {min(totals):.1f}ms, max {max(totals):.1f}ms, "
+          f"{args.runs} runs, budget {args.budget_ms:.0f}ms)")
+    for name, (self_us, cumulative_us) in sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"  {name:<48} self {self_us / 1000:6.1f}ms  cumulative {cumulative_us / 1000:6.1f}ms")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import {args.module} took {total:.1f}ms, over the {args.budget_ms:.0f}ms budget")
+    eager = sorted(name for name in runs[-1] if name.split('.')[0] in DEFERRED_MODULES or name in DEFERRED_MODULES)
+    if eager:
+        failures.append(f"modules that should load on first use were imported at startup: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+Offline provisioning benchmark.
+
+Runs AppManager deploy and teardown end-to-end against moto, with an injectable latency added to every
+API call, over scaled synthetic topologies (number of subnets and target groups). Reports wall-clock time,
+API call counts and peak memory per scenario, and optionally fails when a scenario regressed against a
+previously saved baseline.
+
+Usage (from the repository root, requires the packages in requirements-dev.txt):
+    python benchmarks/provisioning_benchmark.py --latency 0.05 --output bench.json
+    python benchmarks/provisioning_benchmark.py --baseline bench.json --max-regression 0.2
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Credentials for moto, and the AWS managed policies the Lambda role attaches
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('MOTO_IAM_LOAD_MANAGED_POLICIES', 'true')
+
+from moto import mock_aws
+
+from AppManager import AppManager
+from NetworkResources.TargetGroupApplicationManager import TargetGroupApplicationManager
+from configuration import config, alb_config, asg_config, ec2_config, vpc_config
+from utils.ApiCallMetrics import api_metrics
+from utils.DependencyGraph import DependencyGraph, deletion_step
+from utils.Logger import Logger
+from utils.SubnetLayout import CidrAllocator
+from utils.Tracer import tracer
+
+# (subnets, target groups)
+DEFAULT_SCENARIOS = [(2, 1), (8, 1), (32, 1), (2, 4), (8, 8)]
+AVAILABILITY_ZONE_SUFFIXES = 'abcdef'
+
+
+class BenchmarkAppManager(AppManager):
+    """
+    AppManager with additional target groups, registered with the ASG, to scale the width of the graph.
+    The ASG step itself is the real one, the additional target groups are attached once the group exists.
+    """
+
+    def __init__(self, logger, extra_target_groups: int):
+        super().__init__(logger)
+        self._extra_target_groups = [
+            TargetGroupApplicationManager(client=self.clients.client('elbv2'), name=f"{alb_config.TARGET_GROUP_NAME}-{i}",
+                                          logger=logger)
+            for i in range(extra_target_groups)]
+
+    def _build_deploy_graph(self) -> DependencyGraph:
+        graph = super()._build_deploy_graph()
+        for i, tg in enumerate(self._extra_target_groups):
+            graph.add_step(f"target_group_{i}", functools.partial(self._create_extra_target_group, tg),
+                           requires=('vpc_id',), provides=(f"target_group_arn_{i}",))
+        if self._extra_target_groups:
+            graph.add_step('extra_target_groups_attached', self._attach_extra_target_groups,
+                           after=('auto_scaling_group',) + tuple(f"target_group_{i}"
+                                                                 for i in range(len(self._extra_target_groups))))
+        return graph
+
+    def _build_teardown_graph(self) -> DependencyGraph:
+        graph = super()._build_teardown_graph()
+        for i, tg in enumerate(self._extra_target_groups):
+            graph.add_step(f"target_group_{i}", deletion_step(tg.delete_target_group), after=('auto_scaling_group',))
+        return graph
+
+    @staticmethod
+    def _create_extra_target_group(tg, vpc_id: str) -> str:
+        tg.create_target_group(vpc_id=vpc_id, target_group_params=alb_config.TG_PARAMS)
+        return tg.target_group_arn
+
+    def _attach_extra_target_groups(self):
+        self.clients.client('autoscaling').attach_load_balancer_target_groups(
+            AutoScalingGroupName=asg_config.AUTO_SCALING_GROUP_NAME,
+            TargetGroupARNs=[tg.target_group_arn for tg in self._extra_target_groups])
+
+
+def synthetic_subnets(count: int) -> list[dict]:
+    allocator = CidrAllocator(vpc_config.CIDR_BLOCK, vpc_config.SUBNET_PREFIX_LENGTH)
+    return [{"subnet_name": f"PublicSubnet{i}",
+             "cidr_block": allocator.allocate(),
+             "availability_zone": config.REGION + AVAILABILITY_ZONE_SUFFIXES[i % len(AVAILABILITY_ZONE_SUFFIXES)]}
+            for i in range(count)]
+
+
+def inject_latency(client, latency: float):
+    """
+    Adds a fixed delay to every API call of the client.
+    """
+    def delay(**kwargs):
+        time.sleep(latency)
+
+    client.meta.events.register('before-call', delay, unique_id='benchmark-latency')
+
+
+def deploy_and_teardown(target_groups: int, latency: float, logger) -> tuple[float, float]:
+    with mock_aws(config={'lambda': {'use_docker': False}}):
+        app_manager = BenchmarkAppManager(logger, extra_target_groups=target_groups - 1)
+        app_manager.clients.add_create_hook(functools.partial(inject_latency, latency=latency))
+
+        start = time.perf_counter()
+        app_manager.initialize_vpc_and_aws_resources()
+        deploy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        app_manager.clean_resources()
+        teardown_time = time.perf_counter() - start
+
+    return deploy_time, teardown_time
+
+
+def run_scenario(subnets: int, target_groups: int, latency: float, measure_memory: bool, verbose: bool) -> dict:
+    vpc_config.VPC_LAUNCH_PARAMS['subnets_params'] = synthetic_subnets(subnets)
+    logger = Logger(output_function=print if verbose else lambda msg: None)
+
+    tracer.clear()
+    api_metrics.clear()
+    deploy_time, teardown_time = deploy_and_teardown(target_groups, latency, logger)
+    summary = tracer.summary()
+    row = {'scenario': f"{subnets}-subnets-{target_groups}-target-groups",
+           'subnets': subnets,
+           'target_groups': target_groups,
+           'latency': latency,
+           'deploy_time': deploy_time,
+           'deploy_critical_path_time': summary['deploy']['critical_path_time'],
+           'deploy_api_calls': sum(row['calls'] for row in api_metrics.summary('deploy')),
+           'teardown_time': teardown_time,
+           'teardown_api_calls': sum(row['calls'] for row in api_metrics.summary('teardown')),
+           'peak_memory_mb': None}
+
+    # tracemalloc slows every allocation down, so memory is measured in a separate run
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            deploy_and_teardown(target_groups, latency, logger)
+            row['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return row
+
+
+def compare(results: list[dict], baseline: list[dict], max_regression: float) -> list[str]:
+    """
+    :return: A description of every metric that grew by more than max_regression relative to the baseline
+    """
+    baseline = {row['scenario']: row for row in baseline}
+    regressions = []
+    for row in results:
+        previous = baseline.get(row['scenario'])
+        if not previous:
+            continue
+        for metric in ('deploy_time', 'teardown_time', 'deploy_api_calls', 'teardown_api_calls'):
+            if previous[metric] and row[metric] > previous[metric] * (1 + max_regression):
+                regressions.append(f"{row['scenario']}: {metric} {previous[metric]:.2f} -> {row[metric]:.2f}")
+    return regressions
+
+
+def parse_scenario(value: str) -> tuple[int, int]:
+    subnets, _, target_groups = value.partition('x')
+    return int(subnets), int(target_groups or 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds added to every API call')
+    parser.add_argument('--scenario', type=parse_scenario, action='append',
+                        help='SUBNETSxTARGET_GROUPS, e.g. 8x2 (repeatable, defaults to a built-in set)')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', help='Results of a previous run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed relative growth of any metric compared to the baseline')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the (slower) peak memory measurement')
+    parser.add_argument('--verbose', action='store_true', help='Print the managers logs')
+    args = parser.parse_args()
+
+    config.TRACE_DIRECTORY = None
+    config.STATE_FILE = None
+    # moto doesn't run user data, a golden image or bootstrap artifact builder would never finish
+    ec2_config.BAKE_IMAGE = False
+    ec2_config.CACHE_BOOTSTRAP_ARTIFACT = False
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    # Scratch directory for the key pair file the launch template step writes
+    os.chdir(tempfile.mkdtemp(prefix='provisioning-benchmark-'))
+
+    results = []
+    for subnets, target_groups in args.scenario or DEFAULT_SCENARIOS:
+        row = run_scenario(subnets, target_groups, args.latency, not args.no_memory, args.verbose)
+        results.append(row)
+        print(f"{row['scenario']:<32} deploy {row['deploy_time']:6.2f}s "
+              f"(critical path {row['deploy_critical_path_time']:6.2f}s, {row['deploy_api_calls']:4d} calls)  "
+              f"teardown {row['teardown_time']:6.2f}s ({row['teardown_api_calls']:4d} calls)"
+              + (f"  peak memory {row['peak_memory_mb']:6.1f}MB" if row['peak_memory_mb'] is not None else ''))
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+from utils.Logger import Logger
+from BootTelemetry import BootTelemetryCollector
+from utils.ClientRegistry import ClientRegistry
+from utils.Inventory import Inventory
+from configuration import asg_config
+
+
+if __name__ == '__main__':
+    logger = Logger()
+    clients = ClientRegistry()
+    try:
+        bucket = Inventory(clients, logger).find('s3', 'bucket')
+        if bucket is None:
+            raise Exception("The stack bucket was not found, is the stack deployed?")
+
+        collector = BootTelemetryCollector(clients=clients, bucket_name=bucket.id, logger=logger,
+                                           group_name=asg_config.AUTO_SCALING_GROUP_NAME)
+        records = collector.collect()
+        summary = collector.summarize(records)
+
+        print(f"Boot phases of {len(records)} instance(s) of {asg_config.AUTO_SCALING_GROUP_NAME} (seconds)\n")
+        print(f"{'phase':<24}{'instances':>10}{'p50':>10}{'p95':>10}")
+        for phase, row in summary.items():
+            print(f"{phase:<24}{row['count']:>10}{row['p50']:>10.1f}{row['p95']:>10.1f}")
+    except Exception as e:
+        logger.error(e)
@@ -1,7 +1,3 @@
-from configuration.config import REGION
-
-AVAILABILITY_ZONES = [REGION + 'a', REGION + 'b']
-
 NAME = "Web-Application-ALB"
 TARGET_GROUP_NAME = 'app-target-group'
 SCHEME = 'internet-facing'
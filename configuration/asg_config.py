@@ -1,7 +1,4 @@
-from configuration.config import REGION
-
 AUTO_SCALING_GROUP_NAME = "employee-auto-scaling"
-AVAILABILITY_ZONES = [REGION + 'a', REGION + 'b']
 
 MIN_SIZE = 2
 MAX_SIZE = 4
@@ -13,11 +10,72 @@ CREATE_ASG_PARAMS = {
     "MinSize": MIN_SIZE,
     "MaxSize": MAX_SIZE,
     "DesiredCapacity": DESIRED_CAPACITY,
-    "AvailabilityZones": AVAILABILITY_ZONES,
     "HealthCheckType": HEALTH_CHECK_TYPE,
     "HealthCheckGracePeriod": HEALTH_CHECK_GRACE_PERIOD
 }
 
+# Mixed instances policy: several instance types, an on-demand base and Spot capacity above it
+ENABLE_MIXED_INSTANCES = False
+# With weights, MIN_SIZE, MAX_SIZE and DESIRED_CAPACITY count capacity units instead of instances.
+# The launch template type should be one of them, the types are tried in this order for on-demand capacity
+INSTANCE_TYPE_OVERRIDES = [
+    {'InstanceType': 't2.micro', 'WeightedCapacity': '1'},
+    {'InstanceType': 't3.micro', 'WeightedCapacity': '1'},
+    {'InstanceType': 't3a.micro', 'WeightedCapacity': '1'},
+    {'InstanceType': 't3.small', 'WeightedCapacity': '2'},
+    {'InstanceType': 't3a.small', 'WeightedCapacity': '2'},
+]
+INSTANCES_DISTRIBUTION = {
+    'OnDemandAllocationStrategy': 'prioritized',
+    'OnDemandBaseCapacity': 1,  # Capacity units always on-demand
+    'OnDemandPercentageAboveBaseCapacity': 25,  # The other 75% above the base is Spot
+    'SpotAllocationStrategy': 'capacity-optimized',  # Spot from the pools least likely to be interrupted
+}
+CAPACITY_REBALANCE = True  # Replace Spot instances at elevated risk of interruption before they are interrupted
+
+# Warm pool of pre-initialized instances, a scale-out starts one of them instead of booting and bootstrapping a new one
+# Off by default: instances complete the launch lifecycle hook with the EmployeeWebApp instance profile, which needs
+# autoscaling:CompleteLifecycleAction, or every launch waits LAUNCH_LIFECYCLE_HOOK_TIMEOUT before going in service
+ENABLE_WARM_POOL = False  # Not supported by AWS together with a mixed instances policy, ignored when that is enabled
+WARM_POOL_PARAMS = {
+    'MinSize': 1,  # Instances kept in the pool at least
+    'MaxGroupPreparedCapacity': MAX_SIZE,  # Group and pool together, the pool fills the gap to the desired capacity
+    'PoolState': 'Stopped',  # Stopped, Hibernated (needs hibernation enabled in the launch template) or Running
+    'InstanceReusePolicy': {'ReuseOnScaleIn': True},  # Scaled-in instances return to the pool instead of terminating
+}
+# Holds a launching instance until its user data reports the app listening, so a pool instance is only stopped
+# once it is fully bootstrapped
+LAUNCH_LIFECYCLE_HOOK_NAME = 'app-bootstrapped'
+LAUNCH_LIFECYCLE_HOOK_TIMEOUT = 900  # Seconds before an instance that didn't report goes on anyway
+LAUNCH_LIFECYCLE_HOOK = {
+    'LifecycleHookName': LAUNCH_LIFECYCLE_HOOK_NAME,
+    'LifecycleTransition': 'autoscaling:EC2_INSTANCE_LAUNCHING',
+    'HeartbeatTimeout': LAUNCH_LIFECYCLE_HOOK_TIMEOUT,
+    'DefaultResult': 'CONTINUE',
+}
+
+
+def warm_pool_enabled() -> bool:
+    return ENABLE_WARM_POOL and not ENABLE_MIXED_INSTANCES
+
+
+def mixed_instances_policy() -> dict | None:
+    """
+    :return: The overrides and distribution of the mixed instances policy, None if it isn't enabled
+    """
+    if not ENABLE_MIXED_INSTANCES:
+        return None
+    return {'Overrides': INSTANCE_TYPE_OVERRIDES, 'InstancesDistribution': INSTANCES_DISTRIBUTION}
+
+
+# Instance refresh, rolling the instances over to a new launch template version
+INSTANCE_REFRESH_PREFERENCES = {
+    'MinHealthyPercentage': 100,  # Replacements launch before old instances terminate, so capacity never dips
+    'MaxHealthyPercentage': 200,  # Up to a full second set of instances while the new ones warm up
+    'InstanceWarmup': 300,  # Seconds a new instance gets before it counts as healthy (defaults to the grace period)
+    'SkipMatching': True,  # Instances already on the new version are kept
+}
+
 POLICY_NAME = "your_policy_name"
 POLICY_TYPE = "TargetTrackingScaling"
 PREDEFINED_METRIC_TYPE = "ASGAverageCPUUtilization"
@@ -37,6 +95,98 @@ ASG_POLICY_PARAMS = {
     'Cooldown': COOLDOWN
 }
 
+# Further target tracking policies next to the CPU one. The group scales out when any policy asks for it and
+# scales in only when all of them allow it, so the app scales on load that doesn't show up as CPU
+ENABLE_REQUEST_COUNT_POLICY = True
+REQUEST_COUNT_POLICY_NAME = "alb-request-count-per-target"
+REQUEST_COUNT_TARGET = 1000.0  # Requests per instance per minute, through the ALB
+ENABLE_RESPONSE_TIME_POLICY = True
+RESPONSE_TIME_POLICY_NAME = "alb-target-response-time"
+RESPONSE_TIME_TARGET = 0.5  # Seconds, the average latency of the targets to keep below (the SLO)
+
+# Predictive scaling: forecasts the load from up to 14 days of history and launches capacity ahead of daily ramps.
+# Start in ForecastOnly to compare the forecasts with the actual load, then switch to ForecastAndScale
+ENABLE_PREDICTIVE_SCALING = True
+PREDICTIVE_POLICY_NAME = "alb-request-count-forecast"
+PREDICTIVE_SCALING_MODE = 'ForecastOnly'  # ForecastOnly or ForecastAndScale
+PREDICTIVE_SCHEDULING_BUFFER_TIME = 600  # Seconds the forecast capacity is launched before it is needed
+PREDICTIVE_MAX_CAPACITY_BREACH = 'HonorMaxCapacity'  # Or IncreaseMaxCapacity to go above MAX_SIZE for a forecast
+PREDICTIVE_TARGET_VALUE = REQUEST_COUNT_TARGET  # Forecast requests per instance per minute to size the group for
+
+# Scheduled actions: fixed capacity changes for known business hours. Recurrence is a cron expression in
+# SCHEDULE_TIME_ZONE. A deploy sets the sizes of CREATE_ASG_PARAMS again until the next action runs
+ENABLE_SCHEDULED_ACTIONS = True
+SCHEDULE_TIME_ZONE = 'Etc/UTC'
+SCHEDULED_ACTIONS = [
+    {'ScheduledActionName': 'business-hours-scale-up', 'Recurrence': '30 6 * * MON-FRI',
+     'MinSize': MIN_SIZE, 'MaxSize': MAX_SIZE, 'DesiredCapacity': 3},
+    {'ScheduledActionName': 'off-hours-scale-down', 'Recurrence': '0 20 * * *',
+     'MinSize': 1, 'MaxSize': MAX_SIZE, 'DesiredCapacity': 1},
+]
+
+
+def scaling_policies(load_balancer_arn_suffix: str, target_group_arn_suffix: str) -> dict[str, dict]:
+    """
+    :param load_balancer_arn_suffix: app/<name>/<id> of the ALB in front of the group
+    :param target_group_arn_suffix: targetgroup/<name>/<id> of the group's target group
+    :return: The put_scaling_policy parameters of every enabled policy, by policy name
+    """
+    policies = {POLICY_NAME: ASG_POLICY_PARAMS}
+    if ENABLE_REQUEST_COUNT_POLICY:
+        policies[REQUEST_COUNT_POLICY_NAME] = {
+            'PolicyType': 'TargetTrackingScaling',
+            'TargetTrackingConfiguration': {
+                'PredefinedMetricSpecification': {
+                    'PredefinedMetricType': 'ALBRequestCountPerTarget',
+                    'ResourceLabel': f"{load_balancer_arn_suffix}/{target_group_arn_suffix}",
+                },
+                'TargetValue': REQUEST_COUNT_TARGET,
+            },
+            'EstimatedInstanceWarmup': WARM_UP,
+        }
+    if ENABLE_RESPONSE_TIME_POLICY:
+        policies[RESPONSE_TIME_POLICY_NAME] = {
+            'PolicyType': 'TargetTrackingScaling',
+            'TargetTrackingConfiguration': {
+                'CustomizedMetricSpecification': {
+                    'Namespace': 'AWS/ApplicationELB',
+                    'MetricName': 'TargetResponseTime',
+                    'Dimensions': [{'Name': 'LoadBalancer', 'Value': load_balancer_arn_suffix},
+                                   {'Name': 'TargetGroup', 'Value': target_group_arn_suffix}],
+                    'Statistic': 'Average',
+                    'Unit': 'Seconds',
+                },
+                'TargetValue': RESPONSE_TIME_TARGET,
+            },
+            'EstimatedInstanceWarmup': WARM_UP,
+        }
+    if ENABLE_PREDICTIVE_SCALING:
+        policies[PREDICTIVE_POLICY_NAME] = {
+            'PolicyType': 'PredictiveScaling',
+            'PredictiveScalingConfiguration': {
+                'MetricSpecifications': [{
+                    'TargetValue': PREDICTIVE_TARGET_VALUE,
+                    'PredefinedMetricPairSpecification': {
+                        'PredefinedMetricType': 'ALBRequestCount',
+                        'ResourceLabel': f"{load_balancer_arn_suffix}/{target_group_arn_suffix}",
+                    },
+                }],
+                'Mode': PREDICTIVE_SCALING_MODE,
+                'SchedulingBufferTime': PREDICTIVE_SCHEDULING_BUFFER_TIME,
+                'MaxCapacityBreachBehavior': PREDICTIVE_MAX_CAPACITY_BREACH,
+            },
+        }
+    return policies
+
+
+def scheduled_actions() -> list[dict]:
+    """
+    :return: The scheduled actions of the group, with their time zone (empty if they aren't enabled)
+    """
+    if not ENABLE_SCHEDULED_ACTIONS:
+        return []
+    return [{**action, 'TimeZone': SCHEDULE_TIME_ZONE} for action in SCHEDULED_ACTIONS]
+
 # Security Group
 SG_INBOUND_RULES = 'todo'
 SG_NAME = 'alb-http-traffic'
@@ -1,3 +1,17 @@
 REGION = 'us-east-1'
 ACCOUNT_ID = "533267128375"
+STACK_NAME = 'employee-directory-app'  # Tagged on every created resource, the inventory finds the stack by it
+STACK_TAG_KEY = 'stack'  # Key of the stack tag
 
+MAX_WORKERS = 8  # Number of provisioning steps allowed to run at the same time
+MAX_POOL_CONNECTIONS = 2 * MAX_WORKERS  # HTTPS connections kept per client, shared by the parallel steps
+TCP_KEEPALIVE = True  # Keep idle pooled connections alive between provisioning steps
+RETRY_MAX_ATTEMPTS = 8  # Attempts of an operation failing with a transient error (dependency violation, IAM propagation)
+RETRY_BASE_DELAY = 1  # Seconds before the first retry, doubled on every attempt and randomized (full jitter)
+RETRY_MAX_DELAY = 20  # Upper bound of the delay between two attempts
+TEARDOWN_STEP_DEADLINE = 300  # Seconds a teardown step may spend on retries before it is reported as failed
+API_RETRY_MODE = 'adaptive'  # botocore retry mode of every client, adaptive also rate limits on throttling
+API_MAX_ATTEMPTS = 10  # botocore attempts of a single throttled or failed API call
+
+TRACE_DIRECTORY = 'traces'  # Where the deploy/teardown timelines are written (None to disable)
+STATE_FILE = 'deployment-state.json'  # IDs of the deployed resources, reused by the next run (None to disable)
@@ -1,4 +1,5 @@
 from configuration.config import REGION
+from configuration import asg_config
 
 LAUNCH_TEMPLATE_NAME = "app-launch-template"
 LAUNCH_TEMPLATE_AMI = 'ami-0182f373e66f89c85'  ## ??  (Double-check the actual AMI ID)
@@ -16,7 +17,8 @@ LAUNCH_TEMPLATE_DATA_PARAMS = {
     'InstanceType': LAUNCH_TEMPLATE_TYPE,
 }
 
-recreate_template = True    # If launch-template already exist
+version_template = True    # If launch-template already exist, publish the changes as a new default version
+recreate_template = False   # If launch-template already exist and isn't versioned, delete and recreate it
 
 # key-pair-configuration
 create_new_key_pair = True  # if not already exist
@@ -26,9 +28,50 @@ delete_key_pair = True
 KEY_PAIR_NAME = 'key-pair'
 
 
-def lunch_template_script_stress(s3_bucket_name: str) -> str:
-    script = f"""#!/bin/bash -ex
+# Golden image
+BAKE_IMAGE = True  # Bake the app and its dependencies into an AMI once, instances launched from it only start the app
+APP_VERSION = '1.0.0'  # Version of the app baked into the image, bump it to bake a new image
+APP_ZIP_URL = 'https://aws-tc-largeobjects.s3-us-west-2.amazonaws.com/ILT-TF-100-TECESS-5/app/app.zip'
+GOLDEN_IMAGE_NAME = 'employee-directory-app'  # Prefix of the baked image names
+BAKE_WAITER_DELAY = 15  # Seconds between checks while the builder instance installs the app
+BAKE_WAITER_MAX_ATTEMPTS = 80  # Checks before the bake is considered failed (20 minutes)
+KEEP_GOLDEN_IMAGE = True  # Keep the image on cleanup, so the next deploy of the same version skips the bake
+
+# Bootstrap artifact (used when BAKE_IMAGE is off)
+CACHE_BOOTSTRAP_ARTIFACT = True  # Package the app with its node_modules once, instances download it from the stack bucket
+BOOTSTRAP_ARTIFACT_PREFIX = 'bootstrap'  # Key prefix of the artifacts in the bucket
+ARTIFACT_BUILDER_NAME = 'employee-directory-app-artifact-builder'  # Name tag of the instance packaging the artifact
+
+# Boot phase telemetry
+BOOT_TELEMETRY = True  # Instances upload the end time of every bootstrap phase to the stack bucket once the app is up
+BOOT_TELEMETRY_PREFIX = 'boot-telemetry'  # Key prefix of the uploaded phase logs, one object per instance
+APP_PORT = 80  # Port the app listens on, polled to tell when it is up
+# The phases in the order they end, 'launch' (the EC2 launch time) and 'boot' (the kernel start) come first
+BOOT_PHASES = ('launch', 'boot', 'user_data_started', 'packages_installed', 'app_downloaded',
+               'dependencies_installed', 'app_listening')
+
+
+BOOT_PHASES_LOG = '/var/log/boot-phases.log'  # Instances record their boot phases here
+# Appends the kernel start time to the log, the start of the 'boot' phase
+_LOG_KERNEL_START = 'echo "boot $(( $(date +%s) - $(cut -d. -f1 /proc/uptime) ))" >> $BOOT_PHASES_LOG'
+
+
+def _script_header() -> str:
+    return f"""#!/bin/bash -ex
 
+# Boot phase telemetry: every phase appends its name and end time to the log. The log is emptied first, a golden image
+# carries the one of its builder, and the boot it belongs to is recorded next to it
+BOOT_PHASES_LOG={BOOT_PHASES_LOG}
+boot_phase() {{ echo "$1 $(date +%s.%N)" >> $BOOT_PHASES_LOG; }}
+: > $BOOT_PHASES_LOG
+cat /proc/sys/kernel/random/boot_id > $BOOT_PHASES_LOG.boot-id
+{_LOG_KERNEL_START}
+boot_phase user_data_started
+"""
+
+
+def _install_app_script() -> str:
+    return f"""
 # Update yum
 yum -y update
 
@@ -37,15 +80,27 @@ yum -y install nodejs
 
 #Install stress tool (for load balancing testing)
 yum -y install stress
+boot_phase packages_installed
 
 # Create a dedicated directory for the application
 mkdir -p /var/app
 
 # Get the app from Amazon S3
-wget https://aws-tc-largeobjects.s3-us-west-2.amazonaws.com/ILT-TF-100-TECESS-5/app/app.zip
+wget {APP_ZIP_URL}
 
 # Extract it into a desired folder
 unzip app.zip -d /var/app/
+boot_phase app_downloaded
+cd /var/app/
+
+# Install dependencies
+npm install
+boot_phase dependencies_installed
+"""
+
+
+def _start_app_script(s3_bucket_name: str) -> str:
+    return f"""
 cd /var/app/
 
 # Configure S3 bucket details
@@ -56,11 +111,174 @@ export DEFAULT_AWS_REGION={REGION}
 
 # Enable admin tools for stress testing
 export SHOW_ADMIN_TOOLS=1
+""" + (_report_boot_phases_script(s3_bucket_name) if BOOT_TELEMETRY else '') + _run_app_script(s3_bucket_name)
 
-# Install dependencies
-npm install
 
+def _report_boot_phases_script(s3_bucket_name: str) -> str:
+    if not asg_config.warm_pool_enabled():
+        return f"""
+# Upload the boot phases once the app is listening, the app itself keeps running
+(
+  until curl -s -o /dev/null http://localhost:{APP_PORT}/; do sleep 1; done
+  boot_phase app_listening
+  TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 60")
+  INSTANCE_ID=$(curl -s -H "X-aws-ec2-metadata-token: $TOKEN" http://169.254.169.254/latest/meta-data/instance-id)
+  aws s3 cp $BOOT_PHASES_LOG s3://{s3_bucket_name}/{BOOT_TELEMETRY_PREFIX}/$INSTANCE_ID.log --region {REGION}
+) &
+"""
+
+    # A start out of the warm pool doesn't run the user data, and EC2 resets the launch time of the instance. The
+    # phases are recorded and uploaded on every boot by a systemd unit, a boot without user data logs the kernel start
+    # and the app listening only, so they are measured from the start out of the pool
+    return f"""
+# Upload the boot phases once the app is listening, on every boot
+cat > /usr/local/bin/report-boot-phases.sh <<'EOF'
+#!/bin/bash
+BOOT_PHASES_LOG={BOOT_PHASES_LOG}
+if [ "$(cat $BOOT_PHASES_LOG.boot-id)" != "$(cat /proc/sys/kernel/random/boot_id)" ]; then
+  : > $BOOT_PHASES_LOG
+  cat /proc/sys/kernel/random/boot_id > $BOOT_PHASES_LOG.boot-id
+  {_LOG_KERNEL_START}
+fi
+until curl -s -o /dev/null http://localhost:{APP_PORT}/; do sleep 1; done
+echo "app_listening $(date +%s.%N)" >> $BOOT_PHASES_LOG
+TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 60")
+INSTANCE_ID=$(curl -s -H "X-aws-ec2-metadata-token: $TOKEN" http://169.254.169.254/latest/meta-data/instance-id)
+aws s3 cp $BOOT_PHASES_LOG s3://{s3_bucket_name}/{BOOT_TELEMETRY_PREFIX}/$INSTANCE_ID.log --region {REGION}
+EOF
+chmod +x /usr/local/bin/report-boot-phases.sh
+cat > /etc/systemd/system/report-boot-phases.service <<EOF
+[Unit]
+Description=Upload the boot phases of the instance
+After=network-online.target
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/bin/report-boot-phases.sh
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+systemctl daemon-reload
+systemctl enable --now --no-block report-boot-phases.service
+"""
+
+
+def _run_app_script(s3_bucket_name: str) -> str:
+    if not asg_config.warm_pool_enabled():
+        return """
 # Start your app
 npm start
 """
-    return script
+
+    # User data only runs on the first boot. An instance started out of the warm pool needs the app to start by
+    # itself, and passes the launch lifecycle hook again, so both are systemd units running on every boot
+    return f"""
+# Start your app as a service, so it starts again when the instance leaves the warm pool
+cat > /etc/systemd/system/employee-directory-app.service <<EOF
+[Unit]
+Description=Employee directory app
+After=network-online.target
+
+[Service]
+WorkingDirectory=/var/app
+Environment=PHOTOS_BUCKET={s3_bucket_name}
+Environment=DEFAULT_AWS_REGION={REGION}
+Environment=SHOW_ADMIN_TOOLS=1
+ExecStart=/usr/bin/npm start
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Release the instance from the launch lifecycle hook once the app is listening, on the first boot before it enters
+# the warm pool and on every start out of it
+cat > /usr/local/bin/complete-launch-hook.sh <<'EOF'
+#!/bin/bash
+until curl -s -o /dev/null http://localhost:{APP_PORT}/; do sleep 1; done
+TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 60")
+INSTANCE_ID=$(curl -s -H "X-aws-ec2-metadata-token: $TOKEN" http://169.254.169.254/latest/meta-data/instance-id)
+aws autoscaling complete-lifecycle-action --lifecycle-action-result CONTINUE \\
+  --lifecycle-hook-name {asg_config.LAUNCH_LIFECYCLE_HOOK_NAME} \\
+  --auto-scaling-group-name {asg_config.AUTO_SCALING_GROUP_NAME} --instance-id $INSTANCE_ID --region {REGION}
+EOF
+chmod +x /usr/local/bin/complete-launch-hook.sh
+cat > /etc/systemd/system/complete-launch-hook.service <<EOF
+[Unit]
+Description=Complete the launch lifecycle hook of the instance
+After=employee-directory-app.service
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/bin/complete-launch-hook.sh
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+systemctl daemon-reload
+systemctl enable --now employee-directory-app.service
+systemctl enable --now --no-block complete-launch-hook.service
+"""
+
+
+def lunch_template_script_stress(s3_bucket_name: str) -> str:
+    """
+    User data installing the app on every boot, for instances launched from the plain base image.
+    """
+    return _script_header() + _install_app_script() + _start_app_script(s3_bucket_name)
+
+
+def image_build_script() -> str:
+    """
+    User data of the builder instance of the golden image: installs the app once and powers the instance off,
+    which tells the bake the image is ready to be taken. A failing step leaves it running and the bake times out.
+    """
+    return _script_header() + _install_app_script() + """
+# Installation complete, stop the builder so the image can be taken
+shutdown -h now
+"""
+
+
+def artifact_build_script(artifact_url: str) -> str:
+    """
+    User data of the builder instance of the bootstrap artifact: installs the app once, uploads it together with its
+    node_modules to the stack bucket and powers the instance off. It runs with the instance profile of the app.
+    """
+    return _script_header() + _install_app_script() + f"""
+# Package the app with its installed dependencies and upload it to the stack bucket
+tar -czf /tmp/app.tar.gz -C /var/app .
+aws s3 cp /tmp/app.tar.gz {artifact_url} --region {REGION}
+
+# Upload complete, stop the builder
+shutdown -h now
+"""
+
+
+def artifact_start_script(s3_bucket_name: str, artifact_url: str) -> str:
+    """
+    User data of the instances launched from the plain base image when the bootstrap artifact is cached: the app and
+    its node_modules come from the in-region stack bucket, so neither the app bucket nor the npm registry is reached.
+    """
+    return _script_header() + f"""
+#Install nodejs
+yum -y install nodejs
+
+#Install stress tool (for load balancing testing)
+yum -y install stress
+boot_phase packages_installed
+
+# Get the app, with its installed dependencies, from the stack bucket
+mkdir -p /var/app
+aws s3 cp {artifact_url} - --region {REGION} | tar -xz -C /var/app
+boot_phase app_downloaded
+""" + _start_app_script(s3_bucket_name)
+
+
+def start_app_script(s3_bucket_name: str) -> str:
+    """
+    User data of the instances launched from the golden image, where the app is already installed.
+    """
+    return _script_header() + _start_app_script(s3_bucket_name)
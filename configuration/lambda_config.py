@@ -11,6 +11,10 @@ RUNTIME = 'python3.9'  # Runtime environment for the Lambda function
 HANDLER = 'lambda_function.lambda_handler'  # Function entry point
 TIMEOUT = 60  # Timeout in seconds for the Lambda function
 MEMORY_SIZE = 128  # Memory size allocated to the Lambda function (MB)
+DEPLOY_DEADLINE = 120  # Seconds the deployment may spend retrying while the role propagates and the function activates
+WAITER_DELAY = 1  # Seconds between two polls of the role and function state waiters
+WAITER_MAX_ATTEMPTS = 60  # Polls of a waiter before it gives up
+ROLE_PROPAGATION_TIMEOUT = 60  # Seconds to wait for Lambda to be able to assume a newly created role
 
 LAMBDA_CLIENT_CREATE_FUNCTION = {
     'Runtime': RUNTIME,
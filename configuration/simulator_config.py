@@ -0,0 +1,28 @@
+from configuration import asg_config
+
+# Model of the group, see ScalingSimulator
+STEP = 60  # Seconds between two samples of the trace, and between two evaluations of the policy
+CAPACITY_PER_INSTANCE = 50.0  # Requests per second one instance serves at 100% CPU
+BOOT_TIME = 240  # Seconds from the launch until the instance serves, the p95 'total' of boot_report.py
+SLO_UTILIZATION = 0.8  # Above this share of the serving capacity the latency misses the SLO
+SCALE_OUT_EVALUATION = 180  # Seconds the metric stays above the target before target tracking scales out
+SCALE_IN_EVALUATION = 900  # Seconds the metric stays below the scale-in threshold before it scales in
+SCALE_IN_THRESHOLD = 0.9  # Share of the target the metric has to fall below to scale in
+
+# Load trace, one request rate (requests per second) per STEP, in the last column of every line of a CSV file
+TRACE_FILE = None  # None for a synthetic business day
+SYNTHETIC_DAYS = 1
+SYNTHETIC_BASE_RATE = 20.0  # Requests per second at night
+SYNTHETIC_PEAK_RATE = 250.0  # Requests per second during business hours
+SYNTHETIC_NOISE = 0.05  # Standard deviation of the multiplicative noise
+SYNTHETIC_SEED = 0
+
+# Parameter sweep, every combination is simulated
+SWEEP = {
+    'target_value': [20.0, 25.0, 30.0, 35.0, 40.0, 45.0, 50.0, 55.0, 60.0, 65.0, 70.0, 75.0, 80.0],
+    'warm_up': [60, 90, 120, 150, 180, 210, 240, 270, 300],
+    'cooldown': [60, 120, 180, 240, 300, 360, 420, 480, 540, 600],
+    'min_size': [1, 2, 3, 4],
+    'max_size': [asg_config.MAX_SIZE, 6, 8],
+}
+TOP_RESULTS = 10  # Combinations printed, fewest SLO violation minutes first, then fewest instance-minutes
@@ -1,4 +1,5 @@
 from configuration.config import REGION
+from configuration.ec2_config import LAUNCH_TEMPLATE_TYPE
 
 # Common Constants
 ANYWHERE_IPV4 = "0.0.0.0/0"  # CIDR block representing "anywhere" for inbound/outbound rules
@@ -14,10 +15,23 @@ IGW_NAME = "Employee-directory-app-igw"  # Name tag for the Internet Gateway
 RT_NAME = "Employee-directory-app-rt"  # Name tag for the Route Table
 
 # Subnets Configuration
-AVAILABILITY_ZONES = [REGION + 'a', REGION + 'b']
-SUBNETS_PARAMS = [
-    {"subnet_name": "PublicSubnetA", "cidr_block": "10.0.0.0/24", "availability_zone": AVAILABILITY_ZONES[0]},
-    {"subnet_name": "PublicSubnetB", "cidr_block": "10.0.1.0/24", "availability_zone": AVAILABILITY_ZONES[1]},
+SUBNET_PREFIX_LENGTH = 24  # Size of the subnets carved from CIDR_BLOCK, one per usable availability zone
+MAX_AVAILABILITY_ZONES = None  # Upper bound of the zones the VPC spreads across, None for every usable zone
+# Explicit subnets, e.g. [{"subnet_name": "PublicSubnetA", "cidr_block": "10.0.0.0/24",
+# "availability_zone": "us-east-1a"}], None to lay them out across the zones discovered in the region
+SUBNETS_PARAMS = None
+
+# Gateway VPC Endpoints Configuration
+# Route the S3 and DynamoDB traffic of the instances through gateway endpoints. Off by default: the endpoint policies
+# deny the instances any other bucket or table of the region, see S3_ENDPOINT_EXTRA_OBJECT_ARNS
+ENABLE_GATEWAY_ENDPOINTS = False
+GATEWAY_ENDPOINT_NAME = "Employee-directory-app-{service}-endpoint"  # Name tag of the endpoint of each service
+# Objects the instances read from other buckets of the region, which the S3 endpoint policy would otherwise block:
+# the Amazon Linux package repositories
+S3_ENDPOINT_EXTRA_OBJECT_ARNS = [
+    f"arn:aws:s3:::amazonlinux.{REGION}.amazonaws.com/*",
+    f"arn:aws:s3:::amazonlinux-2-repos-{REGION}/*",
+    f"arn:aws:s3:::al2023-repos-{REGION}-*/*",
 ]
 
 # Security Group Configuration
@@ -50,8 +64,13 @@ VPC_LAUNCH_PARAMS = {
     'igw_name': IGW_NAME,
     'rt_name': RT_NAME,
     'subnets_params': SUBNETS_PARAMS,
-    'security_group_params': SG_PARAMS
+    'security_group_params': SG_PARAMS,
+    'instance_type': LAUNCH_TEMPLATE_TYPE,  # Zones that don't offer the instance type get no subnet
 }
 
 # Clean Resources
 RETRIES = 3  # Number of times to retry resource cleanup
+TERMINATION_WAITER_DELAY = 5  # Seconds between checks while the instances of the VPC terminate
+TERMINATION_WAITER_MAX_ATTEMPTS = 60  # Checks before the termination is considered failed
+# States of the instances the teardown terminates, every state but terminated
+LIVE_INSTANCE_STATES = ['pending', 'running', 'shutting-down', 'stopping', 'stopped']
@@ -0,0 +1,28 @@
+from utils.Logger import Logger
+from AWSResourceFactory import AWSResourceFactory
+from utils.ClientRegistry import ClientRegistry
+from configuration import asg_config
+
+
+if __name__ == '__main__':
+    logger = Logger()
+    try:
+        if not asg_config.ENABLE_PREDICTIVE_SCALING:
+            raise Exception("Predictive scaling is disabled (asg_config.ENABLE_PREDICTIVE_SCALING).")
+
+        asg = AWSResourceFactory(clients=ClientRegistry(), logger=logger).auto_scaling_manager()
+        if not asg.load_group():
+            raise Exception("The Auto Scaling Group was not found, is the stack deployed?")
+
+        forecast = asg.get_forecast(asg_config.PREDICTIVE_POLICY_NAME)
+        load = forecast['LoadForecast'][0] if forecast['LoadForecast'] else {'Timestamps': [], 'Values': []}
+        load_by_time = dict(zip(load['Timestamps'], load['Values']))
+        capacity = forecast['CapacityForecast']
+
+        print(f"Forecast of {asg_config.PREDICTIVE_POLICY_NAME} ({asg_config.PREDICTIVE_SCALING_MODE}) "
+              f"for {asg_config.AUTO_SCALING_GROUP_NAME}\n")
+        print(f"{'time (UTC)':<20}{'load':>12}{'capacity':>10}")
+        for timestamp, instances in zip(capacity['Timestamps'], capacity['Values']):
+            print(f"{timestamp:%Y-%m-%d %H:%M}{load_by_time.get(timestamp, float('nan')):>16.0f}{instances:>10.0f}")
+    except Exception as e:
+        logger.error(e)
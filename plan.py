@@ -0,0 +1,27 @@
+import time
+
+from utils.Logger import Logger
+from Planner import Planner, PlannedChange
+from utils.ApiCallMetrics import api_metrics
+from utils.ClientRegistry import ClientRegistry
+
+
+if __name__ == '__main__':
+    logger = Logger()
+    clients = ClientRegistry()
+    clients.add_create_hook(api_metrics.attach)
+    planner = Planner(clients=clients, logger=logger)
+    try:
+        start = time.perf_counter()
+        changes = planner.plan()
+        elapsed = time.perf_counter() - start
+
+        for change in changes:
+            print(change)
+        counts = {action: sum(change.action == action for change in changes)
+                  for action in (PlannedChange.CREATE, PlannedChange.UPDATE, PlannedChange.UNCHANGED)}
+        print(f"\nPlan: {counts[PlannedChange.CREATE]} to create, {counts[PlannedChange.UPDATE]} to update, "
+              f"{counts[PlannedChange.UNCHANGED]} unchanged "
+              f"({sum(row['calls'] for row in api_metrics.summary())} API calls in {elapsed:.1f}s)")
+    except Exception as e:
+        logger.error(e)
@@ -0,0 +1,40 @@
+import time
+
+from utils.Logger import Logger
+from ScalingSimulator import ScalingSimulator, load_trace, parameter_grid, synthetic_trace
+from configuration import asg_config, simulator_config
+
+
+COLUMNS = ('target_value', 'warm_up', 'cooldown', 'min_size', 'max_size')
+METRICS = ('slo_violations', 'instance_minutes', 'over_provisioned', 'under_provisioned', 'time_to_capacity_max')
+
+
+def print_row(params: dict, results: dict, index: int):
+    print(''.join(f"{params[name][index]:>14.0f}" for name in COLUMNS)
+          + ''.join(f"{results[name][index]:>22.1f}" for name in METRICS))
+
+
+if __name__ == '__main__':
+    logger = Logger()
+    try:
+        trace = (load_trace(simulator_config.TRACE_FILE) if simulator_config.TRACE_FILE
+                 else synthetic_trace())
+        simulator = ScalingSimulator()
+
+        configured = {name: [getattr(asg_config, name.upper())] for name in COLUMNS}
+        params = parameter_grid(**simulator_config.SWEEP)
+        start = time.perf_counter()
+        results = simulator.simulate(trace, **params)
+        elapsed = time.perf_counter() - start
+        current = simulator.simulate(trace, **parameter_grid(**configured))
+
+        print(f"{len(trace)} steps of {simulator_config.STEP}s, "
+              f"{len(params['target_value'])} combinations simulated in {elapsed:.1f}s\n")
+        print(''.join(f"{name:>14}" for name in COLUMNS) + ''.join(f"{name:>22}" for name in METRICS))
+        print("Configured:")
+        print_row(parameter_grid(**configured), current, 0)
+        print(f"Best {simulator_config.TOP_RESULTS}:")
+        for index in simulator.rank(results)[:simulator_config.TOP_RESULTS]:
+            print_row(params, results, index)
+    except Exception as e:
+        logger.error(e)
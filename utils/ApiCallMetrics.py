@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.RetryPolicy import THROTTLING_ERROR_CODES
+from utils.Tracer import tracer
+
+
+class OperationStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.redundant = 0  # calls repeating an earlier call of the same phase with the same parameters
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def to_dict(self) -> dict:
+        return {'calls': self.calls,
+                'errors': self.errors,
+                'retries': self.retries,
+                'throttles': self.throttles,
+                'redundant': self.redundant,
+                'total_latency': self.total_latency,
+                'average_latency': self.total_latency / self.calls if self.calls else 0.0,
+                'max_latency': self.max_latency}
+
+
+class ApiCallMetrics:
+    def __init__(self):
+        """
+        Counts API calls, latency, retries and throttles per service operation using botocore's event hooks,
+        attributed to the manager (the innermost traced manager operation) and phase that issued them.
+        """
+        self._stats: dict[tuple, OperationStats] = {}
+        self._seen_calls = set()
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        """
+        Registers the accounting hooks on a boto3 client. For a boto3 resource, pass resource.meta.client.
+        """
+        events = client.meta.events
+        events.register('before-call', self._before_call, unique_id='api-call-metrics-before-call')
+        events.register('after-call', self._after_call, unique_id='api-call-metrics-after-call')
+        events.register('after-call-error', self._after_call_error, unique_id='api-call-metrics-after-call-error')
+        events.register('needs-retry', self._needs_retry, unique_id='api-call-metrics-needs-retry')
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._stats = {}
+            self._seen_calls = set()
+
+    def _before_call(self, model, params, context, **kwargs):
+        operation = tracer.current_span(category='operation')
+        key = (tracer.current_phase,
+               operation.name.split('.')[0] if operation else None,
+               model.service_model.service_name,
+               model.name)
+        # params is the serialized request, its body holds the operation parameters
+        request = [params.get('url_path'), params.get('query_string'), params.get('body')]
+        call_hash = hashlib.sha1(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        with self._lock:
+            stats = self._stats.setdefault(key, OperationStats())
+            stats.calls += 1
+            call_key = (key[0], key[2], key[3], call_hash)
+            if call_key in self._seen_calls:
+                stats.redundant += 1
+            self._seen_calls.add(call_key)
+
+        context['api_call_metrics'] = {'key': key, 'start': time.perf_counter(),
+                                       'operation': operation.name if operation else None}
+        # before-call handlers must return None, anything else is used as the response of the call
+
+    def _after_call(self, parsed, context, **kwargs):
+        error_code = parsed.get('Error', {}).get('Code')
+        retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        self._finish_call(context, error_code, retries)
+
+    def _after_call_error(self, exception, context, **kwargs):
+        self._finish_call(context, type(exception).__name__, 0)
+
+    def _finish_call(self, context, error_code, retries):
+        call = context.get('api_call_metrics')
+        if call is None:
+            return
+
+        end = time.perf_counter()
+        latency = end - call['start']
+        with self._lock:
+            stats = self._stats[call['key']]
+            stats.retries += retries
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            if error_code:
+                stats.errors += 1
+
+        _, _, service, operation = call['key']
+        tracer.record(f"{service}.{operation}", category='api', start=call['start'], end=end,
+                      issued_by=call['operation'], error=error_code, retries=retries)
+
+    def _needs_retry(self, response=None, request_dict=None, **kwargs):
+        if not response or not request_dict:
+            return None
+
+        call = request_dict.get('context', {}).get('api_call_metrics')
+        error_code = response[1].get('Error', {}).get('Code')
+        if call is not None and error_code in THROTTLING_ERROR_CODES:
+            with self._lock:
+                self._stats[call['key']].throttles += 1
+        return None
+
+    def summary(self, phase: str = None) -> list[dict]:
+        """
+        :param phase: Only report the calls issued during this phase
+        :return: One row per phase, manager and service operation, the most called first
+        """
+        with self._lock:
+            rows = [{'phase': key[0], 'manager': key[1], 'service': key[2], 'operation': key[3], **stats.to_dict()}
+                    for key, stats in self._stats.items() if phase is None or key[0] == phase]
+
+        return sorted(rows, key=lambda row: row['calls'], reverse=True)
+
+    def log_summary(self, logger, phase: str = None, top: int = 10):
+        rows = self.summary(phase)
+        totals = {name: sum(row[name] for row in rows) for name in ('calls', 'retries', 'throttles', 'redundant')}
+        logger.info(f"API calls{f' during {phase}' if phase else ''}: {totals['calls']} "
+                    f"(retries: {totals['retries']}, throttles: {totals['throttles']}, "
+                    f"redundant: {totals['redundant']})")
+        for row in rows[:top]:
+            logger.info(f"  {row['manager']}: {row['service']}.{row['operation']} x{row['calls']} "
+                        f"avg {row['average_latency'] * 1000:.0f}ms, redundant {row['redundant']}")
+
+    def export_json(self, path: str, phase: str = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(self.summary(phase), file, indent=2)
+
+
+# Shared by all clients, so calls from every manager end up in one report
+api_metrics = ApiCallMetrics()
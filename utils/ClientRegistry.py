@@ -0,0 +1,103 @@
+import threading
+from typing import Callable
+
+from configuration import config
+
+
+class _LazyServiceObject:
+    """
+    Stands in for a boto3 client or resource and creates it on first use, so startup only pays for the
+    services a run actually touches.
+    """
+
+    def __init__(self, factory: Callable):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+
+class ClientRegistry:
+    def __init__(self, region: str = config.REGION, session=None):
+        """
+        Creates and caches every boto3 client and resource from one session, tuned with a connection pool
+        large enough for the parallel provisioning steps and TCP keepalive, so steps share warm HTTPS connections.
+        Throttled calls are retried by botocore's adaptive retry mode, which also slows the client down.
+
+        :param region: Default region of the clients
+        :param session: The boto3 session to create clients from, created on first use if not given
+        """
+        self._region = region
+        self._session = session
+        self._config = None
+        self._clients = {}
+        self._resources = {}
+        self._create_hooks: list[Callable] = []
+        # boto3 sessions are not thread safe, clients may be requested by several steps at once
+        self._lock = threading.RLock()
+
+    def add_create_hook(self, hook: Callable):
+        """
+        :param hook: Called with every low-level client the registry creates, including the clients of resources
+        """
+        with self._lock:
+            self._create_hooks.append(hook)
+            for client in self.created_clients:
+                hook(client)
+
+    @property
+    def created_clients(self) -> list:
+        with self._lock:
+            return [*self._clients.values(), *(resource.meta.client for resource in self._resources.values())]
+
+    def client(self, service: str, region: str = None):
+        """
+        :return: A proxy creating the client on first use
+        """
+        return _LazyServiceObject(lambda: self.get_client(service, region))
+
+    def resource(self, service: str, region: str = None):
+        """
+        :return: A proxy creating the resource on first use
+        """
+        return _LazyServiceObject(lambda: self.get_resource(service, region))
+
+    def get_client(self, service: str, region: str = None):
+        key = (service, region or self._region)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._get_session().client(service, region_name=key[1], config=self._config)
+                    self._run_create_hooks(client)
+                    self._clients[key] = client
+        return client
+
+    def get_resource(self, service: str, region: str = None):
+        key = (service, region or self._region)
+        resource = self._resources.get(key)
+        if resource is None:
+            with self._lock:
+                resource = self._resources.get(key)
+                if resource is None:
+                    resource = self._get_session().resource(service, region_name=key[1], config=self._config)
+                    self._run_create_hooks(resource.meta.client)
+                    self._resources[key] = resource
+        return resource
+
+    def _get_session(self):
+        # boto3 and botocore take a while to import, so they are only loaded once a client is needed
+        if self._config is None:
+            import boto3
+            from botocore.config import Config
+
+            self._session = self._session or boto3.Session(region_name=self._region)
+            self._config = Config(max_pool_connections=config.MAX_POOL_CONNECTIONS,
+                                  tcp_keepalive=config.TCP_KEEPALIVE,
+                                  retries={'mode': config.API_RETRY_MODE, 'max_attempts': config.API_MAX_ATTEMPTS})
+        return self._session
+
+    def _run_create_hooks(self, client):
+        for hook in self._create_hooks:
+            hook(client)
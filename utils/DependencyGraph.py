@@ -0,0 +1,214 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable
+
+from configuration import config
+from utils.RetryPolicy import RetryPolicy, is_gone_error
+from utils.StateStore import StateStore, config_hash
+from utils.Tracer import tracer
+
+
+class Step:
+    def __init__(self, name: str, func: Callable, requires=(), provides=(), after=(), retry_policy: RetryPolicy = None,
+                 config=None, restore: Callable = None):
+        """
+        A single unit of work in a DependencyGraph.
+
+        :param name: Unique name of the step
+        :param func: Callable invoked with the required inputs as keyword arguments
+        :param requires: Names of the inputs the step consumes
+        :param provides: Names of the outputs the step produces. A single output is the return value of func,
+                         several outputs are taken from the dict returned by func
+        :param after: Names of steps that must finish first even though no data flows between them
+        :param retry_policy: Re-runs the step after a retryable failure, without re-running other steps.
+                             Its deadline bounds the time spent on the step across all attempts
+        :param config: The configuration the step creates its resources from, hashed together with the inputs
+                       to tell whether resources recorded in a StateStore are still up to date
+        :param restore: Called with the recorded outputs instead of func when the step's configuration and inputs
+                        are unchanged since it last ran. Loads the resources into their manager and returns
+                        whether they still exist, the step runs again if they don't
+        """
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.provides = tuple(provides)
+        self.after = tuple(after)
+        self.retry_policy = retry_policy
+        self.config = config
+        self.restore = restore
+
+    def execute(self, **inputs) -> dict:
+        result = self.func(**inputs)
+        if not self.provides:
+            return {}
+        if len(self.provides) == 1:
+            return {self.provides[0]: result}
+        return {key: result[key] for key in self.provides}
+
+
+class DependencyGraph:
+    def __init__(self, logger, max_workers: int = config.MAX_WORKERS):
+        """
+        Runs steps on a worker pool as soon as the steps they depend on are finished.
+
+        :param logger: Logger instance for logging operations
+        :param max_workers: Maximum number of steps running at the same time
+        """
+        self._logger = logger
+        self._max_workers = max_workers
+        self._steps: dict[str, Step] = {}
+
+    def add_step(self, name: str, func: Callable, requires=(), provides=(), after=(),
+                 retry_policy: RetryPolicy = None, config=None, restore: Callable = None) -> Step:
+        if name in self._steps:
+            raise ValueError(f"Step '{name}' already exists in the graph.")
+
+        step = Step(name=name, func=func, requires=requires, provides=provides, after=after,
+                    retry_policy=retry_policy, config=config, restore=restore)
+        self._steps[name] = step
+        return step
+
+    @property
+    def steps(self) -> dict[str, Step]:
+        return self._steps
+
+    def dependencies(self, context: dict = None) -> dict[str, set[str]]:
+        """
+        Resolves, for every step, the names of the steps it has to wait for.
+
+        :param context: Inputs that are available before any step runs
+        :return: Mapping of step name to the names of the steps it depends on
+        """
+        context = context or {}
+        providers = {}
+        for step in self._steps.values():
+            for output in step.provides:
+                if output in providers:
+                    raise ValueError(f"Output '{output}' is provided by both '{providers[output]}' and '{step.name}'.")
+                providers[output] = step.name
+
+        dependencies = {}
+        for step in self._steps.values():
+            step_dependencies = set()
+            for required in step.requires:
+                if required in providers:
+                    step_dependencies.add(providers[required])
+                elif required not in context:
+                    raise ValueError(f"Step '{step.name}' requires '{required}' which no step provides.")
+            for name in step.after:
+                if name not in self._steps:
+                    raise ValueError(f"Step '{step.name}' runs after unknown step '{name}'.")
+                step_dependencies.add(name)
+            dependencies[step.name] = step_dependencies
+
+        self._check_acyclic(dependencies)
+        return dependencies
+
+    @staticmethod
+    def _check_acyclic(dependencies: dict[str, set[str]]):
+        resolved = set()
+        pending = dict(dependencies)
+        while pending:
+            ready = [name for name, deps in pending.items() if deps <= resolved]
+            if not ready:
+                raise ValueError(f"Dependency cycle between steps: {sorted(pending)}")
+            for name in ready:
+                resolved.add(name)
+                del pending[name]
+
+    def run(self, context: dict = None, keep_going=False, state: StateStore = None) -> dict:
+        """
+        Executes all steps, running independent steps concurrently.
+        When a step fails, by default no new steps are started, the running ones are allowed to finish and the
+        first error is re-raised. With keep_going, only the steps depending on the failed one are skipped and
+        the first error is re-raised once every other step has run.
+
+        :param context: Inputs that are available before any step runs
+        :param keep_going: Whether to keep running the steps that don't depend on a failed step
+        :param state: Records the outputs of the steps that can be restored, and restores the unchanged ones
+                      instead of running them
+        :return: The context extended with the outputs of every step
+        """
+        context = dict(context or {})
+        dependencies = self.dependencies(context)
+        done = set()
+        skipped = set()
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            while True:
+                if error is None or keep_going:
+                    for name, step in self._steps.items():
+                        if name in done or name in skipped or name in running.values():
+                            continue
+                        if dependencies[name] & skipped:
+                            self._logger.error(f"Skipping step '{name}', a step it depends on failed")
+                            skipped.add(name)
+                            continue
+                        if not dependencies[name] <= done:
+                            continue
+                        inputs = {key: context[key] for key in step.requires}
+                        self._logger.debug(f"Starting step '{name}'")
+                        running[pool.submit(self._execute, step, inputs, dependencies[name], state)] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        context.update(future.result())
+                        done.add(name)
+                        self._logger.debug(f"Step '{name}' finished")
+                    except Exception as e:
+                        self._logger.error(f"Step '{name}' failed: {e}")
+                        skipped.add(name)
+                        error = error or e
+
+        if error is not None:
+            raise error
+
+        return context
+
+    def _execute(self, step: Step, inputs: dict, dependencies: set[str], state: StateStore = None) -> dict:
+        with tracer.span(step.name, category='step', dependencies=sorted(dependencies)) as span:
+            if state is None or step.restore is None:
+                return self._execute_with_retries(step, inputs)
+
+            step_config_hash = config_hash(step.config, inputs)
+            recorded = state.get(step.name)
+            if recorded and recorded['config_hash'] == step_config_hash and step.restore(**recorded['outputs']):
+                self._logger.info(f"Step '{step.name}' is unchanged, reusing its resources")
+                span.args['restored'] = True
+                return recorded['outputs']
+
+            outputs = self._execute_with_retries(step, inputs)
+            state.record(step.name, step_config_hash, outputs)
+            return outputs
+
+    @staticmethod
+    def _execute_with_retries(step: Step, inputs: dict) -> dict:
+        if step.retry_policy is None:
+            return step.execute(**inputs)
+        return step.retry_policy.call(functools.partial(step.execute, **inputs), name=step.name)
+
+
+def deletion_step(func: Callable) -> Callable:
+    """
+    Wraps a deletion function that reports failures by returning False instead of raising,
+    since a graph step has to raise in order to be retried. A resource that doesn't exist counts as deleted.
+    """
+    @functools.wraps(func)
+    def step(*args, **kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_gone_error(e):
+                return
+            raise
+        if result is False:
+            raise Exception("Deletion did not complete, see the errors logged above")
+
+    return step
@@ -0,0 +1,147 @@
+import threading
+
+from configuration import config
+
+
+def stack_tags(name: str = None) -> list[dict]:
+    """
+    The tags every resource of the stack is created with, so the whole stack can be found with one tag query.
+
+    :param name: Value of the Name tag, if the resource gets one
+    :return: The tags in the Key/Value list form most AWS APIs take
+    """
+    tags = [{'Key': config.STACK_TAG_KEY, 'Value': config.STACK_NAME}]
+    if name:
+        tags.append({'Key': 'Name', 'Value': name})
+    return tags
+
+
+def tag_specifications(resource_type: str, name: str = None) -> list[dict]:
+    """
+    :param resource_type: The EC2 resource type the create call makes, e.g. vpc, subnet, security-group
+    :param name: Value of the Name tag, if the resource gets one
+    :return: The stack tags in the TagSpecifications form, so EC2 tags the resource in the create call itself
+    """
+    return [{'ResourceType': resource_type, 'Tags': stack_tags(name)}]
+
+
+class InventoryEntry:
+    def __init__(self, arn: str, service: str, resource_type: str, resource_id: str, tags: dict[str, str]):
+        """
+        :param arn: The ARN of the resource
+        :param service: The service of the ARN, e.g. ec2
+        :param resource_type: The resource type of the ARN, e.g. vpc, loadbalancer, function
+        :param resource_id: The ID the describe APIs take, e.g. vpc-0a1b (the ARN for Elastic Load Balancing)
+        :param tags: The tags of the resource
+        """
+        self.arn = arn
+        self.service = service
+        self.resource_type = resource_type
+        self.id = resource_id
+        self.tags = tags
+
+    @property
+    def name(self) -> str | None:
+        return self.tags.get('Name')
+
+    @classmethod
+    def from_arn(cls, arn: str, tags: dict[str, str]) -> 'InventoryEntry':
+        # arn:partition:service:region:account:resource, where resource is type/id, type:id or, for S3, the bucket
+        _, _, service, _, _, resource = arn.split(':', 5)
+        if service == 's3':
+            return cls(arn, service, 'bucket', resource, tags)
+
+        separator = '/' if '/' in resource else ':'
+        resource_type, _, resource_id = resource.partition(separator)
+        if service == 'elasticloadbalancing':
+            # ELBv2 APIs identify load balancers, target groups and listeners by ARN
+            resource_id = arn
+        elif service == 'autoscaling':
+            resource_type, resource_id = 'autoScalingGroup', resource.rsplit('autoScalingGroupName/', 1)[-1]
+        return cls(arn, service, resource_type, resource_id, tags)
+
+
+class Inventory:
+    def __init__(self, clients, logger, stack_name: str = config.STACK_NAME):
+        """
+        In-memory index of every resource carrying the stack tag, built from one paginated query of the
+        Resource Groups Tagging API plus one tag-filtered Auto Scaling query, which that API doesn't cover.
+        Managers look their resources up here instead of describing them by name one call at a time.
+        The index is built on the first lookup and can be rebuilt with refresh.
+
+        :param clients: The registry the AWS clients are taken from
+        :param logger: Logger instance for logging operations
+        :param stack_name: Value of the stack tag to index
+        """
+        self._tagging_client = clients.client('resourcegroupstaggingapi')
+        self._auto_scaling_client = clients.client('autoscaling')
+        self._logger = logger
+        self._stack_name = stack_name
+        self._entries: list[InventoryEntry] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self) -> list[InventoryEntry]:
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._query()
+            return self._entries
+
+    def refresh(self):
+        with self._lock:
+            self._entries = self._query()
+
+    def find_all(self, service: str, resource_type: str) -> list[InventoryEntry]:
+        """
+        :param service: The service of the ARN, e.g. ec2, elasticloadbalancing
+        :param resource_type: The resource type of the ARN, e.g. subnet, targetgroup
+        :return: Every indexed resource of the type
+        """
+        return [entry for entry in self.entries if entry.service == service and entry.resource_type == resource_type]
+
+    def find(self, service: str, resource_type: str, name: str = None) -> InventoryEntry | None:
+        """
+        :param name: Name of the resource, matched against its Name tag or, for resources named by their ID
+                     (e.g. target groups, tables, functions), against the last part of the ID
+        :return: The first indexed resource of the type with the name, None if there is none
+        """
+        for entry in self.find_all(service, resource_type):
+            if name is None or name in (entry.name, self._id_name(entry)):
+                return entry
+        return None
+
+    def discard(self, service: str, resource_type: str, name: str):
+        """
+        Drops a resource deleted since the index was built, so later lookups don't find it.
+        """
+        entry = self.find(service, resource_type, name)
+        if entry is not None:
+            with self._lock:
+                self._entries.remove(entry)
+
+    @staticmethod
+    def _id_name(entry: InventoryEntry) -> str:
+        if entry.service == 'elasticloadbalancing':
+            # e.g. ...:targetgroup/app-target-group/73e2d6bc24d8a067 or ...:loadbalancer/app/Web-Application-ALB/50dc6c
+            parts = entry.arn.split('/')
+            return parts[-2]
+        return entry.id
+
+    def _query(self) -> list[InventoryEntry]:
+        tag_filter = {'Key': config.STACK_TAG_KEY, 'Values': [self._stack_name]}
+        entries = []
+        paginator = self._tagging_client.get_paginator('get_resources')
+        for page in paginator.paginate(TagFilters=[tag_filter]):
+            for resource in page['ResourceTagMappingList']:
+                tags = {tag['Key']: tag['Value'] for tag in resource.get('Tags', [])}
+                entries.append(InventoryEntry.from_arn(resource['ResourceARN'], tags))
+
+        paginator = self._auto_scaling_client.get_paginator('describe_auto_scaling_groups')
+        for page in paginator.paginate(Filters=[{'Name': f"tag:{config.STACK_TAG_KEY}",
+                                                 'Values': [self._stack_name]}]):
+            for group in page['AutoScalingGroups']:
+                tags = {tag['Key']: tag['Value'] for tag in group.get('Tags', [])}
+                entries.append(InventoryEntry.from_arn(group['AutoScalingGroupARN'], tags))
+
+        self._logger.debug(f"Inventory of stack '{self._stack_name}': {len(entries)} resource(s)")
+        return entries
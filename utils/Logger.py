@@ -1,5 +1,6 @@
 import inspect
 import os
+import threading
 
 
 def _get_line_info():
@@ -12,26 +13,31 @@ def _get_line_info():
 class Logger:
     def __init__(self, output_function=print):
         self.output_function = output_function
+        self._lock = threading.Lock()  # managers log from several worker threads at once
+
+    def _write(self, msg):
+        with self._lock:
+            self.output_function(msg)
 
     def log(self, msg):
         line_info = _get_line_info()
-        self.output_function(f"**LOG:**({line_info}) {msg}")
+        self._write(f"**LOG:**({line_info}) {msg}")
 
     def debug(self, msg):
         line_info = _get_line_info()
-        self.output_function(f"**DEBUG:**({line_info}) {msg}")
+        self._write(f"**DEBUG:**({line_info}) {msg}")
 
     def info(self, msg):
         line_info = _get_line_info()
-        self.output_function(f"**INFO:**({line_info}) {msg}")
+        self._write(f"**INFO:**({line_info}) {msg}")
 
     def warning(self, msg):
         line_info = _get_line_info()
-        self.output_function(f"**WARNING:**({line_info}) {msg}")
+        self._write(f"**WARNING:**({line_info}) {msg}")
 
     def error(self, msg):
         line_info = _get_line_info()
-        self.output_function(f"**ERROR:**({line_info}) {msg}")
+        self._write(f"**ERROR:**({line_info}) {msg}")
 
 
 # Example usage:
@@ -0,0 +1,177 @@
+import copy
+import random
+import time
+from typing import Callable, Iterator
+
+from utils.Tracer import tracer
+
+THROTTLING_ERROR_CODES = {'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottled',
+                          'RequestThrottledException', 'TooManyRequestsException', 'RequestLimitExceeded',
+                          'ProvisionedThroughputExceededException', 'SlowDown', 'BandwidthLimitExceeded',
+                          'RequestLimitExceededException', 'PriorRequestNotComplete'}
+
+# Conditions that clear by themselves once another resource finishes changing state
+RETRYABLE_ERROR_CODES = THROTTLING_ERROR_CODES | {
+    'DependencyViolation',  # e.g. a subnet still holding the ENIs of terminating instances
+    'InvalidGroup.InUse', 'ResourceInUse', 'ResourceInUseException', 'ResourceInUseFault',
+    'ResourceConflictException', 'ResourceNotReady', 'IncorrectState', 'IncorrectInstanceState',
+    'ScalingActivityInProgress', 'ScalingActivityInProgressFault', 'OperationAborted', 'Conflict',
+    'NoSuchEntity',  # IAM is eventually consistent, a role just created may not be visible yet
+    'InternalError', 'InternalFailure', 'ServiceUnavailable', 'Unavailable',
+}
+
+# The resource doesn't exist (any longer), fatal while provisioning and the wanted outcome of a deletion.
+# Codes ending in .NotFound (e.g. InvalidKeyPair.NotFound) are included as well
+GONE_ERROR_CODES = {
+    'NotFound', 'NoSuchBucket', 'NoSuchKey', 'ResourceNotFoundException', 'ResourceNotFound',
+    'LoadBalancerNotFound', 'TargetGroupNotFound', 'ListenerNotFound',
+}
+
+# Messages of otherwise fatal error codes, caused by an IAM role or instance profile not yet propagated
+IAM_PROPAGATION_MESSAGES = ('cannot be assumed', 'role defined for the function', 'Invalid IAM Instance Profile')
+
+# Python errors raised by bugs rather than by the state of a resource
+PROGRAMMING_ERRORS = (TypeError, AttributeError, KeyError, NameError, ValueError, NotImplementedError)
+
+
+def error_code(exception: Exception) -> str | None:
+    """
+    :return: The AWS error code of a botocore ClientError, None for any other exception
+    """
+    response = getattr(exception, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
+
+
+def is_iam_propagation_error(exception: Exception) -> bool:
+    """
+    :return: Whether the error is caused by an IAM role or instance profile that isn't usable everywhere yet
+    """
+    return error_code(exception) is not None and any(message in str(exception) for message in IAM_PROPAGATION_MESSAGES)
+
+
+def is_gone_error(exception: Exception) -> bool:
+    """
+    :return: Whether the error reports that the resource doesn't exist
+    """
+    code = error_code(exception)
+    return code is not None and (code in GONE_ERROR_CODES or code.endswith('.NotFound'))
+
+
+def is_retryable(exception: Exception) -> bool:
+    """
+    Classifies an error as transient (dependency violations, IAM propagation, resources changing state,
+    throttling) or fatal (invalid parameters, permissions, limits, missing resources, bugs).
+    """
+    # botocore is imported on first use, not at startup (see benchmarks/import_time_benchmark.py)
+    from botocore.exceptions import ParamValidationError
+
+    code = error_code(exception)
+    if code is None:
+        return not isinstance(exception, (*PROGRAMMING_ERRORS, ParamValidationError))
+    if code in RETRYABLE_ERROR_CODES:
+        return True
+    if is_iam_propagation_error(exception):
+        return True
+    # Invalid parameters, permissions, limits, missing resources (GONE_ERROR_CODES) and unknown codes fail fast,
+    # a transient condition missing above is cheaper to add than a backoff on every error nobody listed
+    return False
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1, max_delay: float = 20, multiplier: float = 2,
+                 deadline: float = None, is_retryable: Callable[[Exception], bool] = is_retryable, logger=None):
+        """
+        Retries an operation with exponential backoff and full jitter, only for errors classified as retryable,
+        until the attempts run out or the deadline passes.
+
+        :param max_attempts: Maximum number of attempts, including the first one
+        :param base_delay: Delay in seconds before the first retry, before jitter
+        :param max_delay: Upper bound of the delay between attempts
+        :param multiplier: Growth factor of the delay after every attempt
+        :param deadline: Seconds from the first attempt after which no new attempt is started (None for no deadline)
+        :param is_retryable: Classifies an exception as retryable
+        :param logger: Logger instance for logging operations
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.deadline = deadline
+        self.is_retryable = is_retryable
+        self._logger = logger
+
+    def replace(self, **changes) -> 'RetryPolicy':
+        """
+        :return: A copy of the policy with the given attributes changed, e.g. policy.replace(deadline=60)
+        """
+        policy = copy.copy(self)
+        for name, value in changes.items():
+            if not hasattr(policy, name):
+                raise AttributeError(f"RetryPolicy has no attribute '{name}'")
+            setattr(policy, name, value)
+        return policy
+
+    def delays(self) -> Iterator[float]:
+        """
+        :return: The delays before each retry, max_attempts - 1 of them
+        """
+        for attempt in range(self.max_attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * self.multiplier ** attempt))
+
+    def call(self, func: Callable, name: str = None):
+        """
+        Calls func until it returns without raising a retryable error.
+
+        :param func: The operation, called without arguments
+        :param name: Name of the operation in the logs and in the trace of the sleeps
+        :return: The return value of func
+        :raises: The last error once it is fatal, the attempts run out or the next attempt would pass the deadline
+        """
+        name = name or getattr(func, '__qualname__', 'operation')
+        start = time.monotonic()
+        delays = self.delays()
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                if not self.is_retryable(e):
+                    self._log_debug(f"'{name}' failed with a non-retryable error: {e}")
+                    raise
+
+                delay = next(delays, None)
+                if delay is None:
+                    self._log_debug(f"'{name}' failed after {attempt} attempt(s): {e}")
+                    raise
+                if self.deadline is not None and time.monotonic() - start + delay > self.deadline:
+                    self._log_debug(f"'{name}' failed and its {self.deadline}s deadline leaves no time to retry: {e}")
+                    raise
+
+                self._log_debug(f"'{name}' failed ({e}), attempt {attempt + 1}/{self.max_attempts} "
+                                f"in {delay:.1f} seconds")
+                tracer.sleep(delay, reason=name)
+                attempt += 1
+
+    def wait_until(self, condition: Callable[[], bool], name: str = None) -> bool:
+        """
+        Polls condition with the backoff of the policy until it holds.
+
+        :param condition: Returns whether the awaited state is reached
+        :param name: Name of the wait in the logs and in the trace of the sleeps
+        :return: Whether the condition held before the attempts ran out or the deadline passed
+        """
+        name = name or getattr(condition, '__qualname__', 'condition')
+        start = time.monotonic()
+        for delay in self.delays():
+            if condition():
+                return True
+            if self.deadline is not None and time.monotonic() - start + delay > self.deadline:
+                break
+            tracer.sleep(delay, reason=name)
+        return condition()
+
+    def _log_debug(self, message: str):
+        if self._logger:
+            self._logger.debug(message)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def config_hash(*values) -> str:
+    """
+    :return: A stable hash of JSON-like values, e.g. a step's configuration and inputs
+    """
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class StateStore:
+    def __init__(self, path: str, logger):
+        """
+        Persists, per provisioning step, the IDs of the resources it created and the hash of the configuration
+        it created them from, so a later run can reuse unchanged resources instead of creating them again.
+        Written after every change, so the IDs survive a run that crashes midway.
+
+        :param path: The JSON file holding the state
+        :param logger: Logger instance for logging operations
+        """
+        self._path = path
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._steps = self._read()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def get(self, step: str) -> dict | None:
+        """
+        :return: The recorded {'config_hash', 'outputs'} of the step, None if the step never completed
+        """
+        with self._lock:
+            return self._steps.get(step)
+
+    def record(self, step: str, step_config_hash: str, outputs: dict):
+        with self._lock:
+            self._steps[step] = {'config_hash': step_config_hash, 'outputs': outputs}
+            self._write()
+
+    def remove(self, step: str):
+        with self._lock:
+            if self._steps.pop(step, None) is not None:
+                self._write()
+
+    def clear(self):
+        with self._lock:
+            self._steps = {}
+            if os.path.exists(self._path):
+                os.remove(self._path)
+
+    def _read(self) -> dict:
+        if not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path) as file:
+                return json.load(file)['steps']
+        except (OSError, ValueError, KeyError) as e:
+            self._logger.warning(f"Ignoring unreadable deployment state {self._path}: {e}")
+            return {}
+
+    def _write(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file first, so a crash mid-write can't corrupt the previous state
+        temporary_path = f"{self._path}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump({'steps': self._steps}, file, indent=2, default=str)
+        os.replace(temporary_path, self._path)
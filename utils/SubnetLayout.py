@@ -0,0 +1,72 @@
+import ipaddress
+
+
+class CidrAllocator:
+    def __init__(self, cidr_block: str, prefix_length: int):
+        """
+        Carves consecutive, non-overlapping subnets of one size out of a VPC CIDR block.
+
+        :param cidr_block: The CIDR block of the VPC, e.g. 10.0.0.0/16
+        :param prefix_length: The prefix length of every subnet, e.g. 24
+        """
+        self._network = ipaddress.ip_network(cidr_block)
+        if not self._network.prefixlen <= prefix_length <= self._network.max_prefixlen:
+            raise ValueError(f"Can't carve /{prefix_length} subnets out of {cidr_block}")
+        self._subnets = self._network.subnets(new_prefix=prefix_length)
+
+    def allocate(self) -> str:
+        """
+        :return: The next free subnet, e.g. 10.0.2.0/24
+        :raises ValueError: The CIDR block has no room left
+        """
+        subnet = next(self._subnets, None)
+        if subnet is None:
+            raise ValueError(f"No room left in {self._network} for another subnet")
+        return str(subnet)
+
+
+def usable_availability_zones(ec2_client, instance_type: str = None) -> tuple[list[str], list[str]]:
+    """
+    :param ec2_client: Boto3 client object for EC2
+    :param instance_type: Zones that don't offer the instance type aren't usable (None to skip the check)
+    :return: Every availability zone of the region in name order, and the ones a subnet can be placed in: available,
+             enabled for the account and, if given, offering the instance type. Local and Wavelength zones are left out
+    """
+    response = ec2_client.describe_availability_zones(
+        Filters=[{'Name': 'zone-type', 'Values': ['availability-zone']}])
+    zones = sorted(response['AvailabilityZones'], key=lambda zone: zone['ZoneName'])
+    usable = [zone['ZoneName'] for zone in zones
+              if zone['State'] == 'available' and zone.get('OptInStatus') != 'not-opted-in']
+
+    if instance_type:
+        offerings = ec2_client.get_paginator('describe_instance_type_offerings').paginate(
+            LocationType='availability-zone', Filters=[{'Name': 'instance-type', 'Values': [instance_type]}])
+        offered = {offering['Location'] for page in offerings for offering in page['InstanceTypeOfferings']}
+        usable = [zone for zone in usable if zone in offered]
+
+    return [zone['ZoneName'] for zone in zones], usable
+
+
+def subnet_layout(cidr_block: str, prefix_length: int, zones: list[str], usable_zones: list[str],
+                  max_zones: int = None, name_prefix: str = 'PublicSubnet') -> list[dict]:
+    """
+    Lays out one subnet per usable availability zone. Every zone of the region keeps the same block, whether or not
+    it is usable, so a zone becoming usable or unusable doesn't move the subnets of the other zones.
+
+    :param cidr_block: The CIDR block of the VPC
+    :param prefix_length: The prefix length of every subnet
+    :param zones: Every availability zone of the region, in name order
+    :param usable_zones: The zones to place a subnet in
+    :param max_zones: Upper bound of the zones to spread across (None for all of them)
+    :param name_prefix: Prefix of the subnet names, followed by the zone letter, e.g. PublicSubnetA
+    :return: The subnets parameters VPCManager.create_subnets takes
+    """
+    allocator = CidrAllocator(cidr_block, prefix_length)
+    layout = []
+    for zone in zones:
+        subnet_cidr_block = allocator.allocate()
+        if zone in usable_zones and (max_zones is None or len(layout) < max_zones):
+            layout.append({"subnet_name": f"{name_prefix}{zone[-1].upper()}",
+                           "cidr_block": subnet_cidr_block,
+                           "availability_zone": zone})
+    return layout
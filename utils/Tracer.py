@@ -0,0 +1,228 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+
+class Span:
+    def __init__(self, name: str, category: str, phase: str, start: float, thread_id: int, args: dict):
+        self.name = name
+        self.category = category
+        self.phase = phase
+        self.start = start
+        self.end = None
+        self.thread_id = thread_id
+        self.args = args
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> dict:
+        return {'name': self.name,
+                'category': self.category,
+                'phase': self.phase,
+                'start': self.start - origin,
+                'duration': self.duration,
+                'thread_id': self.thread_id,
+                'args': self.args}
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Records every manager operation, waiter wait and retry sleep as a timed span, grouped by phase
+        (e.g. deploy, teardown).
+        """
+        self._origin = time.perf_counter()
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._phase = None
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    @property
+    def current_phase(self) -> str:
+        return self._phase
+
+    def current_span(self, category: str = None) -> Span | None:
+        """
+        :param category: Only consider spans of this category
+        :return: The innermost span open on the calling thread
+        """
+        for span in reversed(getattr(self._local, 'stack', [])):
+            if category is None or span.category == category:
+                return span
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._spans = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Attributes the spans opened inside the block, on any thread, to the given phase.
+        """
+        previous, self._phase = self._phase, name
+        try:
+            with self.span(name, category='phase'):
+                yield
+        finally:
+            self._phase = previous
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = 'operation', **args):
+        span = Span(name=name, category=category, phase=self._phase, start=time.perf_counter(),
+                    thread_id=threading.get_ident(), args=args)
+        with self._lock:
+            self._spans.append(span)
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(span)
+        try:
+            yield span
+        except Exception as e:
+            span.args['error'] = str(e)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+
+    def record(self, name: str, category: str, start: float, end: float, **args):
+        """
+        Adds an already finished span, for operations whose start and end are observed by separate callbacks.
+        """
+        span = Span(name=name, category=category, phase=self._phase, start=start,
+                    thread_id=threading.get_ident(), args=args)
+        span.end = end
+        with self._lock:
+            self._spans.append(span)
+
+    def sleep(self, seconds: float, reason: str = 'retry'):
+        with self.span(f"sleep:{reason}", category='sleep', seconds=seconds):
+            time.sleep(seconds)
+
+    def critical_path(self, phase: str) -> list[Span]:
+        """
+        Walks back from the step that finished last, through the dependency that finished last,
+        to find the chain of steps that determined the duration of the phase.
+
+        :param phase: The phase name
+        :return: The steps on the critical path, in execution order
+        """
+        steps = {span.name: span for span in self.spans
+                 if span.category == 'step' and span.phase == phase and span.end is not None}
+        if not steps:
+            return []
+
+        path = [max(steps.values(), key=lambda span: span.end)]
+        while True:
+            dependencies = [steps[name] for name in path[-1].args.get('dependencies', []) if name in steps]
+            if not dependencies:
+                break
+            path.append(max(dependencies, key=lambda span: span.end))
+
+        return list(reversed(path))
+
+    def summary(self) -> dict:
+        """
+        :return: For every phase, its wall-clock time, the time its steps would take one after another,
+                 and the critical path through its steps
+        """
+        summary = {}
+        for span in self.spans:
+            if span.category != 'phase':
+                continue
+            steps = [s for s in self.spans if s.category == 'step' and s.phase == span.name]
+            critical_path = self.critical_path(span.name)
+            summary[span.name] = {
+                'wall_time': span.duration,
+                'serial_time': sum(step.duration for step in steps),
+                'critical_path_time': sum(step.duration for step in critical_path),
+                'critical_path': [{'step': step.name, 'duration': step.duration} for step in critical_path]
+            }
+
+        return summary
+
+    def log_summary(self, logger, phase: str = None):
+        for name, phase_summary in self.summary().items():
+            if phase and name != phase:
+                continue
+            path = ' -> '.join(f"{step['step']} ({step['duration']:.1f}s)" for step in phase_summary['critical_path'])
+            logger.info(f"Phase '{name}' took {phase_summary['wall_time']:.1f}s "
+                        f"(steps one after another: {phase_summary['serial_time']:.1f}s), "
+                        f"critical path {phase_summary['critical_path_time']:.1f}s: {path}")
+
+    def export_chrome_trace(self, path: str, phase: str = None):
+        """
+        Writes the spans in the Chrome trace event format, viewable in chrome://tracing or Perfetto.
+
+        :param path: The output file path
+        :param phase: Export only the spans of this phase
+        """
+        events = []
+        for span in self.spans:
+            if phase and span.phase != phase:
+                continue
+            events.append({'name': span.name,
+                           'cat': span.category,
+                           'ph': 'X',
+                           'ts': (span.start - self._origin) * 1e6,
+                           'dur': span.duration * 1e6,
+                           'pid': os.getpid(),
+                           'tid': span.thread_id,
+                           'args': {'phase': span.phase, **span.args}})
+
+        self._write_json(path, {'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+    def export_timeline(self, path: str, phase: str = None):
+        """
+        Writes the spans, sorted by start time, together with the per phase summary as JSON.
+
+        :param path: The output file path
+        :param phase: Export only the spans of this phase
+        """
+        spans = sorted((span for span in self.spans if not phase or span.phase == phase), key=lambda s: s.start)
+        summary = self.summary()
+        if phase:
+            summary = {phase: summary.get(phase)}
+
+        self._write_json(path, {'spans': [span.to_dict(self._origin) for span in spans], 'summary': summary})
+
+    @staticmethod
+    def _write_json(path: str, content: dict):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(content, file, indent=2, default=str)
+
+
+# Shared by all managers, so spans from the whole run end up on one timeline
+tracer = Tracer()
+
+
+def traced(name: str = None, category: str = 'operation'):
+    """
+    Decorator recording every call of the decorated function as a span of the shared tracer.
+
+    :param name: Span name, defaults to the qualified function name (e.g. VPCManager.create_vpc)
+    :param category: Span category
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, category=category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator